@@ -1,13 +1,21 @@
 """
 Sistema de autenticação JWT
 """
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, Optional, Tuple
+from uuid import uuid4
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from models import TokenData
+from metricas import registro
+from revogacao import RevogacaoTokens
 from config import settings
 
 # Contexto para hash de senhas
@@ -44,10 +52,185 @@ def obter_hash_senha(senha: str) -> str:
     return pwd_context.hash(senha)
 
 
+class ServicoHashSaturado(Exception):
+    """Lançada quando a fila do pool de hashing está cheia"""
+
+
+class ServicoHash:
+    """
+    Executa hashing e verificação bcrypt fora do event loop
+    
+    As operações rodam em um pool limitado (threads ou processos). O número
+    de operações pendentes (em execução + em fila) é limitado a
+    `workers + max_fila`; acima disso a chamada é rejeitada imediatamente
+    para que o chamador responda 429 em vez de acumular latência.
+    
+    Uma operação deixa de contar como pendente quando o pool a conclui, e
+    não quando a requisição que a aguardava termina: uma requisição
+    cancelada não libera a vaga de um bcrypt que continua executando.
+    """
+    
+    def __init__(self, workers: int, max_fila: int, tipo_pool: str = "thread"):
+        if tipo_pool not in ("thread", "process"):
+            raise ValueError("tipo_pool deve ser 'thread' ou 'process'")
+        
+        self.workers = max(1, workers)
+        self.max_fila = max(0, max_fila)
+        self.tipo_pool = tipo_pool
+        self._executor: Optional[Executor] = None
+        
+        # Métricas (alteradas apenas no event loop)
+        self.pendentes = 0
+        self.total_executadas = 0
+        self.total_rejeitadas = 0
+        self.total_falhas = 0
+        self.tempo_total = 0.0
+    
+    def _obter_executor(self) -> Executor:
+        """Cria o pool sob demanda"""
+        if self._executor is None:
+            if self.tipo_pool == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="hash-senha"
+                )
+        return self._executor
+    
+    async def _executar(self, operacao: str, funcao: Callable, *args):
+        """Submete uma operação ao pool respeitando o limite da fila"""
+        if self.pendentes >= self.workers + self.max_fila:
+            self.total_rejeitadas += 1
+            raise ServicoHashSaturado("Pool de hashing saturado")
+        
+        loop = asyncio.get_running_loop()
+        inicio = time.perf_counter()
+        futuro = self._obter_executor().submit(funcao, *args)
+        self.pendentes += 1
+        futuro.add_done_callback(
+            lambda concluido: self._ao_concluir(loop, operacao, inicio, concluido)
+        )
+        return await asyncio.wrap_future(futuro)
+    
+    def _ao_concluir(self, loop, operacao: str, inicio: float, futuro):
+        """Callback do futuro do pool (roda na thread que concluiu a operação)"""
+        duracao = time.perf_counter() - inicio
+        try:
+            loop.call_soon_threadsafe(self._registrar_conclusao, operacao, duracao, futuro)
+        except RuntimeError:
+            # Event loop já encerrado
+            pass
+    
+    def _registrar_conclusao(self, operacao: str, duracao: float, futuro):
+        """Atualiza as métricas no event loop; só sucessos entram no tempo médio"""
+        self.pendentes -= 1
+        if futuro.cancelled():
+            return
+        if futuro.exception() is not None:
+            self.total_falhas += 1
+            return
+        self.total_executadas += 1
+        self.tempo_total += duracao
+        registro.observar_operacao(operacao, duracao)
+    
+    async def hash(self, senha: str) -> str:
+        """Gera o hash de uma senha no pool"""
+        return await self._executar("bcrypt_hash", obter_hash_senha, senha)
+    
+    async def verificar(self, senha_plana: str, senha_hash: str) -> bool:
+        """Verifica uma senha no pool"""
+        return await self._executar("bcrypt_verificacao", verificar_senha, senha_plana, senha_hash)
+    
+    def metricas(self) -> dict:
+        """Retorna a utilização atual do pool"""
+        em_execucao = min(self.pendentes, self.workers)
+        tempo_medio = (
+            self.tempo_total / self.total_executadas if self.total_executadas else 0.0
+        )
+        return {
+            "tipo_pool": self.tipo_pool,
+            "workers": self.workers,
+            "max_fila": self.max_fila,
+            "em_execucao": em_execucao,
+            "em_fila": self.pendentes - em_execucao,
+            "utilizacao": round(em_execucao / self.workers, 4),
+            "total_executadas": self.total_executadas,
+            "total_rejeitadas": self.total_rejeitadas,
+            "total_falhas": self.total_falhas,
+            "tempo_medio_ms": round(tempo_medio * 1000, 3)
+        }
+    
+    def encerrar(self):
+        """Finaliza o pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Instância global do serviço de hashing
+servico_hash = ServicoHash(
+    workers=settings.HASH_POOL_WORKERS,
+    max_fila=settings.HASH_MAX_FILA,
+    tipo_pool=settings.HASH_POOL_TIPO
+)
+
+
+def _excecao_saturacao() -> HTTPException:
+    """Resposta padrão quando o pool de hashing está saturado"""
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Servidor ocupado, tente novamente em instantes",
+        headers={"Retry-After": "1"},
+    )
+
+
+async def obter_hash_senha_async(senha: str) -> str:
+    """
+    Gera hash de uma senha sem bloquear o event loop
+    
+    Args:
+        senha: Senha em texto plano
+        
+    Returns:
+        str: Hash da senha
+        
+    Raises:
+        HTTPException: 429 se o pool de hashing estiver saturado
+    """
+    try:
+        return await servico_hash.hash(senha)
+    except ServicoHashSaturado:
+        raise _excecao_saturacao()
+
+
+async def verificar_senha_async(senha_plana: str, senha_hash: str) -> bool:
+    """
+    Verifica uma senha sem bloquear o event loop
+    
+    Args:
+        senha_plana: Senha em texto plano
+        senha_hash: Hash da senha armazenada
+        
+    Returns:
+        bool: True se a senha corresponde, False caso contrário
+        
+    Raises:
+        HTTPException: 429 se o pool de hashing estiver saturado
+    """
+    try:
+        return await servico_hash.verificar(senha_plana, senha_hash)
+    except ServicoHashSaturado:
+        raise _excecao_saturacao()
+
+
 def criar_token_acesso(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Cria um token JWT de acesso
     
+    Cada token recebe um `jti` aleatório, que permite revogá-lo antes do
+    `exp` (ver `identificar_token` e `revogar_token`).
+    
     Args:
         data: Dados a serem codificados no token
         expires_delta: Tempo de expiração do token
@@ -61,11 +244,112 @@ def criar_token_acesso(data: dict, expires_delta: Optional[timedelta] = None) ->
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
+class CacheTokens:
+    """
+    Cache LRU de tokens JWT já verificados
+    
+    A chave é o SHA-256 do token e o valor é o CPF e o `jti` com o instante
+    de expiração da entrada, que nunca ultrapassa o `exp` do próprio token.
+    O `jti` fica em cache para que a revogação seja conferida também nos
+    acertos.
+    """
+    
+    def __init__(self, tamanho_maximo: int, ttl_segundos: int):
+        self.tamanho_maximo = tamanho_maximo
+        self.ttl_segundos = ttl_segundos
+        self._itens: "OrderedDict[bytes, Tuple[str, Optional[str], float]]" = OrderedDict()
+        
+        # Métricas
+        self.acertos = 0
+        self.falhas = 0
+        self.invalidacoes = 0
+    
+    @staticmethod
+    def _chave(token: str) -> bytes:
+        """Gera a chave do cache a partir do token"""
+        return hashlib.sha256(token.encode()).digest()
+    
+    def obter(self, token: str) -> Optional[Tuple[str, Optional[str]]]:
+        """Retorna o CPF e o `jti` do token, se estiver em cache e válido"""
+        if self.tamanho_maximo <= 0:
+            return None
+        
+        chave = self._chave(token)
+        item = self._itens.get(chave)
+        if item is None:
+            self.falhas += 1
+            return None
+        
+        cpf, jti, expira_em = item
+        if expira_em <= time.time():
+            del self._itens[chave]
+            self.falhas += 1
+            return None
+        
+        self._itens.move_to_end(chave)
+        self.acertos += 1
+        return cpf, jti
+    
+    def armazenar(self, token: str, cpf: str, exp: Optional[float], jti: Optional[str] = None):
+        """Armazena um token verificado até o menor entre o TTL e o `exp`"""
+        if self.tamanho_maximo <= 0:
+            return
+        
+        expira_em = time.time() + self.ttl_segundos
+        if exp is not None:
+            expira_em = min(expira_em, float(exp))
+        
+        chave = self._chave(token)
+        self._itens[chave] = (cpf, jti, expira_em)
+        self._itens.move_to_end(chave)
+        while len(self._itens) > self.tamanho_maximo:
+            self._itens.popitem(last=False)
+    
+    def invalidar(self, token: str):
+        """Remove um token do cache (ex: logout)"""
+        if self._itens.pop(self._chave(token), None) is not None:
+            self.invalidacoes += 1
+    
+    def metricas(self) -> dict:
+        """Retorna contadores de uso do cache"""
+        consultas = self.acertos + self.falhas
+        return {
+            "tamanho": len(self._itens),
+            "tamanho_maximo": self.tamanho_maximo,
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "taxa_acerto": round(self.acertos / consultas, 4) if consultas else 0.0,
+            "invalidacoes": self.invalidacoes
+        }
+
+
+# Instância global do cache de tokens
+cache_tokens = CacheTokens(
+    tamanho_maximo=settings.JWT_CACHE_TAMANHO,
+    ttl_segundos=settings.JWT_CACHE_TTL_SEGUNDOS
+)
+
+
+# Instância global da lista de tokens revogados
+revogacoes = RevogacaoTokens(
+    capacidade=settings.REVOGACAO_CAPACIDADE,
+    taxa_falso_positivo=settings.REVOGACAO_TAXA_FALSO_POSITIVO
+)
+
+
+def _excecao_credenciais() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Não foi possível validar as credenciais",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
 async def obter_usuario_atual(token: str = Depends(oauth2_scheme)) -> str:
     """
     Obtém o usuário atual a partir do token JWT
@@ -77,26 +361,68 @@ async def obter_usuario_atual(token: str = Depends(oauth2_scheme)) -> str:
         str: CPF do usuário autenticado
         
     Raises:
-        HTTPException: Se o token for inválido
+        HTTPException: Se o token for inválido ou tiver sido revogado
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Não foi possível validar as credenciais",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+    em_cache = cache_tokens.obter(token)
+    if em_cache is not None:
+        cpf, jti = em_cache
+        if jti is not None and revogacoes.revogado(jti):
+            raise _excecao_credenciais()
+        return cpf
     
+    inicio = time.perf_counter()
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         cpf: str = payload.get("sub")
         if cpf is None:
-            raise credentials_exception
+            raise _excecao_credenciais()
         token_data = TokenData(cpf=cpf)
     except JWTError:
-        raise credentials_exception
+        raise _excecao_credenciais()
+    finally:
+        registro.observar_operacao("jwt_decodificacao", time.perf_counter() - inicio)
     
+    # Tokens emitidos antes do `jti` não podem ser revogados e valem até o `exp`
+    jti = payload.get("jti")
+    if jti is not None and revogacoes.revogado(jti):
+        raise _excecao_credenciais()
+    
+    cache_tokens.armazenar(token, token_data.cpf, payload.get("exp"), jti)
     return token_data.cpf
 
 
+def identificar_token(token: str) -> Optional[Tuple[str, float]]:
+    """
+    Identifica um token para revogação
+    
+    Args:
+        token: Token JWT
+        
+    Returns:
+        Optional[Tuple[str, float]]: `jti` e `exp` do token; None se ele for
+            inválido ou não tiver `jti`
+    """
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    jti = payload.get("jti")
+    if jti is None or payload.get("exp") is None:
+        return None
+    return jti, float(payload["exp"])
+
+
+def revogar_token(token: str, jti: str, exp: float):
+    """
+    Revoga um token neste processo até o seu `exp` (ex: logout)
+    
+    Os demais workers passam a recusá-lo ao sincronizar com o backend,
+    onde a revogação deve ter sido gravada antes.
+    """
+    revogacoes.revogar(jti, exp)
+    cache_tokens.invalidar(token)
+
+
 def validar_token(token: str) -> Optional[str]:
     """
     Valida um token JWT e retorna o CPF do usuário
@@ -109,7 +435,9 @@ def validar_token(token: str) -> Optional[str]:
     """
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        cpf: str = payload.get("sub")
-        return cpf
     except JWTError:
         return None
+    jti = payload.get("jti")
+    if jti is not None and revogacoes.revogado(jti):
+        return None
+    return payload.get("sub")
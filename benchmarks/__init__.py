@@ -0,0 +1,6 @@
+"""
+Benchmarks da API Bancária
+
+Execute a partir da raiz do projeto, por exemplo:
+    python -m benchmarks.armazenamento
+"""
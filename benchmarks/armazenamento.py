@@ -0,0 +1,119 @@
+"""
+Benchmark dos backends de armazenamento
+
+Compara o DatabaseSimulator em memória com o backend SQLite (WAL) e,
+opcionalmente, com o PostgreSQL nas operações usadas pelos endpoints.
+
+Uso:
+    python -m benchmarks.armazenamento --contas 200 --transacoes 20000
+    python -m benchmarks.armazenamento --postgres-dsn postgresql://...
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from models import TipoConta, TipoTransacao
+from database import DatabaseSimulator
+from database_sqlite import RepositorioSQLite
+from repositorio import aguardar
+
+
+async def medir(funcao, repeticoes: int) -> dict:
+    """Executa a função N vezes e retorna vazão e latência média"""
+    inicio = time.perf_counter()
+    for i in range(repeticoes):
+        await aguardar(funcao(i))
+    duracao = time.perf_counter() - inicio
+    return {
+        "operacoes": repeticoes,
+        "ops_por_segundo": round(repeticoes / duracao, 1),
+        "latencia_media_us": round(duracao / repeticoes * 1_000_000, 2)
+    }
+
+
+async def executar(repo, contas: int, transacoes: int) -> dict:
+    """Roda o cenário completo contra um backend"""
+    resultados = {}
+    conta_ids = []
+    await aguardar(repo.iniciar())
+    
+    async def criar(i):
+        usuario = await aguardar(
+            repo.criar_usuario(f"Usuario {i}", str(i).zfill(11), "hash")
+        )
+        conta = await aguardar(repo.criar_conta(usuario["id"], TipoConta.CORRENTE))
+        conta_ids.append(conta["id"])
+    
+    resultados["criar_usuario_e_conta"] = await medir(criar, contas)
+    
+    async def transacionar(i):
+        conta_id = conta_ids[i % len(conta_ids)]
+        tipo = TipoTransacao.DEPOSITO if i % 3 else TipoTransacao.SAQUE
+        try:
+            await aguardar(
+                repo.criar_transacao(conta_id, tipo, random.randint(100, 50_000))
+            )
+        except ValueError:
+            pass
+    
+    resultados["criar_transacao"] = await medir(transacionar, transacoes)
+    resultados["obter_usuario_por_cpf"] = await medir(
+        lambda i: repo.obter_usuario_por_cpf(str(i % contas).zfill(11)), transacoes
+    )
+    resultados["obter_transacoes_por_conta"] = await medir(
+        lambda i: repo.obter_transacoes_por_conta(conta_ids[i % len(conta_ids)]),
+        contas
+    )
+    resultados["obter_transacoes_paginadas"] = await medir(
+        lambda i: repo.obter_transacoes_paginadas(
+            conta_ids[i % len(conta_ids)], limit=50, decrescente=True
+        ),
+        contas
+    )
+    resultados["obter_estatisticas_conta"] = await medir(
+        lambda i: repo.obter_estatisticas_conta(conta_ids[i % len(conta_ids)]),
+        contas
+    )
+    await aguardar(repo.fechar())
+    return resultados
+
+
+async def executar_todos(args) -> dict:
+    """Roda o cenário em todos os backends selecionados"""
+    relatorio = {
+        "memoria": await executar(DatabaseSimulator(), args.contas, args.transacoes)
+    }
+    
+    with tempfile.TemporaryDirectory() as diretorio:
+        repo = RepositorioSQLite(os.path.join(diretorio, "benchmark.db"))
+        relatorio["sqlite"] = await executar(repo, args.contas, args.transacoes)
+    
+    if args.postgres_dsn:
+        from database_postgres import RepositorioPostgres
+        repo = RepositorioPostgres(args.postgres_dsn)
+        relatorio["postgres"] = await executar(repo, args.contas, args.transacoes)
+    
+    return relatorio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--contas", type=int, default=200)
+    parser.add_argument("--transacoes", type=int, default=20000)
+    parser.add_argument(
+        "--postgres-dsn",
+        help="DSN de um PostgreSQL descartável (o esquema é criado no banco)"
+    )
+    args = parser.parse_args()
+    
+    random.seed(42)
+    relatorio = asyncio.run(executar_todos(args))
+    
+    print(json.dumps(relatorio, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+Testes de carga e latência da API
+
+Dispara requisições concorrentes contra a aplicação, em processo (ASGI,
+via httpx.ASGITransport) ou por sockets reais (um servidor uvicorn
+iniciado em subprocesso, ou um já em execução com --url), e mede a vazão
+e a latência de cada cenário:
+
+- cadastro: rajada de criação de usuários (hash bcrypt por requisição)
+- login: rajada de logins de usuários já cadastrados
+- movimentacao: depósitos e saques misturados entre várias contas
+- extrato: leituras de extratos grandes (página máxima)
+
+O relatório é um JSON com requisições por segundo, latências p50/p95/p99
+e a contagem de status HTTP, para acompanhar regressões entre versões.
+
+Uso:
+    python -m benchmarks.carga
+    python -m benchmarks.carga --modo socket --concorrencia 100 --saida carga.json
+    python -m benchmarks.carga --modo socket --url http://localhost:8000 --cenarios login extrato
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+import httpx
+
+
+DIRETORIO_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SENHA = "senha123"
+
+
+def percentil(ordenadas: list, p: float) -> float:
+    """Percentil pelo posto mais próximo de uma lista ordenada"""
+    if not ordenadas:
+        return 0.0
+    posicao = max(0, min(len(ordenadas) - 1, round(p / 100 * len(ordenadas)) - 1))
+    return ordenadas[posicao]
+
+
+async def coletar(cliente: httpx.AsyncClient, requisicao, total: int, concorrencia: int) -> tuple:
+    """
+    Executa `total` requisições com `concorrencia` em voo
+    
+    Args:
+        requisicao: Corrotina que recebe o cliente e o índice da requisição
+    
+    Returns:
+        tuple: Latências (segundos), contagem por status e duração total
+    """
+    indices = iter(range(total))
+    latencias = []
+    status = Counter()
+    
+    async def trabalhar():
+        for indice in indices:
+            inicio = time.perf_counter()
+            try:
+                resposta = await requisicao(cliente, indice)
+                status[resposta.status_code] += 1
+            except httpx.HTTPError as e:
+                status[type(e).__name__] += 1
+            latencias.append(time.perf_counter() - inicio)
+    
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabalhar() for _ in range(concorrencia)))
+    return latencias, status, time.perf_counter() - inicio
+
+
+def resumir(latencias: list, status: Counter, duracao: float, esperados: set) -> dict:
+    """
+    Vazão, percentis de latência e contagem por status
+    
+    Args:
+        esperados: Status HTTP considerados sucesso do cenário
+    """
+    latencias = sorted(latencias)
+    return {
+        "requisicoes": len(latencias),
+        "falhas": sum(n for codigo, n in status.items() if codigo not in esperados),
+        "rps": round(len(latencias) / duracao, 1),
+        "segundos": round(duracao, 3),
+        "latencia_ms": {
+            nome: round(percentil(latencias, p) * 1000, 2)
+            for nome, p in (("p50", 50), ("p95", 95), ("p99", 99), ("max", 100))
+        },
+        "status": {str(codigo): n for codigo, n in sorted(status.items(), key=str)}
+    }
+
+
+async def disparar(cliente: httpx.AsyncClient, requisicao, total: int, concorrencia: int,
+                   esperados: set) -> dict:
+    """Executa as requisições e resume os tempos"""
+    return resumir(*await coletar(cliente, requisicao, total, concorrencia), esperados)
+
+
+class Usuarios:
+    """CPFs únicos por execução, para rodar várias vezes no mesmo servidor"""
+    
+    def __init__(self):
+        self._base = random.randrange(10 ** 9, 9 * 10 ** 10)
+        self._proximo = 0
+    
+    def novo_cpf(self) -> str:
+        self._proximo += 1
+        return f"{self._base + self._proximo:011d}"
+
+
+async def cadastrar(cliente: httpx.AsyncClient, cpf: str, criar_conta: bool) -> dict:
+    """Cadastra um usuário (e opcionalmente sua conta) e devolve o cabeçalho de autenticação"""
+    resposta = await cliente.post("/usuarios/", json={"nome": "Cliente Carga", "cpf": cpf, "senha": SENHA})
+    assert resposta.status_code == 201, resposta.text
+    resposta = await cliente.post("/login/", data={"username": cpf, "password": SENHA})
+    cabecalho = {"Authorization": f"Bearer {resposta.json()['access_token']}"}
+    if criar_conta:
+        resposta = await cliente.post("/contas/", json={"tipo_conta": "corrente"}, headers=cabecalho)
+        assert resposta.status_code == 201, resposta.text
+    return cabecalho
+
+
+async def cenario_cadastro(cliente: httpx.AsyncClient, usuarios: Usuarios, args) -> dict:
+    cpfs = [usuarios.novo_cpf() for _ in range(args.requisicoes)]
+    
+    async def requisicao(cliente, indice):
+        return await cliente.post(
+            "/usuarios/", json={"nome": "Cliente Carga", "cpf": cpfs[indice], "senha": SENHA}
+        )
+    
+    return await disparar(cliente, requisicao, args.requisicoes, args.concorrencia, {201})
+
+
+async def cenario_login(cliente: httpx.AsyncClient, usuarios: Usuarios, args) -> dict:
+    cpfs = [usuarios.novo_cpf() for _ in range(args.usuarios)]
+    for cpf in cpfs:
+        await cadastrar(cliente, cpf, criar_conta=False)
+    
+    async def requisicao(cliente, indice):
+        return await cliente.post(
+            "/login/", data={"username": cpfs[indice % len(cpfs)], "password": SENHA}
+        )
+    
+    return await disparar(cliente, requisicao, args.requisicoes, args.concorrencia, {200})
+
+
+async def cenario_movimentacao(cliente: httpx.AsyncClient, usuarios: Usuarios, args) -> dict:
+    cabecalhos = [
+        await cadastrar(cliente, usuarios.novo_cpf(), criar_conta=True)
+        for _ in range(args.usuarios)
+    ]
+    sorteio = random.Random(0)
+    
+    async def requisicao(cliente, indice):
+        # 60% depósitos; saques sem saldo são recusados com 400
+        operacao = "deposito" if sorteio.random() < 0.6 else "saque"
+        return await cliente.post(
+            f"/transacoes/{operacao}",
+            json={"valor": sorteio.randint(1, 500), "descricao": "Carga"},
+            headers=cabecalhos[indice % len(cabecalhos)]
+        )
+    
+    return await disparar(cliente, requisicao, args.requisicoes, args.concorrencia, {201, 400})
+
+
+async def cenario_extrato(cliente: httpx.AsyncClient, usuarios: Usuarios, args) -> dict:
+    cabecalho = await cadastrar(cliente, usuarios.novo_cpf(), criar_conta=True)
+    restantes = args.linhas_extrato
+    while restantes > 0:
+        tamanho = min(restantes, 1000)
+        resposta = await cliente.post("/transacoes/lote", json={
+            "transacoes": [
+                {"tipo": "deposito", "valor": 10.5, "descricao": f"Lançamento {i}"}
+                for i in range(tamanho)
+            ]
+        }, headers=cabecalho)
+        assert resposta.status_code == 200, resposta.text
+        restantes -= tamanho
+    
+    # O Starlette acrescenta o charset aos tipos text/*; ele não pode vir duplicado
+    resposta = await cliente.get("/transacoes/extrato/exportar?formato=csv", headers=cabecalho)
+    assert resposta.status_code == 200, resposta.text
+    assert resposta.headers["content-type"] == "text/csv; charset=utf-8", resposta.headers
+    
+    async def requisicao(cliente, indice):
+        return await cliente.get(
+            f"/transacoes/extrato?limit={args.limite_extrato}", headers=cabecalho
+        )
+    
+    return await disparar(cliente, requisicao, args.requisicoes, args.concorrencia, {200})
+
+
+CENARIOS = {
+    "cadastro": cenario_cadastro,
+    "login": cenario_login,
+    "movimentacao": cenario_movimentacao,
+    "extrato": cenario_extrato
+}
+
+
+def porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def aguardar_servidor(url: str, processo: subprocess.Popen, timeout: float = 30.0):
+    """Espera o servidor responder na rota raiz"""
+    limite = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=url) as cliente:
+        while time.monotonic() < limite:
+            if processo.poll() is not None:
+                raise RuntimeError(f"Servidor encerrou com código {processo.returncode}")
+            try:
+                if (await cliente.get("/")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError("Servidor não respondeu a tempo")
+
+
+async def executar(args) -> dict:
+    usuarios = Usuarios()
+    processo = None
+    
+    if args.modo == "asgi":
+        from main import app
+        transporte = httpx.ASGITransport(app=app)
+        cliente = httpx.AsyncClient(transport=transporte, base_url="http://carga", timeout=None)
+    else:
+        url = args.url
+        if url is None:
+            porta = porta_livre()
+            url = f"http://127.0.0.1:{porta}"
+            processo = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+                 "--port", str(porta), "--log-level", "warning", "--no-access-log"],
+                cwd=DIRETORIO_PROJETO
+            )
+            await aguardar_servidor(url, processo)
+        limites = httpx.Limits(
+            max_connections=args.concorrencia, max_keepalive_connections=args.concorrencia
+        )
+        cliente = httpx.AsyncClient(base_url=url, limits=limites, timeout=60.0)
+    
+    try:
+        async with cliente:
+            resultados = {}
+            for nome in args.cenarios:
+                resultados[nome] = await CENARIOS[nome](cliente, usuarios, args)
+    finally:
+        if processo is not None:
+            processo.terminate()
+            processo.wait(timeout=30)
+    
+    return {
+        "modo": args.modo,
+        "concorrencia": args.concorrencia,
+        "requisicoes_por_cenario": args.requisicoes,
+        "cenarios": resultados
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--modo", choices=("asgi", "socket"), default="asgi")
+    parser.add_argument("--url", help="Servidor já em execução (modo socket)")
+    parser.add_argument("--cenarios", nargs="+", choices=list(CENARIOS), default=list(CENARIOS))
+    parser.add_argument("--requisicoes", type=int, default=1000, help="Requisições por cenário")
+    parser.add_argument("--concorrencia", type=int, default=50, help="Requisições em voo")
+    parser.add_argument("--usuarios", type=int, default=50, help="Usuários de login e movimentação")
+    parser.add_argument("--linhas-extrato", type=int, default=10_000)
+    parser.add_argument("--limite-extrato", type=int, default=1000)
+    parser.add_argument("--saida", help="Arquivo onde gravar o relatório JSON")
+    args = parser.parse_args()
+    
+    relatorio = json.dumps(asyncio.run(executar(args)), indent=2)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            arquivo.write(relatorio + "\n")
+    print(relatorio)
+
+
+if __name__ == "__main__":
+    main()
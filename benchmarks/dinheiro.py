@@ -0,0 +1,163 @@
+"""
+Benchmark de valores monetários: float em reais x int em centavos
+
+Mede o custo por transação do cálculo de saldo e dos agregados no modelo
+anterior (float com round(..., 2) a cada passo) e no atual (centavos
+inteiros), e a exatidão dos totais em relação a uma soma com Decimal.
+Também compara a reconstrução de agregados pelas colunas da
+TabelaTransacoes com o laço sobre dicts.
+
+Uso:
+    python -m benchmarks.dinheiro --transacoes 1000000
+"""
+from array import array
+from datetime import datetime, timedelta
+from decimal import Decimal
+import argparse
+import json
+import random
+import time
+from dinheiro import formatar_reais
+from models import TipoTransacao
+from repositorio import novas_estatisticas, acumular_estatisticas, periodo_da_data
+from transacoes_compactas import TabelaTransacoes
+
+
+def gerar_valores(quantidade: int, semente: int = 42) -> list:
+    """Valores em centavos com centavos "quebrados" (ex: 0,10, 19,99)"""
+    rnd = random.Random(semente)
+    return [rnd.randint(1, 100_000) for _ in range(quantidade)]
+
+
+def motor_float(valores_reais: list) -> dict:
+    """Modelo anterior: saldo e totais em float arredondados a cada operação"""
+    saldo = 0.0
+    totais = {"total_depositos": 0.0, "total_saques": 0.0}
+    for i, valor in enumerate(valores_reais):
+        valor = round(valor, 2)
+        if i % 3 == 2 and saldo >= valor:
+            saldo_posterior = saldo - valor
+            totais["total_saques"] = round(totais["total_saques"] + valor, 2)
+        else:
+            saldo_posterior = saldo + valor
+            totais["total_depositos"] = round(totais["total_depositos"] + valor, 2)
+        saldo = round(round(saldo_posterior, 2), 2)
+    return {"saldo": saldo, **totais}
+
+
+def motor_centavos(valores: list) -> dict:
+    """Modelo atual: saldo e totais em centavos inteiros"""
+    saldo = 0
+    totais = {"total_depositos": 0, "total_saques": 0}
+    for i, valor in enumerate(valores):
+        if i % 3 == 2 and saldo >= valor:
+            saldo -= valor
+            totais["total_saques"] += valor
+        else:
+            saldo += valor
+            totais["total_depositos"] += valor
+    return {"saldo": saldo, **totais}
+
+
+def referencia_decimal(valores: list) -> dict:
+    """Mesma sequência em Decimal, para conferir a exatidão"""
+    saldo = Decimal(0)
+    totais = {"total_depositos": Decimal(0), "total_saques": Decimal(0)}
+    for i, centavos in enumerate(valores):
+        valor = Decimal(centavos) / 100
+        if i % 3 == 2 and saldo >= valor:
+            saldo -= valor
+            totais["total_saques"] += valor
+        else:
+            saldo += valor
+            totais["total_depositos"] += valor
+    return {"saldo": saldo, **totais}
+
+
+def medir(funcao, quantidade: int) -> tuple:
+    inicio = time.perf_counter()
+    resultado = funcao()
+    duracao = time.perf_counter() - inicio
+    return resultado, round(duracao / quantidade * 1e9, 1)
+
+
+def comparar_agregacao(valores: list) -> dict:
+    """Reconstrução de agregados: colunas x laço sobre dicts"""
+    tabela = TabelaTransacoes()
+    ids = array("q")
+    data = datetime(2024, 1, 1)
+    for i, valor in enumerate(valores, start=1):
+        data += timedelta(minutes=1)
+        tabela.inserir({
+            "id": i,
+            "conta_id": 1,
+            "tipo": TipoTransacao.SAQUE.value if i % 3 == 0 else TipoTransacao.DEPOSITO.value,
+            "valor": valor,
+            "descricao": None,
+            "saldo_anterior": 0,
+            "saldo_posterior": 0,
+            "data_transacao": data
+        })
+        ids.append(i)
+    
+    def laco_dicts():
+        totais, periodos = novas_estatisticas(), {}
+        for transacao_id in ids:
+            t = tabela[transacao_id]
+            periodo = periodos.setdefault(periodo_da_data(t["data_transacao"]), novas_estatisticas())
+            acumular_estatisticas(totais, t)
+            acumular_estatisticas(periodo, t)
+        return totais, periodos
+    
+    por_dicts, ns_dicts = medir(laco_dicts, len(valores))
+    por_colunas, ns_colunas = medir(lambda: tabela.agregar(ids), len(valores))
+    return {
+        "ns_por_transacao_dicts": ns_dicts,
+        "ns_por_transacao_colunas": ns_colunas,
+        "resultados_iguais": por_dicts == por_colunas
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--transacoes", type=int, default=1_000_000)
+    args = parser.parse_args()
+    
+    valores = gerar_valores(args.transacoes)
+    valores_reais = [valor / 100 for valor in valores]
+    
+    por_float, ns_float = medir(lambda: motor_float(valores_reais), args.transacoes)
+    por_centavos, ns_centavos = medir(lambda: motor_centavos(valores), args.transacoes)
+    referencia = referencia_decimal(valores)
+    
+    exatidao = {}
+    for campo, esperado in referencia.items():
+        exatidao[campo] = {
+            "esperado": str(esperado),
+            "float": repr(por_float[campo]),
+            "float_exato": Decimal(repr(por_float[campo])) == esperado,
+            "centavos": formatar_reais(por_centavos[campo]),
+            "centavos_exato": Decimal(por_centavos[campo]) / 100 == esperado
+        }
+    
+    # Soma sem arredondar, como o SUM() sobre colunas REAL/float fazia
+    soma_direta = sum(valores_reais)
+    esperado = sum(Decimal(valor) for valor in valores) / 100
+    exatidao["soma_direta"] = {
+        "esperado": str(esperado),
+        "float": repr(soma_direta),
+        "float_exato": Decimal(repr(soma_direta)) == esperado,
+        "centavos": formatar_reais(sum(valores)),
+        "centavos_exato": Decimal(sum(valores)) / 100 == esperado
+    }
+    
+    print(json.dumps({
+        "transacoes": args.transacoes,
+        "ns_por_transacao": {"float": ns_float, "centavos": ns_centavos},
+        "exatidao": exatidao,
+        "agregacao": comparar_agregacao(valores[:min(len(valores), 200_000)])
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
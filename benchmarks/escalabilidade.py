@@ -0,0 +1,186 @@
+"""
+Escalabilidade de POST /transacoes/deposito com o número de workers
+
+Para cada quantidade de workers, inicia `python servidor.py --workers N`
+com o backend SQLite (estado compartilhado entre os processos, no mesmo
+arquivo) e dispara depósitos a partir de vários processos clientes, para
+que o gerador de carga não seja o gargalo. As contas e os tokens são
+criados uma única vez e reaproveitados em todas as rodadas.
+
+O relatório traz, por quantidade de workers, a vazão agregada, as
+latências p50/p95/p99 e a eficiência em relação a um worker
+(rps_N / (N * rps_1); 1.0 é escala linear).
+
+Uso:
+    python -m benchmarks.escalabilidade
+    python -m benchmarks.escalabilidade --workers 1 2 4 8 --clientes 4 --requisicoes 20000
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import httpx
+from benchmarks.carga import (
+    DIRETORIO_PROJETO, Usuarios, aguardar_servidor, cadastrar, coletar, porta_livre, resumir
+)
+
+
+def workers_padrao() -> list:
+    """Potências de 2 até o número de núcleos, incluindo o próprio número"""
+    nucleos = os.cpu_count() or 1
+    quantidades = []
+    n = 1
+    while n < nucleos:
+        quantidades.append(n)
+        n *= 2
+    quantidades.append(nucleos)
+    return quantidades
+
+
+def iniciar_servidor(workers: int, porta: int, caminho_banco: str) -> subprocess.Popen:
+    ambiente = dict(os.environ, DATABASE_BACKEND="sqlite", SQLITE_PATH=caminho_banco)
+    return subprocess.Popen(
+        [sys.executable, "servidor.py", "--workers", str(workers),
+         "--host", "127.0.0.1", "--port", str(porta)],
+        cwd=DIRETORIO_PROJETO,
+        env=ambiente,
+        stdout=subprocess.DEVNULL
+    )
+
+
+def encerrar_servidor(processo: subprocess.Popen):
+    processo.terminate()
+    try:
+        processo.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        processo.kill()
+        processo.wait()
+
+
+async def preparar_contas(url: str, quantidade: int) -> list:
+    """Cadastra usuários com conta e devolve seus cabeçalhos de autenticação"""
+    usuarios = Usuarios()
+    async with httpx.AsyncClient(base_url=url, timeout=60.0) as cliente:
+        return [
+            await cadastrar(cliente, usuarios.novo_cpf(), criar_conta=True)
+            for _ in range(quantidade)
+        ]
+
+
+async def _depositar(url: str, cabecalhos: list, total: int, concorrencia: int) -> tuple:
+    limites = httpx.Limits(max_connections=concorrencia, max_keepalive_connections=concorrencia)
+    async with httpx.AsyncClient(base_url=url, limits=limites, timeout=60.0) as cliente:
+    
+        async def requisicao(cliente, indice):
+            return await cliente.post(
+                "/transacoes/deposito",
+                json={"valor": 10.0, "descricao": "Escalabilidade"},
+                headers=cabecalhos[indice % len(cabecalhos)]
+            )
+        
+        inicio = time.time()
+        latencias, status, _ = await coletar(cliente, requisicao, total, concorrencia)
+        return latencias, status, inicio, time.time()
+
+
+def processo_cliente(url: str, cabecalhos: list, total: int, concorrencia: int) -> tuple:
+    """Executado em um processo cliente; devolve latências, status e o intervalo (época)"""
+    return asyncio.run(_depositar(url, cabecalhos, total, concorrencia))
+
+
+def rodada(executor: ProcessPoolExecutor, url: str, cabecalhos: list, args) -> dict:
+    """Dispara os depósitos dos processos clientes e agrega os resultados"""
+    por_cliente = args.requisicoes // args.clientes
+    futuros = [
+        executor.submit(
+            processo_cliente, url, cabecalhos[i::args.clientes] or cabecalhos,
+            por_cliente, args.concorrencia
+        )
+        for i in range(args.clientes)
+    ]
+    latencias = []
+    status = Counter()
+    inicios, fins = [], []
+    for futuro in futuros:
+        parciais, contagem, inicio, fim = futuro.result()
+        latencias.extend(parciais)
+        status.update(contagem)
+        inicios.append(inicio)
+        fins.append(fim)
+    return resumir(latencias, status, max(fins) - min(inicios), {201})
+
+
+async def medir_workers(workers: int, caminho_banco: str, executor: ProcessPoolExecutor,
+                        cabecalhos: list, args) -> tuple:
+    porta = porta_livre()
+    url = f"http://127.0.0.1:{porta}"
+    processo = iniciar_servidor(workers, porta, caminho_banco)
+    try:
+        await aguardar_servidor(url, processo)
+        if not cabecalhos:
+            cabecalhos = await preparar_contas(url, args.contas)
+        
+        # Aquecimento: abre as conexões SQLite e os caches de todos os workers
+        aquecimento = argparse.Namespace(**vars(args))
+        aquecimento.requisicoes = max(args.clientes, args.requisicoes // 10)
+        rodada(executor, url, cabecalhos, aquecimento)
+        
+        return rodada(executor, url, cabecalhos, args), cabecalhos
+    finally:
+        encerrar_servidor(processo)
+
+
+async def executar(args) -> dict:
+    resultados = {}
+    cabecalhos = []
+    with tempfile.TemporaryDirectory() as diretorio, \
+            ProcessPoolExecutor(max_workers=args.clientes) as executor:
+        caminho_banco = os.path.join(diretorio, "escalabilidade.db")
+        for workers in args.workers:
+            resultado, cabecalhos = await medir_workers(
+                workers, caminho_banco, executor, cabecalhos, args
+            )
+            resultados[str(workers)] = resultado
+    
+    base = resultados[str(args.workers[0])]["rps"] / args.workers[0]
+    for workers in args.workers:
+        resultado = resultados[str(workers)]
+        resultado["eficiencia"] = round(resultado["rps"] / (workers * base), 2) if base else None
+    
+    return {
+        "nucleos": os.cpu_count(),
+        "clientes": args.clientes,
+        "concorrencia_por_cliente": args.concorrencia,
+        "requisicoes": args.requisicoes,
+        "workers": resultados
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--workers", type=int, nargs="+", default=workers_padrao())
+    parser.add_argument("--clientes", type=int, default=max(1, (os.cpu_count() or 1) // 2),
+                        help="Processos geradores de carga")
+    parser.add_argument("--concorrencia", type=int, default=32, help="Requisições em voo por cliente")
+    parser.add_argument("--requisicoes", type=int, default=10_000, help="Depósitos por rodada")
+    parser.add_argument("--contas", type=int, default=64, help="Contas que recebem os depósitos")
+    parser.add_argument("--saida", help="Arquivo onde gravar o relatório JSON")
+    args = parser.parse_args()
+    
+    relatorio = json.dumps(asyncio.run(executar(args)), indent=2)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            arquivo.write(relatorio + "\n")
+    print(relatorio)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark da exportação do extrato em streaming
+
+Popula uma conta no DatabaseSimulator e mede vazão (linhas/s) e pico de
+memória da exportação NDJSON/CSV. Opcionalmente compara com o caminho
+que materializa o extrato inteiro em modelos Pydantic.
+
+Uso:
+    python -m benchmarks.exportacao --linhas 1000000
+    python -m benchmarks.exportacao --linhas 100000 --comparar-materializado
+"""
+import argparse
+import asyncio
+import json
+import resource
+import time
+import tracemalloc
+from database import DatabaseSimulator
+from exportacao import gerar_exportacao
+from models import FormatoExportacao, TipoConta, TipoTransacao, Transacao
+
+
+def popular(linhas: int) -> tuple:
+    """Cria uma conta com o número de transações pedido"""
+    repo = DatabaseSimulator()
+    usuario = repo.criar_usuario("Conta Corporativa", "00000000000", "hash")
+    conta = repo.criar_conta(usuario["id"], TipoConta.CORRENTE)
+    for i in range(linhas):
+        tipo = TipoTransacao.SAQUE if i % 4 == 3 else TipoTransacao.DEPOSITO
+        repo.criar_transacao(conta["id"], tipo, 1000 + i % 100 * 100, "Lançamento")
+    return repo, conta["id"]
+
+
+async def consumir(repo, conta_id: int, formato: FormatoExportacao, lote: int) -> int:
+    """Consome a exportação inteira e retorna o total de bytes"""
+    total = 0
+    async for bloco in gerar_exportacao(repo, conta_id, formato, tamanho_lote=lote):
+        total += len(bloco)
+    return total
+
+
+def materializar(repo, conta_id: int) -> int:
+    """Caminho antigo: lista completa de modelos serializada de uma vez"""
+    transacoes = [Transacao(**t) for t in repo.obter_transacoes_por_conta(conta_id)]
+    corpo = json.dumps([t.model_dump(mode="json") for t in transacoes])
+    return len(corpo)
+
+
+def medir(funcao, linhas: int) -> dict:
+    """Mede vazão e, numa segunda execução, o pico de memória alocada"""
+    inicio = time.perf_counter()
+    total_bytes = funcao()
+    duracao = time.perf_counter() - inicio
+    
+    tracemalloc.start()
+    funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    return {
+        "linhas_por_segundo": round(linhas / duracao, 1),
+        "segundos": round(duracao, 3),
+        "bytes": total_bytes,
+        "pico_memoria_mb": round(pico / 1024 / 1024, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    parser.add_argument("--lote", type=int, default=1000)
+    parser.add_argument("--comparar-materializado", action="store_true")
+    args = parser.parse_args()
+    
+    repo, conta_id = popular(args.linhas)
+    relatorio = {"linhas": args.linhas, "lote": args.lote}
+    
+    for formato in FormatoExportacao:
+        relatorio[formato.value] = medir(
+            lambda: asyncio.run(consumir(repo, conta_id, formato, args.lote)),
+            args.linhas
+        )
+    
+    if args.comparar_materializado:
+        relatorio["materializado"] = medir(
+            lambda: materializar(repo, conta_id), args.linhas
+        )
+    
+    # ru_maxrss é em KiB no Linux
+    relatorio["pico_rss_processo_mb"] = round(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+    )
+    print(json.dumps(relatorio, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark da latência do extrato por tamanho de página
+
+Popula contas com 1k, 10k e 100k transações e pede cada extrato em uma
+única página (GET /transacoes/extrato?limit=N), pela API em processo
+(ASGI). Compara a resposta atual, montada direto dos registros e
+serializada com orjson, com o caminho anterior: modelos Pydantic por
+transação, validação pelo response_model e json da biblioteca padrão.
+
+Uso:
+    python -m benchmarks.extrato
+    python -m benchmarks.extrato --linhas 1000 10000 100000 --repeticoes 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+# O limite de página é lido na importação da aplicação
+os.environ.setdefault("EXTRATO_LIMITE_MAXIMO", "1000000")
+
+import httpx
+from fastapi import Depends
+from fastapi.responses import JSONResponse
+from main import app, obter_conta_atual
+from database import db
+from models import Conta, Extrato, TipoTransacao, Transacao
+from repositorio import ContaResolvida
+
+
+@app.get("/benchmark/extrato-pydantic", response_model=Extrato, response_class=JSONResponse)
+async def extrato_pydantic(limit: int, conta_atual: ContaResolvida = Depends(obter_conta_atual)):
+    """Caminho anterior: um modelo por transação, validado e codificado pelo FastAPI"""
+    conta = db.obter_conta_por_id(conta_atual.conta_id)
+    transacoes = db.obter_transacoes_paginadas(conta_atual.conta_id, limit=limit)
+    estatisticas = db.obter_estatisticas_conta(conta_atual.conta_id)
+    return Extrato(
+        conta=Conta(**conta),
+        transacoes=[Transacao(**t) for t in transacoes],
+        proximo_cursor=None,
+        **estatisticas
+    )
+
+
+async def autenticar(cliente: httpx.AsyncClient, cpf: str) -> tuple:
+    """Cria usuário e conta e devolve o cabeçalho de autenticação e o ID da conta"""
+    await cliente.post("/usuarios/", json={"nome": "Benchmark Extrato", "cpf": cpf, "senha": "senha123"})
+    resposta = await cliente.post("/login/", data={"username": cpf, "password": "senha123"})
+    cabecalho = {"Authorization": f"Bearer {resposta.json()['access_token']}"}
+    conta = (await cliente.post("/contas/", json={"tipo_conta": "corrente"}, headers=cabecalho)).json()
+    return cabecalho, conta["id"]
+
+
+def popular(conta_id: int, linhas: int):
+    for i in range(linhas):
+        tipo = TipoTransacao.SAQUE if i % 4 == 3 else TipoTransacao.DEPOSITO
+        db.criar_transacao(conta_id, tipo, 1000 + i % 100 * 100, f"Lançamento {i}")
+
+
+async def medir(cliente: httpx.AsyncClient, url: str, cabecalho: dict, repeticoes: int) -> dict:
+    """Latência das requisições e tamanho da resposta"""
+    latencias = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resposta = await cliente.get(url, headers=cabecalho)
+        latencias.append(time.perf_counter() - inicio)
+        assert resposta.status_code == 200, resposta.text
+    return {
+        "latencia_mediana_ms": round(statistics.median(latencias) * 1000, 2),
+        "latencia_minima_ms": round(min(latencias) * 1000, 2),
+        "bytes": len(resposta.content)
+    }
+
+
+async def executar(tamanhos: list, repeticoes: int) -> dict:
+    transporte = httpx.ASGITransport(app=app)
+    relatorio = {}
+    async with httpx.AsyncClient(transport=transporte, base_url="http://benchmark") as cliente:
+        for indice, linhas in enumerate(tamanhos):
+            cabecalho, conta_id = await autenticar(cliente, f"{80000000000 + indice}")
+            popular(conta_id, linhas)
+            
+            atual = await medir(
+                cliente, f"/transacoes/extrato?limit={linhas}", cabecalho, repeticoes
+            )
+            anterior = await medir(
+                cliente, f"/benchmark/extrato-pydantic?limit={linhas}", cabecalho, repeticoes
+            )
+            relatorio[str(linhas)] = {
+                "orjson": atual,
+                "pydantic": anterior,
+                "ganho": round(anterior["latencia_mediana_ms"] / atual["latencia_mediana_ms"], 2)
+            }
+    return relatorio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--linhas", type=int, nargs="+", default=[1000, 10_000, 100_000])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+    
+    print(json.dumps(asyncio.run(executar(args.linhas, args.repeticoes)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
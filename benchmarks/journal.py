@@ -0,0 +1,100 @@
+"""
+Benchmark do journal do backend em memória
+
+Mede a vazão de escrita sem journal e em cada modo de durabilidade
+(assincrono, intervalo, sempre) com várias threads, e o tempo de
+recuperação a partir de snapshot + cauda do journal.
+
+Uso:
+    python -m benchmarks.journal --operacoes 20000 --threads 8
+"""
+import argparse
+import json
+import shutil
+import tempfile
+import threading
+import time
+from database import DatabaseSimulator
+from journal import Journal, MODOS_DURABILIDADE
+from models import TipoConta, TipoTransacao
+
+
+def popular_contas(repo: DatabaseSimulator, quantidade: int) -> list:
+    """Cria as contas usadas pelas threads"""
+    contas = []
+    for i in range(quantidade):
+        usuario = repo.criar_usuario(f"Usuário {i}", f"{i:011d}", "hash")
+        contas.append(repo.criar_conta(usuario["id"], TipoConta.CORRENTE)["id"])
+    return contas
+
+
+def escrever(repo: DatabaseSimulator, contas: list, operacoes: int, threads: int) -> float:
+    """Executa depósitos em paralelo e retorna a duração em segundos"""
+    por_thread = operacoes // threads
+    
+    def trabalhador(indice: int):
+        conta_id = contas[indice % len(contas)]
+        for _ in range(por_thread):
+            repo.criar_transacao(conta_id, TipoTransacao.DEPOSITO, 1000, "Depósito")
+    
+    workers = [threading.Thread(target=trabalhador, args=(i,)) for i in range(threads)]
+    inicio = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - inicio
+
+
+def medir_modo(durabilidade, args) -> dict:
+    """Vazão de escrita e tempo de recuperação de um modo"""
+    diretorio = tempfile.mkdtemp(prefix="journal-bench-")
+    try:
+        repo = DatabaseSimulator()
+        if durabilidade:
+            repo.ativar_journal(Journal(
+                diretorio, durabilidade, args.intervalo_ms, args.snapshot_a_cada
+            ))
+        contas = popular_contas(repo, args.contas)
+        duracao = escrever(repo, contas, args.operacoes, args.threads)
+        repo.fechar()
+        
+        resultado = {
+            "ops_por_segundo": round(args.operacoes / duracao, 1),
+            "segundos": round(duracao, 3)
+        }
+        if durabilidade:
+            resultado["journal"] = repo.journal.metricas()
+            
+            inicio = time.perf_counter()
+            recuperado = DatabaseSimulator()
+            reaplicados = recuperado.ativar_journal(Journal(diretorio, durabilidade))
+            resultado["recuperacao"] = {
+                "segundos": round(time.perf_counter() - inicio, 3),
+                "registros_reaplicados": reaplicados,
+                "transacoes": len(recuperado.transacoes)
+            }
+            recuperado.fechar()
+        return resultado
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--operacoes", type=int, default=20_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--contas", type=int, default=64)
+    parser.add_argument("--intervalo-ms", type=int, default=10)
+    parser.add_argument("--snapshot-a-cada", type=int, default=100_000)
+    args = parser.parse_args()
+    
+    relatorio = {"operacoes": args.operacoes, "threads": args.threads}
+    relatorio["sem_journal"] = medir_modo(None, args)
+    for modo in MODOS_DURABILIDADE:
+        relatorio[modo] = medir_modo(modo, args)
+    print(json.dumps(relatorio, indent=2))
+
+
+if __name__ == "__main__":
+    main()
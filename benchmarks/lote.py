@@ -0,0 +1,111 @@
+"""
+Benchmark do endpoint de lote contra transações individuais
+
+Envia o mesmo número de depósitos pela API (em processo, via ASGI) de
+duas formas: uma requisição por transação em POST /transacoes/deposito
+e blocos de N transações em POST /transacoes/lote, nos modos atômico e
+por item. Mede transações por segundo em cada caminho.
+
+Uso:
+    python -m benchmarks.lote --transacoes 5000 --tamanhos 10 100 1000
+"""
+import argparse
+import asyncio
+import json
+import time
+import httpx
+from main import app
+
+
+async def preparar_cliente(cliente: httpx.AsyncClient, cpf: str) -> dict:
+    """Cria usuário e conta e devolve o cabeçalho de autenticação"""
+    await cliente.post("/usuarios/", json={"nome": "Benchmark Lote", "cpf": cpf, "senha": "senha123"})
+    resposta = await cliente.post("/login/", data={"username": cpf, "password": "senha123"})
+    cabecalho = {"Authorization": f"Bearer {resposta.json()['access_token']}"}
+    await cliente.post("/contas/", json={"tipo_conta": "corrente"}, headers=cabecalho)
+    return cabecalho
+
+
+async def medir_individual(cliente: httpx.AsyncClient, cabecalho: dict, transacoes: int) -> dict:
+    """Uma requisição por depósito"""
+    inicio = time.perf_counter()
+    for i in range(transacoes):
+        resposta = await cliente.post(
+            "/transacoes/deposito",
+            json={"valor": 10.5, "descricao": f"Depósito {i}"},
+            headers=cabecalho
+        )
+        assert resposta.status_code == 201, resposta.text
+    duracao = time.perf_counter() - inicio
+    return {
+        "requisicoes": transacoes,
+        "transacoes_por_segundo": round(transacoes / duracao, 1),
+        "segundos": round(duracao, 3)
+    }
+
+
+async def medir_lote(
+    cliente: httpx.AsyncClient,
+    cabecalho: dict,
+    transacoes: int,
+    tamanho: int,
+    atomico: bool
+) -> dict:
+    """Depósitos enviados em blocos de `tamanho` itens"""
+    requisicoes = 0
+    inicio = time.perf_counter()
+    for base in range(0, transacoes, tamanho):
+        itens = [
+            {"tipo": "deposito", "valor": 10.5, "descricao": f"Depósito {i}"}
+            for i in range(base, min(base + tamanho, transacoes))
+        ]
+        resposta = await cliente.post(
+            "/transacoes/lote",
+            json={"transacoes": itens, "atomico": atomico},
+            headers=cabecalho
+        )
+        assert resposta.status_code == 200, resposta.text
+        requisicoes += 1
+    duracao = time.perf_counter() - inicio
+    return {
+        "requisicoes": requisicoes,
+        "transacoes_por_segundo": round(transacoes / duracao, 1),
+        "segundos": round(duracao, 3)
+    }
+
+
+async def executar(transacoes: int, tamanhos: list) -> dict:
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://benchmark") as cliente:
+        relatorio = {"transacoes": transacoes}
+        
+        cabecalho = await preparar_cliente(cliente, "90000000000")
+        relatorio["individual"] = await medir_individual(cliente, cabecalho, transacoes)
+        base = relatorio["individual"]["transacoes_por_segundo"]
+        
+        for indice, tamanho in enumerate(tamanhos):
+            for atomico in (True, False):
+                # Uma conta por cenário, para que o histórico não influencie
+                cpf = f"9{indice + 1:04d}{int(atomico):06d}"
+                cabecalho = await preparar_cliente(cliente, cpf)
+                resultado = await medir_lote(cliente, cabecalho, transacoes, tamanho, atomico)
+                resultado["ganho_sobre_individual"] = round(
+                    resultado["transacoes_por_segundo"] / base, 1
+                )
+                modo = "atomico" if atomico else "por_item"
+                relatorio[f"lote_{tamanho}_{modo}"] = resultado
+        
+        return relatorio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--transacoes", type=int, default=5000)
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+    
+    print(json.dumps(asyncio.run(executar(args.transacoes, args.tamanhos)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
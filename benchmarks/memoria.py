@@ -0,0 +1,100 @@
+"""
+Benchmark de memória por transação do backend em memória
+
+Compara o layout anterior (um dict por transação e lista de IDs por
+conta) com o atual (colunas em arrays e índice em array de int64),
+medindo com tracemalloc os bytes alocados por transação.
+
+Uso:
+    python -m benchmarks.memoria --transacoes 1000000
+"""
+from array import array
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from datetime import datetime
+from models import TipoTransacao
+from transacoes_compactas import TabelaTransacoes
+
+
+def gerar(contas: list, quantidade: int):
+    """Transações sintéticas distribuídas entre as contas"""
+    for i in range(quantidade):
+        yield {
+            "id": i + 1,
+            "conta_id": contas[i % len(contas)],
+            "tipo": TipoTransacao.SAQUE.value if i % 4 == 3 else TipoTransacao.DEPOSITO.value,
+            "valor": 1000 + i % 1000,
+            "descricao": f"Lançamento {i % 50}",
+            "saldo_anterior": 100_000 + i,
+            "saldo_posterior": 101_000 + i,
+            "data_transacao": datetime.now()
+        }
+
+
+def popular_dicts(contas: list, quantidade: int):
+    """Layout anterior: dict de dicts (valores em float) e lista de IDs por conta"""
+    transacoes = {}
+    indice = {conta_id: [] for conta_id in contas}
+    for transacao in gerar(contas, quantidade):
+        for campo in ("valor", "saldo_anterior", "saldo_posterior"):
+            transacao[campo] = transacao[campo] / 100
+        transacoes[transacao["id"]] = transacao
+        indice[transacao["conta_id"]].append(transacao["id"])
+    return transacoes, indice
+
+
+def popular_colunas(contas: list, quantidade: int):
+    """Layout atual: TabelaTransacoes e índice em array por conta"""
+    transacoes = TabelaTransacoes()
+    indice = {conta_id: array("q") for conta_id in contas}
+    for transacao in gerar(contas, quantidade):
+        transacoes.inserir(transacao)
+        indice[transacao["conta_id"]].append(transacao["id"])
+    return transacoes, indice
+
+
+def medir(popular, contas: list, quantidade: int) -> dict:
+    """Bytes alocados e ainda vivos após popular o armazenamento"""
+    gc.collect()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    armazenamento = popular(contas, quantidade)
+    duracao = time.perf_counter() - inicio
+    atual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    transacoes, _ = armazenamento
+    return {
+        "bytes_total": atual,
+        "bytes_por_transacao": round(atual / quantidade, 1),
+        "segundos_para_popular": round(duracao, 3),
+        "amostra": {
+            chave: str(valor) for chave, valor in transacoes[quantidade // 2].items()
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--transacoes", type=int, default=1_000_000)
+    parser.add_argument("--contas", type=int, default=1000)
+    args = parser.parse_args()
+    
+    contas = list(range(1, args.contas + 1))
+    antes = medir(popular_dicts, contas, args.transacoes)
+    depois = medir(popular_colunas, contas, args.transacoes)
+    
+    print(json.dumps({
+        "transacoes": args.transacoes,
+        "contas": args.contas,
+        "dicts": antes,
+        "colunas": depois,
+        "reducao": round(antes["bytes_total"] / depois["bytes_total"], 1)
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
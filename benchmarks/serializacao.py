@@ -0,0 +1,110 @@
+"""
+Microbenchmark do custo por registro na serialização das respostas
+
+Mede, para registros de transação vindos do backend, o tempo por linha de
+três caminhos até os bytes JSON:
+
+- pydantic: `Transacao(**t)` revalidado contra o response_model e
+  codificado como o FastAPI faz (serialize_response + json.dumps)
+- construct: `Transacao.model_construct(**t)`, sem validação, com
+  model_dump e orjson
+- direto: `transacao_json(t)` de respostas.py com orjson (usado pela API)
+
+Antes de medir, confere que os três produzem o mesmo JSON.
+
+Uso:
+    python -m benchmarks.serializacao --linhas 10000 --repeticoes 5
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+import orjson
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from models import TipoTransacao, Transacao
+from respostas import transacoes_json
+
+
+CAMPO_RESPOSTA = create_response_field(name="Response_Transacoes", type_=list[Transacao])
+
+
+def gerar_registros(linhas: int) -> list:
+    """Registros no formato devolvido pelos backends (valores em centavos)"""
+    inicio = datetime(2024, 1, 1)
+    registros = []
+    saldo = 0
+    for i in range(linhas):
+        tipo = TipoTransacao.SAQUE if i % 4 == 3 else TipoTransacao.DEPOSITO
+        valor = 1000 + i % 100 * 100
+        anterior = saldo
+        saldo += -valor if tipo == TipoTransacao.SAQUE else valor
+        registros.append({
+            "id": i + 1,
+            "conta_id": 1,
+            "tipo": tipo,
+            "valor": valor,
+            "descricao": f"Lançamento {i}",
+            "data_transacao": inicio + timedelta(seconds=i),
+            "saldo_anterior": anterior,
+            "saldo_posterior": saldo
+        })
+    return registros
+
+
+def via_pydantic(registros: list) -> bytes:
+    modelos = [Transacao(**t) for t in registros]
+    conteudo = asyncio.run(serialize_response(field=CAMPO_RESPOSTA, response_content=modelos))
+    return json.dumps(
+        conteudo, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def via_construct(registros: list) -> bytes:
+    return orjson.dumps([
+        Transacao.model_construct(**t).model_dump(mode="json") for t in registros
+    ])
+
+
+def via_direto(registros: list) -> bytes:
+    return orjson.dumps(transacoes_json(registros))
+
+
+def medir(funcao, registros: list, repeticoes: int) -> float:
+    """Melhor tempo por linha, em microssegundos"""
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(registros)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return round(melhor / len(registros) * 1_000_000, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--linhas", type=int, default=10_000)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+    
+    registros = gerar_registros(args.linhas)
+    
+    esperado = orjson.loads(via_pydantic(registros))
+    for funcao in (via_construct, via_direto):
+        assert orjson.loads(funcao(registros)) == esperado, f"{funcao.__name__} divergiu"
+    
+    tempos = {
+        "pydantic": medir(via_pydantic, registros, args.repeticoes),
+        "construct": medir(via_construct, registros, args.repeticoes),
+        "direto": medir(via_direto, registros, args.repeticoes)
+    }
+    print(json.dumps({
+        "linhas": args.linhas,
+        "us_por_linha": tempos,
+        "ganho_construct": round(tempos["pydantic"] / tempos["construct"], 2),
+        "ganho_direto": round(tempos["pydantic"] / tempos["direto"], 2)
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
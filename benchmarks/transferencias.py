@@ -0,0 +1,120 @@
+"""
+Benchmark de transferências concorrentes entre contas quentes
+
+Várias threads transferem valores aleatórios entre poucas contas (todas
+disputadas), nos dois sentidos, no DatabaseSimulator e opcionalmente no
+SQLite. Mede a vazão, a contenção das travas e compara com o caminho
+antigo de saque seguido de depósito em duas chamadas. Ao final confere
+que o dinheiro total se conservou e que nenhuma thread ficou travada.
+
+Uso:
+    python -m benchmarks.transferencias --threads 8 --contas 4 --operacoes 20000
+    python -m benchmarks.transferencias --contas 2 --sqlite
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from models import TipoConta, TipoTransacao
+from database import DatabaseSimulator
+from database_sqlite import RepositorioSQLite
+
+
+SALDO_INICIAL = 10_000_000
+
+
+def preparar(repo, contas: int) -> list:
+    """Cria as contas quentes com saldo inicial"""
+    conta_ids = []
+    for i in range(contas):
+        usuario = repo.criar_usuario(f"Cliente {i}", f"{i:011d}", "hash")
+        conta = repo.criar_conta(usuario["id"], TipoConta.CORRENTE)
+        repo.criar_transacao(conta["id"], TipoTransacao.DEPOSITO, SALDO_INICIAL)
+        conta_ids.append(conta["id"])
+    return conta_ids
+
+
+def transferir(repo, origem: int, destino: int, valor: int):
+    repo.criar_transferencia(origem, destino, valor)
+
+
+def saque_e_deposito(repo, origem: int, destino: int, valor: int):
+    """Caminho sem transferência: duas chamadas e duas aquisições de trava"""
+    repo.criar_transacao(origem, TipoTransacao.SAQUE, valor)
+    repo.criar_transacao(destino, TipoTransacao.DEPOSITO, valor)
+
+
+def executar(repo, conta_ids: list, operacao, threads: int, operacoes: int) -> dict:
+    """Divide as operações entre as threads e mede a vazão"""
+    por_thread = operacoes // threads
+    recusadas = [0] * threads
+    
+    def trabalhar(indice: int):
+        sorteio = random.Random(indice)
+        for _ in range(por_thread):
+            origem, destino = sorteio.sample(conta_ids, 2)
+            try:
+                operacao(repo, origem, destino, sorteio.randint(1, 10_000))
+            except ValueError:
+                recusadas[indice] += 1
+    
+    trabalhadores = [threading.Thread(target=trabalhar, args=(i,)) for i in range(threads)]
+    inicio = time.perf_counter()
+    for trabalhador in trabalhadores:
+        trabalhador.start()
+    for trabalhador in trabalhadores:
+        trabalhador.join(timeout=300)
+    duracao = time.perf_counter() - inicio
+    
+    total = sum(repo.obter_conta_por_id(conta_id)["saldo"] for conta_id in conta_ids)
+    executadas = por_thread * threads
+    return {
+        "operacoes": executadas,
+        "recusadas": sum(recusadas),
+        "ops_por_segundo": round(executadas / duracao, 1),
+        "segundos": round(duracao, 3),
+        "threads_travadas": sum(1 for t in trabalhadores if t.is_alive()),
+        "dinheiro_conservado": total == SALDO_INICIAL * len(conta_ids)
+    }
+
+
+def medir_backend(criar_repo, args) -> dict:
+    resultados = {}
+    for nome, operacao in (("transferencia", transferir), ("saque_e_deposito", saque_e_deposito)):
+        repo = criar_repo()
+        conta_ids = preparar(repo, args.contas)
+        resultados[nome] = executar(repo, conta_ids, operacao, args.threads, args.operacoes)
+        if isinstance(repo, DatabaseSimulator):
+            resultados[nome]["travas"] = repo.travas.metricas()
+        repo.fechar()
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--contas", type=int, default=4, help="Contas quentes (mínimo 2)")
+    parser.add_argument("--operacoes", type=int, default=20_000)
+    parser.add_argument("--faixas", type=int, default=1024, help="Faixas de locks do simulador")
+    parser.add_argument("--sqlite", action="store_true", help="Inclui o backend SQLite")
+    args = parser.parse_args()
+    
+    relatorio = {
+        "threads": args.threads,
+        "contas": args.contas,
+        "memoria": medir_backend(lambda: DatabaseSimulator(faixas_travas=args.faixas), args)
+    }
+    
+    if args.sqlite:
+        with tempfile.TemporaryDirectory() as diretorio:
+            caminhos = iter(os.path.join(diretorio, f"banco{i}.db") for i in range(2))
+            relatorio["sqlite"] = medir_backend(lambda: RepositorioSQLite(next(caminhos)), args)
+    
+    print(json.dumps(relatorio, indent=2))
+
+
+if __name__ == "__main__":
+    main()
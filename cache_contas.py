@@ -0,0 +1,77 @@
+"""
+Cache da resolução CPF -> (usuário, conta)
+"""
+from collections import OrderedDict
+from typing import Optional
+import threading
+
+
+class CacheContas:
+    """
+    Cache LRU de CPFs já resolvidos para (usuario_id, conta_id)
+    
+    Usuários e contas não são removidos nem trocam de dono, então uma
+    resolução completa nunca fica obsoleta e dispensa TTL. Usuários ainda
+    sem conta não são guardados: criar_conta grava a nova resolução
+    (write-through), e outros processos com o mesmo banco consultam o
+    banco até encontrarem a conta, sem servir uma ausência antiga.
+    """
+    
+    def __init__(self, tamanho_maximo: int):
+        self.tamanho_maximo = tamanho_maximo
+        self._itens: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        
+        # Métricas
+        self.acertos = 0
+        self.falhas = 0
+        self.invalidacoes = 0
+    
+    def obter(self, cpf: str) -> Optional[tuple]:
+        """Retorna a resolução em cache do CPF, se houver"""
+        if self.tamanho_maximo <= 0:
+            return None
+        
+        with self._lock:
+            resolucao = self._itens.get(cpf)
+            if resolucao is None:
+                self.falhas += 1
+                return None
+            self._itens.move_to_end(cpf)
+            self.acertos += 1
+            return resolucao
+    
+    def armazenar(self, cpf: str, resolucao: tuple):
+        """Guarda uma resolução completa (usuário com conta)"""
+        if self.tamanho_maximo <= 0:
+            return
+        
+        with self._lock:
+            self._itens[cpf] = resolucao
+            self._itens.move_to_end(cpf)
+            while len(self._itens) > self.tamanho_maximo:
+                self._itens.popitem(last=False)
+    
+    def invalidar(self, cpf: str):
+        """Remove a resolução de um CPF"""
+        with self._lock:
+            if self._itens.pop(cpf, None) is not None:
+                self.invalidacoes += 1
+    
+    def limpar(self):
+        """Esvazia o cache (ex: banco restaurado)"""
+        with self._lock:
+            self.invalidacoes += len(self._itens)
+            self._itens.clear()
+    
+    def metricas(self) -> dict:
+        """Retorna contadores de uso do cache"""
+        consultas = self.acertos + self.falhas
+        return {
+            "tamanho": len(self._itens),
+            "tamanho_maximo": self.tamanho_maximo,
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "taxa_acerto": round(self.acertos / consultas, 4) if consultas else 0.0,
+            "invalidacoes": self.invalidacoes
+        }
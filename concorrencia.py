@@ -0,0 +1,74 @@
+"""
+Controle de concorrência por conta
+"""
+from contextlib import contextmanager
+import threading
+import time
+
+
+class TravasPorConta:
+    """
+    Locks por conta distribuídos em faixas (lock striping)
+    
+    Cada conta é mapeada para uma de `faixas` locks, limitando a memória
+    independentemente do número de contas. Contas em faixas diferentes
+    avançam em paralelo; várias contas são travadas sempre em ordem
+    crescente de faixa, o que evita deadlocks.
+    """
+    
+    def __init__(self, faixas: int = 1024):
+        self.faixas = max(1, faixas)
+        self._travas = [threading.Lock() for _ in range(self.faixas)]
+        
+        # Métricas (aproximadas sob concorrência)
+        self.aquisicoes = 0
+        self.contencoes = 0
+        self.tempo_espera = 0.0
+    
+    def _indice(self, conta_id: int) -> int:
+        """Faixa responsável pela conta"""
+        return hash(conta_id) % self.faixas
+    
+    def _adquirir(self, trava: threading.Lock):
+        """Adquire a trava registrando se houve contenção"""
+        if not trava.acquire(blocking=False):
+            inicio = time.perf_counter()
+            trava.acquire()
+            self.contencoes += 1
+            self.tempo_espera += time.perf_counter() - inicio
+        self.aquisicoes += 1
+    
+    @contextmanager
+    def travar(self, *conta_ids: int):
+        """Trava as contas informadas até o fim do bloco"""
+        indices = sorted({self._indice(conta_id) for conta_id in conta_ids})
+        for indice in indices:
+            self._adquirir(self._travas[indice])
+        try:
+            yield
+        finally:
+            for indice in reversed(indices):
+                self._travas[indice].release()
+    
+    @contextmanager
+    def travar_todas(self):
+        """Trava todas as faixas (pausa as escritas em todas as contas)"""
+        for trava in self._travas:
+            trava.acquire()
+        try:
+            yield
+        finally:
+            for trava in reversed(self._travas):
+                trava.release()
+    
+    def metricas(self) -> dict:
+        """Retorna contadores de uso e contenção"""
+        return {
+            "faixas": self.faixas,
+            "aquisicoes": self.aquisicoes,
+            "contencoes": self.contencoes,
+            "taxa_contencao": (
+                round(self.contencoes / self.aquisicoes, 4) if self.aquisicoes else 0.0
+            ),
+            "tempo_espera_total_ms": round(self.tempo_espera * 1000, 3)
+        }
@@ -1,22 +1,38 @@
 """
 Simulação de banco de dados em memória
-Em produção, substitua por SQLAlchemy com PostgreSQL/MySQL
+Em produção, selecione um backend persistente via DATABASE_BACKEND
 """
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple, Union
 from datetime import datetime
+from array import array
+from bisect import bisect_left, bisect_right
+from heapq import heappop, heappush
 from models import TipoTransacao, TipoConta
-import random
-import string
+from repositorio import (
+    RepositorioBase, ContaResolvida, EstatisticasConta, ItemLote, periodo_da_data,
+    novas_estatisticas, acumular_estatisticas, comparar_estatisticas, calcular_lote,
+    montar_transferencia
+)
+from concorrencia import TravasPorConta
+from journal import Journal
+from numeracao import AlocadorBlocos, SequenciaMemoria, formatar_numero_conta, sequencial_do_numero
+from transacoes_compactas import TabelaTransacoes, para_microssegundos
+from rastreamento import contar_encontrado, criar_sink, rastreado, rastreador
+from config import settings
+import threading
+import time
 
 
-class DatabaseSimulator:
+class DatabaseSimulator(RepositorioBase):
     """Simulador de banco de dados em memória"""
     
-    def __init__(self):
+    def __init__(self, faixas_travas: int = settings.TRAVAS_CONTA_FAIXAS):
+        super().__init__()
+        
         # Armazenamento em memória
         self.usuarios: Dict[int, dict] = {}
         self.contas: Dict[int, dict] = {}
-        self.transacoes: Dict[int, dict] = {}
+        self.transacoes = TabelaTransacoes()
         
         # Contadores de IDs
         self.usuario_id_counter = 1
@@ -26,37 +42,68 @@ class DatabaseSimulator:
         # Índices para buscas rápidas
         self.cpf_to_usuario_id: Dict[str, int] = {}
         self.usuario_id_to_conta_id: Dict[int, int] = {}
-        self.conta_id_to_transacoes: Dict[int, List[int]] = {}
+        self.conta_id_to_transacoes: Dict[int, array] = {}
+        
+        # Estatísticas mantidas a cada transação (totais e por mês)
+        self.estatisticas: Dict[int, dict] = {}
+        self.estatisticas_periodo: Dict[int, Dict[str, dict]] = {}
+        
+        # Números de conta: sequenciais reservados em blocos e índice
+        # número -> conta
+        self.sequencia_numeros = SequenciaMemoria()
+        self.numeros = AlocadorBlocos(
+            self.sequencia_numeros.reservar, settings.NUMERO_CONTA_BLOCO
+        )
+        self.numero_conta_to_conta_id: Dict[str, int] = {}
+        
+        # Tokens revogados: jti -> (exp, instante da gravação), com um heap
+        # por exp para descartar os expirados
+        self.revogacoes: Dict[str, Tuple[float, float]] = {}
+        self._expiracoes_revogacoes: List[Tuple[float, str]] = []
+        
+        # Concorrência: cadastros e IDs usam um lock global curto; o
+        # read-modify-write do saldo usa locks por conta. Ordem de
+        # aquisição: travas de conta antes do lock de cadastro.
+        self._lock_cadastro = threading.Lock()
+        self.travas = TravasPorConta(faixas_travas)
+        
+        # Journal opcional para durabilidade
+        self.journal: Optional[Journal] = None
     
     def gerar_numero_conta(self) -> str:
-        """Gera um número de conta único"""
-        agencia = "0001"
-        numero = str(self.conta_id_counter).zfill(6)
-        digito = random.randint(0, 9)
-        return f"{agencia}-{numero}-{digito}"
+        """Gera um número de conta com dígito verificador ainda não usado"""
+        numero_conta = formatar_numero_conta(self.numeros.proximo())
+        # Números restaurados de versões anteriores podem ocupar sequenciais
+        while numero_conta in self.numero_conta_to_conta_id:
+            numero_conta = formatar_numero_conta(self.numeros.proximo())
+        return numero_conta
     
     # Operações de Usuário
+    @rastreado(linhas=1)
     def criar_usuario(self, nome: str, cpf: str, senha_hash: str) -> dict:
         """Cria um novo usuário"""
-        if cpf in self.cpf_to_usuario_id:
-            raise ValueError("CPF já cadastrado")
-        
-        usuario_id = self.usuario_id_counter
-        self.usuario_id_counter += 1
-        
-        usuario = {
-            "id": usuario_id,
-            "nome": nome,
-            "cpf": cpf,
-            "senha_hash": senha_hash,
-            "data_criacao": datetime.now()
-        }
-        
-        self.usuarios[usuario_id] = usuario
-        self.cpf_to_usuario_id[cpf] = usuario_id
+        with self._lock_cadastro:
+            if cpf in self.cpf_to_usuario_id:
+                raise ValueError("CPF já cadastrado")
+            
+            usuario_id = self.usuario_id_counter
+            self.usuario_id_counter += 1
+            
+            usuario = {
+                "id": usuario_id,
+                "nome": nome,
+                "cpf": cpf,
+                "senha_hash": senha_hash,
+                "data_criacao": datetime.now()
+            }
+            
+            self.usuarios[usuario_id] = usuario
+            self.cpf_to_usuario_id[cpf] = usuario_id
+            self._registrar("usuario", usuario)
         
         return usuario
     
+    @rastreado(linhas=contar_encontrado)
     def obter_usuario_por_cpf(self, cpf: str) -> Optional[dict]:
         """Obtém usuário por CPF"""
         usuario_id = self.cpf_to_usuario_id.get(cpf)
@@ -64,37 +111,45 @@ class DatabaseSimulator:
             return self.usuarios.get(usuario_id)
         return None
     
+    @rastreado(linhas=contar_encontrado)
     def obter_usuario_por_id(self, usuario_id: int) -> Optional[dict]:
         """Obtém usuário por ID"""
         return self.usuarios.get(usuario_id)
     
     # Operações de Conta
+    @rastreado(linhas=1)
     def criar_conta(self, usuario_id: int, tipo_conta: TipoConta) -> dict:
         """Cria uma nova conta para um usuário"""
-        if usuario_id not in self.usuarios:
-            raise ValueError("Usuário não encontrado")
-        
-        if usuario_id in self.usuario_id_to_conta_id:
-            raise ValueError("Usuário já possui uma conta")
-        
-        conta_id = self.conta_id_counter
-        self.conta_id_counter += 1
-        
-        conta = {
-            "id": conta_id,
-            "numero_conta": self.gerar_numero_conta(),
-            "tipo_conta": tipo_conta.value,
-            "saldo": 0.0,
-            "usuario_id": usuario_id,
-            "data_criacao": datetime.now()
-        }
-        
-        self.contas[conta_id] = conta
-        self.usuario_id_to_conta_id[usuario_id] = conta_id
-        self.conta_id_to_transacoes[conta_id] = []
+        with self._lock_cadastro:
+            if usuario_id not in self.usuarios:
+                raise ValueError("Usuário não encontrado")
+            
+            if usuario_id in self.usuario_id_to_conta_id:
+                raise ValueError("Usuário já possui uma conta")
+            
+            conta_id = self.conta_id_counter
+            self.conta_id_counter += 1
+            
+            conta = {
+                "id": conta_id,
+                "numero_conta": self.gerar_numero_conta(),
+                "tipo_conta": tipo_conta.value,
+                "saldo": 0,
+                "usuario_id": usuario_id,
+                "data_criacao": datetime.now()
+            }
+            
+            self.contas[conta_id] = conta
+            self.conta_id_to_transacoes[conta_id] = array("q")
+            self.estatisticas[conta_id] = novas_estatisticas()
+            self.estatisticas_periodo[conta_id] = {}
+            self.usuario_id_to_conta_id[usuario_id] = conta_id
+            self.numero_conta_to_conta_id[conta["numero_conta"]] = conta_id
+            self._registrar("conta", conta)
         
         return conta
     
+    @rastreado(linhas=contar_encontrado)
     def obter_conta_por_usuario(self, usuario_id: int) -> Optional[dict]:
         """Obtém a conta de um usuário"""
         conta_id = self.usuario_id_to_conta_id.get(usuario_id)
@@ -102,21 +157,47 @@ class DatabaseSimulator:
             return self.contas.get(conta_id)
         return None
     
+    @rastreado(linhas=contar_encontrado)
+    def buscar_conta_por_cpf(self, cpf: str) -> Optional[ContaResolvida]:
+        """Obtém os IDs do usuário e da conta de um CPF"""
+        usuario_id = self.cpf_to_usuario_id.get(cpf)
+        if not usuario_id:
+            return None
+        return ContaResolvida(usuario_id, self.usuario_id_to_conta_id.get(usuario_id))
+    
+    @rastreado(linhas=contar_encontrado)
     def obter_conta_por_id(self, conta_id: int) -> Optional[dict]:
         """Obtém conta por ID"""
         return self.contas.get(conta_id)
     
-    def atualizar_saldo(self, conta_id: int, novo_saldo: float):
+    @rastreado(linhas=contar_encontrado)
+    def obter_conta_por_numero(self, numero_conta: str) -> Optional[dict]:
+        """Obtém conta pelo número, pelo índice mantido em criar_conta"""
+        conta_id = self.numero_conta_to_conta_id.get(numero_conta)
+        if conta_id:
+            return self.contas.get(conta_id)
+        return None
+    
+    def atualizar_saldo(self, conta_id: int, novo_saldo: int):
         """Atualiza o saldo de uma conta"""
-        if conta_id in self.contas:
-            self.contas[conta_id]["saldo"] = round(novo_saldo, 2)
+        with self.travas.travar(conta_id):
+            if conta_id in self.contas:
+                self._definir_saldo(conta_id, novo_saldo)
+                self._registrar(
+                    "saldo", {"conta_id": conta_id, "saldo": self.contas[conta_id]["saldo"]}
+                )
+    
+    def _definir_saldo(self, conta_id: int, novo_saldo: int):
+        """Grava o saldo (chamado com a trava da conta adquirida)"""
+        self.contas[conta_id]["saldo"] = novo_saldo
     
     # Operações de Transação
+    @rastreado(linhas=1)
     def criar_transacao(
         self,
         conta_id: int,
         tipo: TipoTransacao,
-        valor: float,
+        valor: int,
         descricao: Optional[str] = None
     ) -> dict:
         """Cria uma nova transação"""
@@ -124,61 +205,412 @@ class DatabaseSimulator:
         if not conta:
             raise ValueError("Conta não encontrada")
         
-        saldo_anterior = conta["saldo"]
-        
-        # Valida e calcula novo saldo
-        if tipo == TipoTransacao.SAQUE:
-            if saldo_anterior < valor:
-                raise ValueError("Saldo insuficiente para realizar o saque")
-            saldo_posterior = saldo_anterior - valor
-        else:  # DEPOSITO
-            saldo_posterior = saldo_anterior + valor
-        
-        # Cria a transação
-        transacao_id = self.transacao_id_counter
-        self.transacao_id_counter += 1
-        
-        transacao = {
-            "id": transacao_id,
-            "conta_id": conta_id,
-            "tipo": tipo.value,
-            "valor": round(valor, 2),
-            "descricao": descricao,
-            "saldo_anterior": round(saldo_anterior, 2),
-            "saldo_posterior": round(saldo_posterior, 2),
-            "data_transacao": datetime.now()
-        }
+        with self.travas.travar(conta_id):
+            saldo_anterior = conta["saldo"]
+            
+            # Valida e calcula novo saldo
+            if tipo == TipoTransacao.SAQUE:
+                if saldo_anterior < valor:
+                    raise ValueError("Saldo insuficiente para realizar o saque")
+                saldo_posterior = saldo_anterior - valor
+            else:  # DEPOSITO
+                saldo_posterior = saldo_anterior + valor
+            
+            # Cria a transação
+            transacao_id = self._reservar_ids_transacao()
+            
+            transacao = {
+                "id": transacao_id,
+                "conta_id": conta_id,
+                "tipo": tipo.value,
+                "valor": valor,
+                "descricao": descricao,
+                "saldo_anterior": saldo_anterior,
+                "saldo_posterior": saldo_posterior,
+                "data_transacao": datetime.now()
+            }
+            
+            self.transacoes.inserir(transacao)
+            self.conta_id_to_transacoes[conta_id].append(transacao_id)
+            self._acumular_estatisticas(transacao)
+            
+            # Atualiza o saldo da conta
+            self._definir_saldo(conta_id, saldo_posterior)
+            self._registrar("transacao", transacao)
         
-        self.transacoes[transacao_id] = transacao
-        self.conta_id_to_transacoes[conta_id].append(transacao_id)
+        return transacao
+    
+    def _acumular_estatisticas(self, transacao: dict):
+        """Atualiza os agregados da conta com uma nova transação"""
+        conta_id = transacao["conta_id"]
+        periodo = periodo_da_data(transacao["data_transacao"])
+        periodos = self.estatisticas_periodo[conta_id]
+        if periodo not in periodos:
+            periodos[periodo] = novas_estatisticas()
         
-        # Atualiza o saldo da conta
-        self.atualizar_saldo(conta_id, saldo_posterior)
+        acumular_estatisticas(self.estatisticas[conta_id], transacao)
+        acumular_estatisticas(periodos[periodo], transacao)
+    
+    def _reservar_ids_transacao(self, quantidade: int = 1) -> int:
+        """Reserva `quantidade` IDs consecutivos de transação e retorna o primeiro"""
+        with self._lock_cadastro:
+            transacao_id = self.transacao_id_counter
+            self.transacao_id_counter += quantidade
+        return transacao_id
+    
+    @rastreado(linhas=2)
+    def criar_transferencia(
+        self,
+        conta_origem_id: int,
+        conta_destino_id: int,
+        valor: int,
+        descricao: Optional[str] = None
+    ) -> Tuple[dict, dict]:
+        """Transfere entre duas contas com as travas adquiridas em ordem de faixa"""
+        if conta_origem_id == conta_destino_id:
+            raise ValueError("A conta de destino deve ser diferente da conta de origem")
+        origem = self.obter_conta_por_id(conta_origem_id)
+        if not origem:
+            raise ValueError("Conta não encontrada")
+        destino = self.obter_conta_por_id(conta_destino_id)
+        if not destino:
+            raise ValueError("Conta de destino não encontrada")
         
-        return transacao
+        with self.travas.travar(conta_origem_id, conta_destino_id):
+            debito, credito = montar_transferencia(
+                origem, destino, valor, descricao, datetime.now()
+            )
+            debito["id"] = self._reservar_ids_transacao(2)
+            credito["id"] = debito["id"] + 1
+            
+            for transacao in (debito, credito):
+                self.transacoes.inserir(transacao)
+                self.conta_id_to_transacoes[transacao["conta_id"]].append(transacao["id"])
+                self._acumular_estatisticas(transacao)
+                self._definir_saldo(transacao["conta_id"], transacao["saldo_posterior"])
+            # Um único registro: as duas pernas são reaplicadas juntas ou nenhuma
+            self._registrar("transferencia", {"transacoes": [debito, credito]})
+        
+        return debito, credito
     
+    @rastreado(linhas=len)
+    def criar_transacoes_lote(
+        self,
+        conta_id: int,
+        itens: List[ItemLote],
+        atomico: bool = True
+    ) -> List[Union[dict, str]]:
+        """Cria várias transações com a trava da conta adquirida uma única vez"""
+        conta = self.obter_conta_por_id(conta_id)
+        if not conta:
+            raise ValueError("Conta não encontrada")
+        
+        with self.travas.travar(conta_id):
+            calculados = calcular_lote(conta["saldo"], itens, atomico)
+            aceitos = sum(1 for calculado in calculados if not isinstance(calculado, str))
+            transacao_id = self._reservar_ids_transacao(aceitos)
+            data_transacao = datetime.now()
+            
+            resultados: List[Union[dict, str]] = []
+            criadas = []
+            for (tipo, valor, descricao), calculado in zip(itens, calculados):
+                if isinstance(calculado, str):
+                    resultados.append(calculado)
+                    continue
+                
+                saldo_anterior, saldo_posterior = calculado
+                transacao = {
+                    "id": transacao_id,
+                    "conta_id": conta_id,
+                    "tipo": tipo.value,
+                    "valor": valor,
+                    "descricao": descricao,
+                    "saldo_anterior": saldo_anterior,
+                    "saldo_posterior": saldo_posterior,
+                    "data_transacao": data_transacao
+                }
+                transacao_id += 1
+                
+                self.transacoes.inserir(transacao)
+                self.conta_id_to_transacoes[conta_id].append(transacao["id"])
+                self._acumular_estatisticas(transacao)
+                criadas.append(transacao)
+                resultados.append(transacao)
+            
+            if criadas:
+                self._definir_saldo(conta_id, criadas[-1]["saldo_posterior"])
+                # Um único registro: o lote é reaplicado inteiro ou não é
+                self._registrar("lote", {"transacoes": criadas})
+        
+        return resultados
+    
+    @rastreado(linhas=len)
     def obter_transacoes_por_conta(self, conta_id: int) -> List[dict]:
         """Obtém todas as transações de uma conta"""
         transacao_ids = self.conta_id_to_transacoes.get(conta_id, [])
         return [self.transacoes[tid] for tid in transacao_ids]
     
+    @rastreado(linhas=len)
+    def obter_transacoes_paginadas(
+        self,
+        conta_id: int,
+        after_id: Optional[int] = None,
+        limit: int = 50,
+        desde: Optional[datetime] = None,
+        ate: Optional[datetime] = None,
+        decrescente: bool = False
+    ) -> List[dict]:
+        """Obtém uma página de transações usando o índice ordenado da conta"""
+        transacao_ids = self.conta_id_to_transacoes.get(conta_id, [])
+        
+        # IDs e datas crescem juntos dentro de uma conta, então os limites
+        # da página saem de buscas binárias no índice
+        inicio, fim = 0, len(transacao_ids)
+        if desde is not None:
+            inicio = self._buscar_por_data(transacao_ids, desde, inclusivo=True)
+        if ate is not None:
+            fim = self._buscar_por_data(transacao_ids, ate, inclusivo=False)
+        
+        if decrescente:
+            if after_id is not None:
+                fim = min(fim, bisect_left(transacao_ids, after_id))
+            pagina = transacao_ids[max(inicio, fim - limit):fim][::-1]
+        else:
+            if after_id is not None:
+                inicio = max(inicio, bisect_right(transacao_ids, after_id))
+            pagina = transacao_ids[inicio:min(fim, inicio + limit)]
+        
+        return [self.transacoes[tid] for tid in pagina]
+    
+    def _buscar_por_data(
+        self,
+        transacao_ids: array,
+        data: datetime,
+        inclusivo: bool
+    ) -> int:
+        """
+        Busca binária pela data no índice de uma conta
+        
+        Retorna a posição da primeira transação com data >= `data`
+        (inclusivo) ou > `data` (não inclusivo).
+        """
+        alvo = para_microssegundos(data)
+        baixo, alto = 0, len(transacao_ids)
+        while baixo < alto:
+            meio = (baixo + alto) // 2
+            data_meio = self.transacoes.instante(transacao_ids[meio])
+            if data_meio < alvo or (not inclusivo and data_meio == alvo):
+                baixo = meio + 1
+            else:
+                alto = meio
+        return baixo
+    
+    @rastreado()
     def obter_estatisticas_conta(self, conta_id: int) -> dict:
-        """Calcula estatísticas das transações de uma conta"""
-        transacoes = self.obter_transacoes_por_conta(conta_id)
+        """Obtém os agregados mantidos incrementalmente de uma conta"""
+        return dict(self.estatisticas.get(conta_id) or novas_estatisticas())
+    
+    @rastreado(linhas=len)
+    def obter_estatisticas_por_periodo(self, conta_id: int) -> List[dict]:
+        """Obtém os agregados mensais de uma conta"""
+        periodos = self.estatisticas_periodo.get(conta_id, {})
+        return [
+            {"periodo": periodo, **periodos[periodo]}
+            for periodo in sorted(periodos)
+        ]
+    
+    def _calcular_estatisticas(self, conta_id: int) -> EstatisticasConta:
+        """Recalcula os agregados de uma conta a partir das colunas de transações"""
+        return self.transacoes.agregar(self.conta_id_to_transacoes.get(conta_id, array("q")))
+    
+    def reconstruir_estatisticas(
+        self,
+        conta_id: Optional[int] = None,
+        corrigir: bool = True
+    ) -> List[dict]:
+        """Recalcula os agregados a partir das transações"""
+        conta_ids = [conta_id] if conta_id is not None else list(self.contas)
+        divergencias = []
+        for cid in conta_ids:
+            with self.travas.travar(cid):
+                calculadas = {cid: self._calcular_estatisticas(cid)}
+                armazenadas = {cid: (
+                    self.estatisticas.get(cid, novas_estatisticas()),
+                    self.estatisticas_periodo.get(cid, {})
+                )}
+                divergentes = comparar_estatisticas(armazenadas, calculadas)
+                if divergentes and corrigir:
+                    self.estatisticas[cid], self.estatisticas_periodo[cid] = calculadas[cid]
+                divergencias.extend(divergentes)
+        return divergencias
+    
+    # Revogação de tokens
+    def gravar_revogacao(self, jti: str, exp: float):
+        """Grava a revogação (no journal, se ativo) até o `exp` do token"""
+        with self._lock_cadastro:
+            agora = time.time()
+            while self._expiracoes_revogacoes and self._expiracoes_revogacoes[0][0] <= agora:
+                self.revogacoes.pop(heappop(self._expiracoes_revogacoes)[1], None)
+            if jti in self.revogacoes:
+                return
+            revogacao = {"jti": jti, "exp": exp, "registrada_em": agora}
+            self._aplicar_registro("revogacao", revogacao)
+            self._registrar("revogacao", revogacao)
+    
+    def listar_revogacoes(self, desde: float = 0.0) -> List[Tuple[str, float]]:
+        """Revogações ainda válidas gravadas a partir de `desde`"""
+        agora = time.time()
+        return [
+            (jti, exp) for jti, (exp, registrada_em) in list(self.revogacoes.items())
+            if exp > agora and registrada_em >= desde
+        ]
+    
+    # Durabilidade
+    def ativar_journal(self, journal: Journal) -> int:
+        """
+        Restaura o estado a partir do journal e passa a registrar mutações
         
-        total_depositos = sum(
-            t["valor"] for t in transacoes if t["tipo"] == TipoTransacao.DEPOSITO.value
-        )
-        total_saques = sum(
-            t["valor"] for t in transacoes if t["tipo"] == TipoTransacao.SAQUE.value
-        )
+        Args:
+            journal: Journal do diretório de dados
+            
+        Returns:
+            int: Quantidade de registros reaplicados após o último snapshot
+        """
+        reaplicados = journal.recuperar(self._aplicar_registro)
+        journal.abrir()
+        self.journal = journal
+        return reaplicados
+    
+    def _registrar(self, operacao: str, dados: dict):
+        """Anexa a mutação ao journal e dispara snapshots periódicos"""
+        if self.journal is None:
+            return
+        self.journal.registrar(operacao, dados)
+        if self.journal.reservar_snapshot():
+            threading.Thread(
+                target=self.journal.gravar_snapshot,
+                args=(self._capturar_estado, True),
+                name="journal-snapshot",
+                daemon=True
+            ).start()
+    
+    def _aplicar_registro(self, operacao: str, dados: dict):
+        """Reaplica uma mutação lida do journal ou de um snapshot"""
+        if operacao == "usuario":
+            self.usuarios[dados["id"]] = dados
+            self.cpf_to_usuario_id[dados["cpf"]] = dados["id"]
+            self.usuario_id_counter = max(self.usuario_id_counter, dados["id"] + 1)
+        elif operacao == "conta":
+            conta_id = dados["id"]
+            self.contas[conta_id] = dados
+            self.conta_id_to_transacoes[conta_id] = array("q")
+            self.estatisticas[conta_id] = novas_estatisticas()
+            self.estatisticas_periodo[conta_id] = {}
+            self.usuario_id_to_conta_id[dados["usuario_id"]] = conta_id
+            self.numero_conta_to_conta_id[dados["numero_conta"]] = conta_id
+            sequencial = sequencial_do_numero(dados["numero_conta"])
+            if sequencial is not None:
+                self.sequencia_numeros.avancar(sequencial)
+            self.conta_id_counter = max(self.conta_id_counter, conta_id + 1)
+        elif operacao == "transacao":
+            self.transacoes.inserir(dados)
+            self.conta_id_to_transacoes[dados["conta_id"]].append(dados["id"])
+            self._acumular_estatisticas(dados)
+            self.contas[dados["conta_id"]]["saldo"] = dados["saldo_posterior"]
+            self.transacao_id_counter = max(self.transacao_id_counter, dados["id"] + 1)
+        elif operacao in ("lote", "transferencia"):
+            for transacao in dados["transacoes"]:
+                self._aplicar_registro("transacao", transacao)
+        elif operacao == "saldo":
+            self.contas[dados["conta_id"]]["saldo"] = dados["saldo"]
+        elif operacao == "revogacao":
+            self.revogacoes[dados["jti"]] = (dados["exp"], dados["registrada_em"])
+            heappush(self._expiracoes_revogacoes, (dados["exp"], dados["jti"]))
+        else:
+            raise ValueError(f"Operação desconhecida no journal: {operacao}")
+    
+    def _capturar_estado(self):
+        """
+        Copia o estado com as escritas pausadas e rotaciona o journal
         
-        return {
-            "total_depositos": round(total_depositos, 2),
-            "total_saques": round(total_saques, 2),
-            "quantidade_transacoes": len(transacoes)
+        As colunas de transações são copiadas em bloco e só convertidas
+        para dicts depois que as escritas são liberadas; as contas são
+        copiadas porque o saldo muda.
+        """
+        with self.travas.travar_todas(), self._lock_cadastro:
+            segmento = self.journal.rotacionar()
+            contas = [dict(conta) for conta in self.contas.values()]
+            transacoes = self.transacoes.copiar()
+            registros = [
+                ("usuario", list(self.usuarios.values())),
+                ("conta", contas),
+                ("transacao", transacoes.values()),
+                ("saldo", [{"conta_id": c["id"], "saldo": c["saldo"]} for c in contas]),
+                ("revogacao", [
+                    {"jti": jti, "exp": exp, "registrada_em": registrada_em}
+                    for jti, (exp, registrada_em) in self.revogacoes.items()
+                ])
+            ]
+        return segmento, registros
+    
+    def fechar(self):
+        """Grava o journal pendente"""
+        if self.journal is not None:
+            self.journal.fechar()
+    
+    def metricas(self) -> dict:
+        """Métricas de idempotência, dos locks por conta, das transações e do journal"""
+        metricas = {
+            **super().metricas(),
+            "travas_contas": self.travas.metricas(),
+            "transacoes": self.transacoes.metricas()
         }
+        if self.journal is not None:
+            metricas["journal"] = self.journal.metricas()
+        return metricas
+
+
+def criar_repositorio(backend: Optional[str] = None) -> RepositorioBase:
+    """
+    Cria o backend de armazenamento configurado
+    
+    Args:
+        backend: Nome do backend ("memoria", "sqlite" ou "postgres"); usa
+            settings.DATABASE_BACKEND se omitido
+        
+    Returns:
+        RepositorioBase: Instância do backend
+    """
+    backend = backend or settings.DATABASE_BACKEND
+    
+    if backend == "memoria":
+        repo = DatabaseSimulator()
+        if settings.JOURNAL_DIRETORIO:
+            repo.ativar_journal(Journal(
+                settings.JOURNAL_DIRETORIO,
+                durabilidade=settings.JOURNAL_DURABILIDADE,
+                intervalo_ms=settings.JOURNAL_INTERVALO_MS,
+                snapshot_a_cada=settings.JOURNAL_SNAPSHOT_A_CADA
+            ))
+        if settings.RASTREAMENTO_SINK:
+            rastreador.ativar(
+                criar_sink(settings.RASTREAMENTO_SINK, settings.RASTREAMENTO_CAPACIDADE),
+                DatabaseSimulator
+            )
+        return repo
+    if backend == "sqlite":
+        from database_sqlite import RepositorioSQLite
+        return RepositorioSQLite(settings.SQLITE_PATH)
+    if backend == "postgres":
+        from database_postgres import RepositorioPostgres
+        return RepositorioPostgres(
+            settings.POSTGRES_DSN,
+            pool_min=settings.POSTGRES_POOL_MIN,
+            pool_max=settings.POSTGRES_POOL_MAX
+        )
+    
+    raise ValueError(f"Backend de banco de dados desconhecido: {backend}")
 
 
 # Instância global do banco de dados
-db = DatabaseSimulator()
+db = criar_repositorio()
@@ -0,0 +1,804 @@
+"""
+Backend de armazenamento assíncrono em PostgreSQL (asyncpg)
+"""
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
+import time
+from models import TipoTransacao, TipoConta
+from idempotencia import ChaveIdempotenciaDivergente
+from repositorio import (
+    RepositorioBase, ContaResolvida, EstatisticasConta, ItemLote, periodo_da_data,
+    novas_estatisticas, acumular_estatisticas, comparar_estatisticas, calcular_lote,
+    montar_transferencia
+)
+from numeracao import AlocadorBlocos, SEQUENCIA_NUMERO_CONTA, formatar_numero_conta
+from config import settings
+
+import asyncpg
+
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS usuarios (
+    id BIGSERIAL PRIMARY KEY,
+    nome TEXT NOT NULL,
+    cpf TEXT NOT NULL UNIQUE,
+    senha_hash TEXT NOT NULL,
+    data_criacao TIMESTAMP NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS contas (
+    id BIGSERIAL PRIMARY KEY,
+    numero_conta TEXT NOT NULL UNIQUE,
+    tipo_conta TEXT NOT NULL,
+    saldo BIGINT NOT NULL DEFAULT 0,
+    usuario_id BIGINT NOT NULL UNIQUE REFERENCES usuarios (id),
+    data_criacao TIMESTAMP NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS transacoes (
+    id BIGSERIAL PRIMARY KEY,
+    conta_id BIGINT NOT NULL REFERENCES contas (id),
+    tipo TEXT NOT NULL,
+    valor BIGINT NOT NULL,
+    descricao TEXT,
+    saldo_anterior BIGINT NOT NULL,
+    saldo_posterior BIGINT NOT NULL,
+    data_transacao TIMESTAMP NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transacoes_conta_data
+    ON transacoes (conta_id, data_transacao);
+CREATE INDEX IF NOT EXISTS idx_transacoes_conta_id
+    ON transacoes (conta_id, id);
+
+CREATE TABLE IF NOT EXISTS estatisticas_conta (
+    conta_id BIGINT PRIMARY KEY REFERENCES contas (id),
+    total_depositos BIGINT NOT NULL DEFAULT 0,
+    total_saques BIGINT NOT NULL DEFAULT 0,
+    total_transferencias_recebidas BIGINT NOT NULL DEFAULT 0,
+    total_transferencias_enviadas BIGINT NOT NULL DEFAULT 0,
+    quantidade_transacoes BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS estatisticas_periodo (
+    conta_id BIGINT NOT NULL REFERENCES contas (id),
+    periodo TEXT NOT NULL,
+    total_depositos BIGINT NOT NULL DEFAULT 0,
+    total_saques BIGINT NOT NULL DEFAULT 0,
+    total_transferencias_recebidas BIGINT NOT NULL DEFAULT 0,
+    total_transferencias_enviadas BIGINT NOT NULL DEFAULT 0,
+    quantidade_transacoes BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (conta_id, periodo)
+);
+
+CREATE TABLE IF NOT EXISTS sequencias (
+    nome TEXT PRIMARY KEY,
+    proximo BIGINT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS idempotencia (
+    conta_id BIGINT NOT NULL REFERENCES contas (id),
+    chave TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    valor BIGINT NOT NULL,
+    descricao TEXT,
+    transacao_id BIGINT NOT NULL REFERENCES transacoes (id),
+    expira_em DOUBLE PRECISION NOT NULL,
+    PRIMARY KEY (conta_id, chave)
+);
+
+CREATE TABLE IF NOT EXISTS revogacoes (
+    jti TEXT PRIMARY KEY,
+    exp DOUBLE PRECISION NOT NULL,
+    registrada_em DOUBLE PRECISION NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_revogacoes_registrada_em ON revogacoes (registrada_em);
+CREATE INDEX IF NOT EXISTS idx_revogacoes_exp ON revogacoes (exp);
+"""
+
+# O asyncpg prepara cada consulta na primeira execução e mantém o statement
+# em cache por conexão do pool (statement_cache_size).
+SQL_INSERIR_USUARIO = """
+INSERT INTO usuarios (nome, cpf, senha_hash, data_criacao) VALUES ($1, $2, $3, $4)
+ON CONFLICT (cpf) DO NOTHING
+RETURNING id
+"""
+SQL_USUARIO_POR_CPF = "SELECT * FROM usuarios WHERE cpf = $1"
+SQL_USUARIO_POR_ID = "SELECT * FROM usuarios WHERE id = $1"
+SQL_PROXIMO_ID_CONTA = "SELECT nextval(pg_get_serial_sequence('contas', 'id'))"
+SQL_INSERIR_CONTA = """
+INSERT INTO contas (id, numero_conta, tipo_conta, saldo, usuario_id, data_criacao)
+VALUES ($1, $2, $3, 0, $4, $5)
+ON CONFLICT (usuario_id) DO NOTHING
+RETURNING id
+"""
+# Números de conta antigos usavam o ID da conta como sequencial
+SQL_INICIAR_SEQUENCIA = """
+INSERT INTO sequencias (nome, proximo)
+SELECT $1, COALESCE(MAX(id), 0) + 1 FROM contas
+ON CONFLICT (nome) DO NOTHING
+"""
+SQL_RESERVAR_SEQUENCIA = (
+    "UPDATE sequencias SET proximo = proximo + $1 WHERE nome = $2 RETURNING proximo - $1"
+)
+SQL_CONTA_POR_USUARIO = "SELECT * FROM contas WHERE usuario_id = $1"
+SQL_CONTA_POR_ID = "SELECT * FROM contas WHERE id = $1"
+SQL_CONTA_POR_NUMERO = "SELECT * FROM contas WHERE numero_conta = $1"
+SQL_CONTA_POR_CPF = """
+SELECT u.id, c.id FROM usuarios u LEFT JOIN contas c ON c.usuario_id = u.id WHERE u.cpf = $1
+"""
+SQL_SALDO_CONTA_PARA_ATUALIZAR = "SELECT saldo FROM contas WHERE id = $1 FOR UPDATE"
+SQL_ATUALIZAR_SALDO = "UPDATE contas SET saldo = $1 WHERE id = $2"
+# Ordem fixa por ID: transferências cruzadas travam as linhas na mesma ordem
+SQL_CONTAS_PARA_TRANSFERIR = """
+SELECT id, numero_conta, saldo FROM contas WHERE id = ANY($1::BIGINT[]) ORDER BY id FOR UPDATE
+"""
+SQL_INSERIR_TRANSACAO = """
+INSERT INTO transacoes (
+    conta_id, tipo, valor, descricao, saldo_anterior, saldo_posterior, data_transacao
+) VALUES ($1, $2, $3, $4, $5, $6, $7)
+RETURNING id
+"""
+SQL_RESERVAR_IDS_TRANSACAO = (
+    "SELECT nextval(pg_get_serial_sequence('transacoes', 'id')) FROM generate_series(1, $1)"
+)
+SQL_INSERIR_TRANSACOES_LOTE = """
+INSERT INTO transacoes (
+    id, conta_id, tipo, valor, descricao, saldo_anterior, saldo_posterior, data_transacao
+)
+SELECT * FROM unnest(
+    $1::BIGINT[], $2::BIGINT[], $3::TEXT[], $4::BIGINT[],
+    $5::TEXT[], $6::BIGINT[], $7::BIGINT[], $8::TIMESTAMP[]
+)
+"""
+SQL_TRANSACOES_POR_CONTA = (
+    "SELECT * FROM transacoes WHERE conta_id = $1 ORDER BY data_transacao, id"
+)
+SQL_PAGINA_TRANSACOES = "SELECT * FROM transacoes WHERE {filtros} ORDER BY id {ordem} LIMIT ${limite}"
+SQL_ACUMULAR_ESTATISTICAS_CONTA = """
+INSERT INTO estatisticas_conta (
+    conta_id, total_depositos, total_saques, total_transferencias_recebidas,
+    total_transferencias_enviadas, quantidade_transacoes
+) VALUES ($1, $2, $3, $4, $5, $6)
+ON CONFLICT (conta_id) DO UPDATE SET
+    total_depositos = estatisticas_conta.total_depositos + excluded.total_depositos,
+    total_saques = estatisticas_conta.total_saques + excluded.total_saques,
+    total_transferencias_recebidas = estatisticas_conta.total_transferencias_recebidas
+        + excluded.total_transferencias_recebidas,
+    total_transferencias_enviadas = estatisticas_conta.total_transferencias_enviadas
+        + excluded.total_transferencias_enviadas,
+    quantidade_transacoes = estatisticas_conta.quantidade_transacoes
+        + excluded.quantidade_transacoes
+"""
+SQL_ACUMULAR_ESTATISTICAS_PERIODO = """
+INSERT INTO estatisticas_periodo (
+    conta_id, periodo, total_depositos, total_saques, total_transferencias_recebidas,
+    total_transferencias_enviadas, quantidade_transacoes
+) VALUES ($1, $2, $3, $4, $5, $6, $7)
+ON CONFLICT (conta_id, periodo) DO UPDATE SET
+    total_depositos = estatisticas_periodo.total_depositos + excluded.total_depositos,
+    total_saques = estatisticas_periodo.total_saques + excluded.total_saques,
+    total_transferencias_recebidas = estatisticas_periodo.total_transferencias_recebidas
+        + excluded.total_transferencias_recebidas,
+    total_transferencias_enviadas = estatisticas_periodo.total_transferencias_enviadas
+        + excluded.total_transferencias_enviadas,
+    quantidade_transacoes = estatisticas_periodo.quantidade_transacoes
+        + excluded.quantidade_transacoes
+"""
+SQL_INSERIR_ESTATISTICAS_CONTA = """
+INSERT INTO estatisticas_conta (
+    conta_id, total_depositos, total_saques, total_transferencias_recebidas,
+    total_transferencias_enviadas, quantidade_transacoes
+) VALUES ($1, $2, $3, $4, $5, $6)
+"""
+SQL_INSERIR_ESTATISTICAS_PERIODO = """
+INSERT INTO estatisticas_periodo (
+    conta_id, periodo, total_depositos, total_saques, total_transferencias_recebidas,
+    total_transferencias_enviadas, quantidade_transacoes
+) VALUES ($1, $2, $3, $4, $5, $6, $7)
+"""
+SQL_ESTATISTICAS_CONTA = (
+    "SELECT total_depositos, total_saques, total_transferencias_recebidas, "
+    "total_transferencias_enviadas, quantidade_transacoes "
+    "FROM estatisticas_conta WHERE conta_id = $1"
+)
+SQL_ESTATISTICAS_POR_PERIODO = (
+    "SELECT periodo, total_depositos, total_saques, total_transferencias_recebidas, "
+    "total_transferencias_enviadas, quantidade_transacoes "
+    "FROM estatisticas_periodo WHERE conta_id = $1 ORDER BY periodo"
+)
+SQL_CONTAS_SEM_ESTATISTICAS = (
+    "SELECT COUNT(*) FROM contas "
+    "WHERE id NOT IN (SELECT conta_id FROM estatisticas_conta)"
+)
+SQL_RECALCULAR_ESTATISTICAS = """
+SELECT
+    contas.id,
+    to_char(transacoes.data_transacao, 'YYYY-MM'),
+    SUM(CASE WHEN transacoes.tipo = 'deposito' THEN transacoes.valor ELSE 0 END),
+    SUM(CASE WHEN transacoes.tipo = 'saque' THEN transacoes.valor ELSE 0 END),
+    SUM(CASE WHEN transacoes.tipo = 'transferencia'
+        AND transacoes.saldo_posterior > transacoes.saldo_anterior
+        THEN transacoes.valor ELSE 0 END),
+    SUM(CASE WHEN transacoes.tipo = 'transferencia'
+        AND transacoes.saldo_posterior <= transacoes.saldo_anterior
+        THEN transacoes.valor ELSE 0 END),
+    COUNT(transacoes.id)
+FROM contas LEFT JOIN transacoes ON transacoes.conta_id = contas.id
+WHERE $1::BIGINT IS NULL OR contas.id = $1
+GROUP BY contas.id, to_char(transacoes.data_transacao, 'YYYY-MM')
+"""
+SQL_ESTATISTICAS_ARMAZENADAS_CONTA = (
+    "SELECT conta_id, total_depositos, total_saques, total_transferencias_recebidas, "
+    "total_transferencias_enviadas, quantidade_transacoes "
+    "FROM estatisticas_conta WHERE $1::BIGINT IS NULL OR conta_id = $1"
+)
+SQL_ESTATISTICAS_ARMAZENADAS_PERIODO = (
+    "SELECT conta_id, periodo, total_depositos, total_saques, total_transferencias_recebidas, "
+    "total_transferencias_enviadas, quantidade_transacoes "
+    "FROM estatisticas_periodo WHERE $1::BIGINT IS NULL OR conta_id = $1"
+)
+SQL_TRANSACAO_POR_ID = "SELECT * FROM transacoes WHERE id = $1"
+SQL_CHAVE_IDEMPOTENCIA = (
+    "SELECT tipo, valor, descricao, transacao_id FROM idempotencia "
+    "WHERE conta_id = $1 AND chave = $2 AND expira_em > $3"
+)
+# Só as chaves da conta travada: não disputa linhas com outras contas
+SQL_REMOVER_CHAVES_EXPIRADAS = "DELETE FROM idempotencia WHERE conta_id = $1 AND expira_em <= $2"
+SQL_GRAVAR_CHAVE_IDEMPOTENCIA = """
+INSERT INTO idempotencia (conta_id, chave, tipo, valor, descricao, transacao_id, expira_em)
+VALUES ($1, $2, $3, $4, $5, $6, $7)
+"""
+SQL_GRAVAR_REVOGACAO = """
+INSERT INTO revogacoes (jti, exp, registrada_em) VALUES ($1, $2, $3)
+ON CONFLICT (jti) DO NOTHING
+"""
+SQL_REMOVER_REVOGACOES_EXPIRADAS = "DELETE FROM revogacoes WHERE exp <= $1"
+SQL_LISTAR_REVOGACOES = "SELECT jti, exp FROM revogacoes WHERE registrada_em >= $1 AND exp > $2"
+SQL_TRAVAR_ESTATISTICAS = "LOCK TABLE estatisticas_conta, estatisticas_periodo IN EXCLUSIVE MODE"
+SQL_REMOVER_ESTATISTICAS_CONTA = "DELETE FROM estatisticas_conta WHERE conta_id = $1"
+SQL_REMOVER_ESTATISTICAS_PERIODO = "DELETE FROM estatisticas_periodo WHERE conta_id = $1"
+
+
+class RepositorioPostgres(RepositorioBase):
+    """
+    Repositório assíncrono em PostgreSQL
+    
+    Todos os métodos são corrotinas executadas sobre um pool de conexões
+    asyncpg, de modo que os handlers nunca bloqueiam o event loop em I/O.
+    O pool é criado em `iniciar()`, chamado no startup da aplicação.
+    """
+    
+    compartilhado = True
+    
+    def __init__(self, dsn: str, pool_min: int = 2, pool_max: int = 10):
+        super().__init__()
+        self.dsn = dsn
+        self.pool_min = pool_min
+        self.pool_max = pool_max
+        self._pool: Optional[asyncpg.Pool] = None
+        self.numeros = AlocadorBlocos(self._reservar_numeros, settings.NUMERO_CONTA_BLOCO)
+    
+    @property
+    def pool(self) -> asyncpg.Pool:
+        if self._pool is None:
+            raise RuntimeError("Pool do PostgreSQL não iniciado; chame iniciar()")
+        return self._pool
+    
+    async def iniciar(self):
+        """Cria o pool de conexões e o esquema"""
+        if self._pool is not None:
+            return
+        self._pool = await asyncpg.create_pool(
+            self.dsn,
+            min_size=self.pool_min,
+            max_size=self.pool_max
+        )
+        async with self._pool.acquire() as conn:
+            await conn.execute(ESQUEMA)
+            await conn.execute(SQL_INICIAR_SEQUENCIA, SEQUENCIA_NUMERO_CONTA)
+            sem_estatisticas = await conn.fetchval(SQL_CONTAS_SEM_ESTATISTICAS)
+        
+        # Bancos criados antes dos agregados incrementais são migrados aqui
+        if sem_estatisticas:
+            await self.reconstruir_estatisticas()
+    
+    async def fechar(self):
+        """Fecha o pool de conexões"""
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+    
+    # Operações de Usuário
+    async def criar_usuario(self, nome: str, cpf: str, senha_hash: str) -> dict:
+        """Cria um novo usuário"""
+        data_criacao = datetime.now()
+        usuario_id = await self.pool.fetchval(
+            SQL_INSERIR_USUARIO, nome, cpf, senha_hash, data_criacao
+        )
+        if usuario_id is None:
+            raise ValueError("CPF já cadastrado")
+        
+        return {
+            "id": usuario_id,
+            "nome": nome,
+            "cpf": cpf,
+            "senha_hash": senha_hash,
+            "data_criacao": data_criacao
+        }
+    
+    async def obter_usuario_por_cpf(self, cpf: str) -> Optional[dict]:
+        """Obtém usuário por CPF"""
+        linha = await self.pool.fetchrow(SQL_USUARIO_POR_CPF, cpf)
+        return dict(linha) if linha else None
+    
+    async def obter_usuario_por_id(self, usuario_id: int) -> Optional[dict]:
+        """Obtém usuário por ID"""
+        linha = await self.pool.fetchrow(SQL_USUARIO_POR_ID, usuario_id)
+        return dict(linha) if linha else None
+    
+    async def _reservar_numeros(self, quantidade: int) -> int:
+        """Reserva sequenciais de números de conta (a linha fica travada até o commit)"""
+        return await self.pool.fetchval(
+            SQL_RESERVAR_SEQUENCIA, quantidade, SEQUENCIA_NUMERO_CONTA
+        )
+    
+    # Operações de Conta
+    async def criar_conta(self, usuario_id: int, tipo_conta: TipoConta) -> dict:
+        """Cria uma nova conta para um usuário"""
+        data_criacao = datetime.now()
+        numero_conta = formatar_numero_conta(await self.numeros.proximo_assincrono())
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                if not await conn.fetchrow(SQL_USUARIO_POR_ID, usuario_id):
+                    raise ValueError("Usuário não encontrado")
+                
+                conta_id = await conn.fetchval(SQL_PROXIMO_ID_CONTA)
+                inserida = await conn.fetchval(
+                    SQL_INSERIR_CONTA,
+                    conta_id, numero_conta, tipo_conta.value, usuario_id, data_criacao
+                )
+                if inserida is None:
+                    raise ValueError("Usuário já possui uma conta")
+                await conn.execute(SQL_INSERIR_ESTATISTICAS_CONTA, conta_id, 0, 0, 0, 0, 0)
+        
+        return {
+            "id": conta_id,
+            "numero_conta": numero_conta,
+            "tipo_conta": tipo_conta.value,
+            "saldo": 0,
+            "usuario_id": usuario_id,
+            "data_criacao": data_criacao
+        }
+    
+    async def obter_conta_por_usuario(self, usuario_id: int) -> Optional[dict]:
+        """Obtém a conta de um usuário"""
+        linha = await self.pool.fetchrow(SQL_CONTA_POR_USUARIO, usuario_id)
+        return dict(linha) if linha else None
+    
+    async def buscar_conta_por_cpf(self, cpf: str) -> Optional[ContaResolvida]:
+        """Obtém os IDs do usuário e da conta de um CPF"""
+        linha = await self.pool.fetchrow(SQL_CONTA_POR_CPF, cpf)
+        return ContaResolvida(linha[0], linha[1]) if linha else None
+    
+    async def obter_conta_por_id(self, conta_id: int) -> Optional[dict]:
+        """Obtém conta por ID"""
+        linha = await self.pool.fetchrow(SQL_CONTA_POR_ID, conta_id)
+        return dict(linha) if linha else None
+    
+    async def obter_conta_por_numero(self, numero_conta: str) -> Optional[dict]:
+        """Obtém conta pelo número (índice da restrição UNIQUE)"""
+        linha = await self.pool.fetchrow(SQL_CONTA_POR_NUMERO, numero_conta)
+        return dict(linha) if linha else None
+    
+    async def atualizar_saldo(self, conta_id: int, novo_saldo: int):
+        """Atualiza o saldo de uma conta"""
+        await self.pool.execute(SQL_ATUALIZAR_SALDO, novo_saldo, conta_id)
+    
+    # Operações de Transação
+    async def criar_transacao(
+        self,
+        conta_id: int,
+        tipo: TipoTransacao,
+        valor: int,
+        descricao: Optional[str] = None
+    ) -> dict:
+        """Cria uma nova transação, travando a linha da conta até o commit"""
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                saldo_anterior = await conn.fetchval(SQL_SALDO_CONTA_PARA_ATUALIZAR, conta_id)
+                if saldo_anterior is None:
+                    raise ValueError("Conta não encontrada")
+                return await self._inserir_transacao(
+                    conn, conta_id, saldo_anterior, tipo, valor, descricao
+                )
+    
+    async def _inserir_transacao(
+        self,
+        conn: asyncpg.Connection,
+        conta_id: int,
+        saldo_anterior: int,
+        tipo: TipoTransacao,
+        valor: int,
+        descricao: Optional[str]
+    ) -> dict:
+        """Valida o saldo e grava um depósito ou saque (com a linha da conta travada)"""
+        # Data tomada com a linha travada: na conta, a ordem das datas
+        # acompanha a dos IDs (cursor da paginação)
+        data_transacao = datetime.now()
+        
+        # Valida e calcula novo saldo
+        if tipo == TipoTransacao.SAQUE:
+            if saldo_anterior < valor:
+                raise ValueError("Saldo insuficiente para realizar o saque")
+            saldo_posterior = saldo_anterior - valor
+        else:  # DEPOSITO
+            saldo_posterior = saldo_anterior + valor
+        
+        transacao = {
+            "conta_id": conta_id,
+            "tipo": tipo.value,
+            "valor": valor,
+            "descricao": descricao,
+            "saldo_anterior": saldo_anterior,
+            "saldo_posterior": saldo_posterior,
+            "data_transacao": data_transacao
+        }
+        transacao_id = await conn.fetchval(
+            SQL_INSERIR_TRANSACAO,
+            conta_id,
+            transacao["tipo"],
+            transacao["valor"],
+            descricao,
+            transacao["saldo_anterior"],
+            transacao["saldo_posterior"],
+            data_transacao
+        )
+        await conn.execute(
+            SQL_ATUALIZAR_SALDO, transacao["saldo_posterior"], conta_id
+        )
+        await self._acumular_estatisticas(conn, conta_id, [transacao])
+        
+        return {"id": transacao_id, **transacao}
+    
+    async def criar_transacao_idempotente(
+        self,
+        conta_id: int,
+        tipo: TipoTransacao,
+        valor: int,
+        descricao: Optional[str],
+        chave: str
+    ) -> dict:
+        """
+        Cria uma transação no máximo uma vez por chave, com as chaves no banco
+        
+        A chave é consultada e gravada na mesma transação que cria a
+        transação, depois do `FOR UPDATE` da conta, então vale entre todos
+        os processos que usam o banco (vários workers) e sobrevive a
+        reinícios. Uma repetição concorrente espera a trava da original e,
+        já com ela confirmada, recebe o seu resultado; uma execução que
+        falha não grava a chave. As chaves expiram após
+        IDEMPOTENCIA_TTL_SEGUNDOS.
+        
+        Raises:
+            ChaveIdempotenciaDivergente: Chave usada com outro conteúdo
+            ValueError: Conta inexistente ou saldo insuficiente
+        """
+        if not self.idempotencia.ativo:
+            return await self.criar_transacao(conta_id, tipo, valor, descricao)
+        
+        agora = time.time()
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                saldo_anterior = await conn.fetchval(SQL_SALDO_CONTA_PARA_ATUALIZAR, conta_id)
+                if saldo_anterior is None:
+                    raise ValueError("Conta não encontrada")
+                
+                linha = await conn.fetchrow(SQL_CHAVE_IDEMPOTENCIA, conta_id, chave, agora)
+                if linha is not None:
+                    if (linha["tipo"], linha["valor"], linha["descricao"]) != (tipo.value, valor, descricao):
+                        raise ChaveIdempotenciaDivergente(
+                            "Idempotency-Key já utilizada com outra requisição"
+                        )
+                    return dict(await conn.fetchrow(SQL_TRANSACAO_POR_ID, linha["transacao_id"]))
+                
+                await conn.execute(SQL_REMOVER_CHAVES_EXPIRADAS, conta_id, agora)
+                transacao = await self._inserir_transacao(
+                    conn, conta_id, saldo_anterior, tipo, valor, descricao
+                )
+                await conn.execute(
+                    SQL_GRAVAR_CHAVE_IDEMPOTENCIA,
+                    conta_id, chave, tipo.value, valor, descricao, transacao["id"],
+                    agora + self.idempotencia.ttl_segundos
+                )
+        
+        return transacao
+    
+    async def criar_transferencia(
+        self,
+        conta_origem_id: int,
+        conta_destino_id: int,
+        valor: int,
+        descricao: Optional[str] = None
+    ) -> Tuple[dict, dict]:
+        """Transfere entre duas contas, travando as duas linhas em ordem de ID"""
+        if conta_origem_id == conta_destino_id:
+            raise ValueError("A conta de destino deve ser diferente da conta de origem")
+        
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                contas = {
+                    linha["id"]: dict(linha)
+                    for linha in await conn.fetch(
+                        SQL_CONTAS_PARA_TRANSFERIR, [conta_origem_id, conta_destino_id]
+                    )
+                }
+                if conta_origem_id not in contas:
+                    raise ValueError("Conta não encontrada")
+                if conta_destino_id not in contas:
+                    raise ValueError("Conta de destino não encontrada")
+                
+                debito, credito = montar_transferencia(
+                    contas[conta_origem_id], contas[conta_destino_id],
+                    valor, descricao, datetime.now()
+                )
+                ids = sorted(
+                    linha[0] for linha in await conn.fetch(SQL_RESERVAR_IDS_TRANSACAO, 2)
+                )
+                debito["id"], credito["id"] = ids
+                await conn.execute(SQL_INSERIR_TRANSACOES_LOTE, *(
+                    [debito[campo], credito[campo]]
+                    for campo in (
+                        "id", "conta_id", "tipo", "valor", "descricao",
+                        "saldo_anterior", "saldo_posterior", "data_transacao"
+                    )
+                ))
+                for transacao in (debito, credito):
+                    await conn.execute(
+                        SQL_ATUALIZAR_SALDO, transacao["saldo_posterior"], transacao["conta_id"]
+                    )
+                    await self._acumular_estatisticas(conn, transacao["conta_id"], [transacao])
+        
+        return debito, credito
+    
+    async def criar_transacoes_lote(
+        self,
+        conta_id: int,
+        itens: List[ItemLote],
+        atomico: bool = True
+    ) -> List[Union[dict, str]]:
+        """Cria várias transações com uma trava de linha e um único INSERT"""
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                saldo = await conn.fetchval(SQL_SALDO_CONTA_PARA_ATUALIZAR, conta_id)
+                if saldo is None:
+                    raise ValueError("Conta não encontrada")
+                data_transacao = datetime.now()
+                
+                calculados = calcular_lote(saldo, itens, atomico)
+                aceitos = [
+                    (item, calculado) for item, calculado in zip(itens, calculados)
+                    if not isinstance(calculado, str)
+                ]
+                if not aceitos:
+                    return calculados
+                
+                ids = sorted(
+                    linha[0] for linha in await conn.fetch(SQL_RESERVAR_IDS_TRANSACAO, len(aceitos))
+                )
+                criadas = [
+                    {
+                        "id": transacao_id,
+                        "conta_id": conta_id,
+                        "tipo": tipo.value,
+                        "valor": valor,
+                        "descricao": descricao,
+                        "saldo_anterior": saldo_anterior,
+                        "saldo_posterior": saldo_posterior,
+                        "data_transacao": data_transacao
+                    }
+                    for transacao_id, ((tipo, valor, descricao), (saldo_anterior, saldo_posterior))
+                    in zip(ids, aceitos)
+                ]
+                await conn.execute(SQL_INSERIR_TRANSACOES_LOTE, *(
+                    [transacao[campo] for transacao in criadas]
+                    for campo in (
+                        "id", "conta_id", "tipo", "valor", "descricao",
+                        "saldo_anterior", "saldo_posterior", "data_transacao"
+                    )
+                ))
+                await conn.execute(
+                    SQL_ATUALIZAR_SALDO, criadas[-1]["saldo_posterior"], conta_id
+                )
+                await self._acumular_estatisticas(conn, conta_id, criadas)
+        
+        proximas = iter(criadas)
+        return [
+            calculado if isinstance(calculado, str) else next(proximas)
+            for calculado in calculados
+        ]
+    
+    @staticmethod
+    async def _acumular_estatisticas(
+        conn: asyncpg.Connection,
+        conta_id: int,
+        transacoes: List[dict]
+    ):
+        """Soma transações da conta aos agregados dentro da transação corrente"""
+        totais = novas_estatisticas()
+        periodos: Dict[str, dict] = {}
+        for transacao in transacoes:
+            periodo = periodos.setdefault(
+                periodo_da_data(transacao["data_transacao"]), novas_estatisticas()
+            )
+            acumular_estatisticas(totais, transacao)
+            acumular_estatisticas(periodo, transacao)
+        
+        await conn.execute(
+            SQL_ACUMULAR_ESTATISTICAS_CONTA,
+            conta_id,
+            totais["total_depositos"],
+            totais["total_saques"],
+            totais["total_transferencias_recebidas"],
+            totais["total_transferencias_enviadas"],
+            totais["quantidade_transacoes"]
+        )
+        for periodo, valores in periodos.items():
+            await conn.execute(
+                SQL_ACUMULAR_ESTATISTICAS_PERIODO,
+                conta_id,
+                periodo,
+                valores["total_depositos"],
+                valores["total_saques"],
+                valores["total_transferencias_recebidas"],
+                valores["total_transferencias_enviadas"],
+                valores["quantidade_transacoes"]
+            )
+    
+    async def obter_transacoes_por_conta(self, conta_id: int) -> List[dict]:
+        """Obtém todas as transações de uma conta"""
+        linhas = await self.pool.fetch(SQL_TRANSACOES_POR_CONTA, conta_id)
+        return [dict(linha) for linha in linhas]
+    
+    async def obter_transacoes_paginadas(
+        self,
+        conta_id: int,
+        after_id: Optional[int] = None,
+        limit: int = 50,
+        desde: Optional[datetime] = None,
+        ate: Optional[datetime] = None,
+        decrescente: bool = False
+    ) -> List[dict]:
+        """Obtém uma página de transações pelo índice (conta_id, id)"""
+        filtros = ["conta_id = $1"]
+        parametros: list = [conta_id]
+        if after_id is not None:
+            parametros.append(after_id)
+            filtros.append(f"id {'<' if decrescente else '>'} ${len(parametros)}")
+        if desde is not None:
+            parametros.append(desde)
+            filtros.append(f"data_transacao >= ${len(parametros)}")
+        if ate is not None:
+            parametros.append(ate)
+            filtros.append(f"data_transacao <= ${len(parametros)}")
+        parametros.append(limit)
+        
+        sql = SQL_PAGINA_TRANSACOES.format(
+            filtros=" AND ".join(filtros),
+            ordem="DESC" if decrescente else "ASC",
+            limite=len(parametros)
+        )
+        linhas = await self.pool.fetch(sql, *parametros)
+        return [dict(linha) for linha in linhas]
+    
+    @staticmethod
+    def _estatisticas_da_linha(
+        total_depositos, total_saques, recebidas, enviadas, quantidade
+    ) -> dict:
+        return {
+            "total_depositos": int(total_depositos or 0),
+            "total_saques": int(total_saques or 0),
+            "total_transferencias_recebidas": int(recebidas or 0),
+            "total_transferencias_enviadas": int(enviadas or 0),
+            "quantidade_transacoes": quantidade or 0
+        }
+    
+    async def obter_estatisticas_conta(self, conta_id: int) -> dict:
+        """Obtém os agregados mantidos incrementalmente de uma conta"""
+        linha = await self.pool.fetchrow(SQL_ESTATISTICAS_CONTA, conta_id)
+        if not linha:
+            return novas_estatisticas()
+        return self._estatisticas_da_linha(*linha)
+    
+    async def obter_estatisticas_por_periodo(self, conta_id: int) -> List[dict]:
+        """Obtém os agregados mensais de uma conta"""
+        linhas = await self.pool.fetch(SQL_ESTATISTICAS_POR_PERIODO, conta_id)
+        return [
+            {"periodo": periodo, **self._estatisticas_da_linha(*valores)}
+            for periodo, *valores in linhas
+        ]
+    
+    async def reconstruir_estatisticas(
+        self,
+        conta_id: Optional[int] = None,
+        corrigir: bool = True
+    ) -> List[dict]:
+        """Recalcula os agregados a partir das transações"""
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                # Bloqueia escritas concorrentes nos agregados durante a comparação
+                await conn.execute(SQL_TRAVAR_ESTATISTICAS)
+                
+                calculadas: Dict[int, EstatisticasConta] = {}
+                for cid, periodo, *valores in await conn.fetch(
+                    SQL_RECALCULAR_ESTATISTICAS, conta_id
+                ):
+                    totais, periodos = calculadas.setdefault(cid, (novas_estatisticas(), {}))
+                    if periodo is None:
+                        continue
+                    periodos[periodo] = self._estatisticas_da_linha(*valores)
+                    for campo, valor in periodos[periodo].items():
+                        totais[campo] += valor
+                
+                armazenadas: Dict[int, EstatisticasConta] = {}
+                for cid, *valores in await conn.fetch(
+                    SQL_ESTATISTICAS_ARMAZENADAS_CONTA, conta_id
+                ):
+                    armazenadas[cid] = (self._estatisticas_da_linha(*valores), {})
+                for cid, periodo, *valores in await conn.fetch(
+                    SQL_ESTATISTICAS_ARMAZENADAS_PERIODO, conta_id
+                ):
+                    periodos = armazenadas.setdefault(cid, (novas_estatisticas(), {}))[1]
+                    periodos[periodo] = self._estatisticas_da_linha(*valores)
+                
+                divergencias = comparar_estatisticas(armazenadas, calculadas)
+                if corrigir:
+                    for divergencia in divergencias:
+                        await self._gravar_estatisticas(
+                            conn, divergencia["conta_id"], calculadas[divergencia["conta_id"]]
+                        )
+        return divergencias
+    
+    @staticmethod
+    async def _gravar_estatisticas(
+        conn: asyncpg.Connection,
+        conta_id: int,
+        estatisticas: EstatisticasConta
+    ):
+        """Substitui os agregados de uma conta"""
+        totais, periodos = estatisticas
+        await conn.execute(SQL_REMOVER_ESTATISTICAS_CONTA, conta_id)
+        await conn.execute(SQL_REMOVER_ESTATISTICAS_PERIODO, conta_id)
+        await conn.execute(
+            SQL_INSERIR_ESTATISTICAS_CONTA,
+            conta_id,
+            totais["total_depositos"],
+            totais["total_saques"],
+            totais["total_transferencias_recebidas"],
+            totais["total_transferencias_enviadas"],
+            totais["quantidade_transacoes"]
+        )
+        for periodo, valores in periodos.items():
+            await conn.execute(
+                SQL_INSERIR_ESTATISTICAS_PERIODO,
+                conta_id,
+                periodo,
+                valores["total_depositos"],
+                valores["total_saques"],
+                valores["total_transferencias_recebidas"],
+                valores["total_transferencias_enviadas"],
+                valores["quantidade_transacoes"]
+            )
+
+    # Revogação de tokens
+    async def gravar_revogacao(self, jti: str, exp: float):
+        """Grava a revogação do token, descartando as já expiradas"""
+        agora = time.time()
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(SQL_REMOVER_REVOGACOES_EXPIRADAS, agora)
+                await conn.execute(SQL_GRAVAR_REVOGACAO, jti, exp, agora)
+    
+    async def listar_revogacoes(self, desde: float = 0.0) -> List[Tuple[str, float]]:
+        """Revogações ainda válidas gravadas a partir de `desde`"""
+        linhas = await self.pool.fetch(SQL_LISTAR_REVOGACOES, desde, time.time())
+        return [(linha["jti"], linha["exp"]) for linha in linhas]
@@ -0,0 +1,800 @@
+"""
+Backend de armazenamento persistente em SQLite (modo WAL)
+"""
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
+from models import TipoTransacao, TipoConta
+from idempotencia import ChaveIdempotenciaDivergente
+from numeracao import AlocadorBlocos, SEQUENCIA_NUMERO_CONTA, formatar_numero_conta
+from config import settings
+from repositorio import (
+    RepositorioBase, ArmazenamentoOcupado, ContaResolvida, EstatisticasConta, ItemLote, periodo_da_data,
+    novas_estatisticas, acumular_estatisticas, comparar_estatisticas, calcular_lote,
+    montar_transferencia
+)
+import sqlite3
+import threading
+import time
+
+
+# Versão do esquema (PRAGMA user_version)
+VERSAO_ESQUEMA = 1
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS usuarios (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nome TEXT NOT NULL,
+    cpf TEXT NOT NULL,
+    senha_hash TEXT NOT NULL,
+    data_criacao TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_usuarios_cpf ON usuarios (cpf);
+
+CREATE TABLE IF NOT EXISTS contas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    numero_conta TEXT,
+    tipo_conta TEXT NOT NULL,
+    saldo INTEGER NOT NULL DEFAULT 0,
+    usuario_id INTEGER NOT NULL REFERENCES usuarios (id),
+    data_criacao TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_contas_usuario_id ON contas (usuario_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_contas_numero_conta ON contas (numero_conta);
+
+CREATE TABLE IF NOT EXISTS transacoes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    conta_id INTEGER NOT NULL REFERENCES contas (id),
+    tipo TEXT NOT NULL,
+    valor INTEGER NOT NULL,
+    descricao TEXT,
+    saldo_anterior INTEGER NOT NULL,
+    saldo_posterior INTEGER NOT NULL,
+    data_transacao TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transacoes_conta_data
+    ON transacoes (conta_id, data_transacao);
+CREATE INDEX IF NOT EXISTS idx_transacoes_conta_id
+    ON transacoes (conta_id, id);
+
+CREATE TABLE IF NOT EXISTS estatisticas_conta (
+    conta_id INTEGER PRIMARY KEY REFERENCES contas (id),
+    total_depositos INTEGER NOT NULL DEFAULT 0,
+    total_saques INTEGER NOT NULL DEFAULT 0,
+    total_transferencias_recebidas INTEGER NOT NULL DEFAULT 0,
+    total_transferencias_enviadas INTEGER NOT NULL DEFAULT 0,
+    quantidade_transacoes INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS estatisticas_periodo (
+    conta_id INTEGER NOT NULL REFERENCES contas (id),
+    periodo TEXT NOT NULL,
+    total_depositos INTEGER NOT NULL DEFAULT 0,
+    total_saques INTEGER NOT NULL DEFAULT 0,
+    total_transferencias_recebidas INTEGER NOT NULL DEFAULT 0,
+    total_transferencias_enviadas INTEGER NOT NULL DEFAULT 0,
+    quantidade_transacoes INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (conta_id, periodo)
+);
+
+CREATE TABLE IF NOT EXISTS idempotencia (
+    conta_id INTEGER NOT NULL REFERENCES contas (id),
+    chave TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    valor INTEGER NOT NULL,
+    descricao TEXT,
+    transacao_id INTEGER NOT NULL REFERENCES transacoes (id),
+    expira_em REAL NOT NULL,
+    PRIMARY KEY (conta_id, chave)
+);
+CREATE INDEX IF NOT EXISTS idx_idempotencia_expira_em ON idempotencia (expira_em);
+
+CREATE TABLE IF NOT EXISTS sequencias (
+    nome TEXT PRIMARY KEY,
+    proximo INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS revogacoes (
+    jti TEXT PRIMARY KEY,
+    exp REAL NOT NULL,
+    registrada_em REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_revogacoes_registrada_em ON revogacoes (registrada_em);
+CREATE INDEX IF NOT EXISTS idx_revogacoes_exp ON revogacoes (exp);
+"""
+
+# Consultas fixas: o sqlite3 mantém os statements compilados em cache por
+# conexão, então cada SQL abaixo é preparado uma única vez.
+SQL_INSERIR_USUARIO = (
+    "INSERT INTO usuarios (nome, cpf, senha_hash, data_criacao) VALUES (?, ?, ?, ?)"
+)
+SQL_USUARIO_POR_CPF = "SELECT * FROM usuarios WHERE cpf = ?"
+SQL_USUARIO_POR_ID = "SELECT * FROM usuarios WHERE id = ?"
+SQL_INSERIR_CONTA = (
+    "INSERT INTO contas (numero_conta, tipo_conta, saldo, usuario_id, data_criacao) "
+    "VALUES (?, ?, 0, ?, ?)"
+)
+SQL_CONTA_POR_USUARIO = "SELECT * FROM contas WHERE usuario_id = ?"
+SQL_CONTA_POR_ID = "SELECT * FROM contas WHERE id = ?"
+SQL_CONTA_POR_NUMERO = "SELECT * FROM contas WHERE numero_conta = ?"
+SQL_CONTA_POR_CPF = """
+SELECT u.id, c.id FROM usuarios u LEFT JOIN contas c ON c.usuario_id = u.id WHERE u.cpf = ?
+"""
+SQL_SALDO_CONTA = "SELECT saldo FROM contas WHERE id = ?"
+SQL_CONTA_PARA_TRANSFERIR = "SELECT id, numero_conta, saldo FROM contas WHERE id = ?"
+SQL_ATUALIZAR_SALDO = "UPDATE contas SET saldo = ? WHERE id = ?"
+SQL_INSERIR_TRANSACAO = """
+INSERT INTO transacoes (
+    conta_id, tipo, valor, descricao, saldo_anterior, saldo_posterior, data_transacao
+) VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+SQL_TRANSACAO_POR_ID = "SELECT * FROM transacoes WHERE id = ?"
+SQL_TRANSACOES_POR_CONTA = (
+    "SELECT * FROM transacoes WHERE conta_id = ? ORDER BY data_transacao, id"
+)
+SQL_PAGINA_TRANSACOES = "SELECT * FROM transacoes WHERE {filtros} ORDER BY id {ordem} LIMIT ?"
+SQL_ACUMULAR_ESTATISTICAS_CONTA = """
+INSERT INTO estatisticas_conta (
+    conta_id, total_depositos, total_saques, total_transferencias_recebidas,
+    total_transferencias_enviadas, quantidade_transacoes
+) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (conta_id) DO UPDATE SET
+    total_depositos = total_depositos + excluded.total_depositos,
+    total_saques = total_saques + excluded.total_saques,
+    total_transferencias_recebidas = total_transferencias_recebidas
+        + excluded.total_transferencias_recebidas,
+    total_transferencias_enviadas = total_transferencias_enviadas
+        + excluded.total_transferencias_enviadas,
+    quantidade_transacoes = quantidade_transacoes + excluded.quantidade_transacoes
+"""
+SQL_ACUMULAR_ESTATISTICAS_PERIODO = """
+INSERT INTO estatisticas_periodo (
+    conta_id, periodo, total_depositos, total_saques, total_transferencias_recebidas,
+    total_transferencias_enviadas, quantidade_transacoes
+) VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (conta_id, periodo) DO UPDATE SET
+    total_depositos = total_depositos + excluded.total_depositos,
+    total_saques = total_saques + excluded.total_saques,
+    total_transferencias_recebidas = total_transferencias_recebidas
+        + excluded.total_transferencias_recebidas,
+    total_transferencias_enviadas = total_transferencias_enviadas
+        + excluded.total_transferencias_enviadas,
+    quantidade_transacoes = quantidade_transacoes + excluded.quantidade_transacoes
+"""
+SQL_INSERIR_ESTATISTICAS_CONTA = """
+INSERT INTO estatisticas_conta (
+    conta_id, total_depositos, total_saques, total_transferencias_recebidas,
+    total_transferencias_enviadas, quantidade_transacoes
+) VALUES (?, ?, ?, ?, ?, ?)
+"""
+SQL_INSERIR_ESTATISTICAS_PERIODO = """
+INSERT INTO estatisticas_periodo (
+    conta_id, periodo, total_depositos, total_saques, total_transferencias_recebidas,
+    total_transferencias_enviadas, quantidade_transacoes
+) VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+SQL_ESTATISTICAS_CONTA = (
+    "SELECT total_depositos, total_saques, total_transferencias_recebidas, "
+    "total_transferencias_enviadas, quantidade_transacoes "
+    "FROM estatisticas_conta WHERE conta_id = ?"
+)
+SQL_ESTATISTICAS_POR_PERIODO = (
+    "SELECT periodo, total_depositos, total_saques, total_transferencias_recebidas, "
+    "total_transferencias_enviadas, quantidade_transacoes "
+    "FROM estatisticas_periodo WHERE conta_id = ? ORDER BY periodo"
+)
+SQL_CONTAS_SEM_ESTATISTICAS = (
+    "SELECT COUNT(*) FROM contas "
+    "WHERE id NOT IN (SELECT conta_id FROM estatisticas_conta)"
+)
+SQL_RECALCULAR_ESTATISTICAS = """
+SELECT
+    contas.id,
+    substr(transacoes.data_transacao, 1, 7),
+    SUM(CASE WHEN transacoes.tipo = 'deposito' THEN transacoes.valor ELSE 0 END),
+    SUM(CASE WHEN transacoes.tipo = 'saque' THEN transacoes.valor ELSE 0 END),
+    SUM(CASE WHEN transacoes.tipo = 'transferencia'
+        AND transacoes.saldo_posterior > transacoes.saldo_anterior
+        THEN transacoes.valor ELSE 0 END),
+    SUM(CASE WHEN transacoes.tipo = 'transferencia'
+        AND transacoes.saldo_posterior <= transacoes.saldo_anterior
+        THEN transacoes.valor ELSE 0 END),
+    COUNT(transacoes.id)
+FROM contas LEFT JOIN transacoes ON transacoes.conta_id = contas.id
+WHERE ? IS NULL OR contas.id = ?
+GROUP BY contas.id, substr(transacoes.data_transacao, 1, 7)
+"""
+SQL_ESTATISTICAS_ARMAZENADAS_CONTA = (
+    "SELECT conta_id, total_depositos, total_saques, total_transferencias_recebidas, "
+    "total_transferencias_enviadas, quantidade_transacoes "
+    "FROM estatisticas_conta WHERE ? IS NULL OR conta_id = ?"
+)
+SQL_ESTATISTICAS_ARMAZENADAS_PERIODO = (
+    "SELECT conta_id, periodo, total_depositos, total_saques, total_transferencias_recebidas, "
+    "total_transferencias_enviadas, quantidade_transacoes "
+    "FROM estatisticas_periodo WHERE ? IS NULL OR conta_id = ?"
+)
+SQL_REMOVER_ESTATISTICAS_CONTA = "DELETE FROM estatisticas_conta WHERE conta_id = ?"
+SQL_REMOVER_ESTATISTICAS_PERIODO = "DELETE FROM estatisticas_periodo WHERE conta_id = ?"
+SQL_CHAVE_IDEMPOTENCIA = (
+    "SELECT tipo, valor, descricao, transacao_id FROM idempotencia "
+    "WHERE conta_id = ? AND chave = ? AND expira_em > ?"
+)
+SQL_REMOVER_CHAVES_EXPIRADAS = "DELETE FROM idempotencia WHERE expira_em <= ?"
+SQL_GRAVAR_REVOGACAO = (
+    "INSERT OR IGNORE INTO revogacoes (jti, exp, registrada_em) VALUES (?, ?, ?)"
+)
+SQL_REMOVER_REVOGACOES_EXPIRADAS = "DELETE FROM revogacoes WHERE exp <= ?"
+SQL_LISTAR_REVOGACOES = "SELECT jti, exp FROM revogacoes WHERE registrada_em >= ? AND exp > ?"
+SQL_GRAVAR_CHAVE_IDEMPOTENCIA = """
+INSERT OR REPLACE INTO idempotencia (
+    conta_id, chave, tipo, valor, descricao, transacao_id, expira_em
+) VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+# Números de conta antigos usavam o ID da conta como sequencial
+SQL_INICIAR_SEQUENCIA = (
+    "INSERT OR IGNORE INTO sequencias (nome, proximo) "
+    "SELECT ?, COALESCE(MAX(id), 0) + 1 FROM contas"
+)
+SQL_RESERVAR_SEQUENCIA = (
+    "UPDATE sequencias SET proximo = proximo + ? WHERE nome = ? RETURNING proximo - ?"
+)
+
+
+class RepositorioSQLite(RepositorioBase):
+    """
+    Repositório persistente em SQLite
+    
+    Usa journal em modo WAL (leitores não bloqueiam o escritor) e uma única
+    conexão protegida por lock. Escritas rodam em transações BEGIN IMMEDIATE,
+    o que serializa o read-modify-write do saldo mesmo entre processos que
+    compartilham o mesmo arquivo.
+    
+    As chamadas da API rodam em uma thread própria (`executor`), fora do
+    event loop: a espera pelo lock de escrita de outro processo não trava
+    as demais requisições. Se o lock não vier em SQLITE_BUSY_TIMEOUT_MS, a
+    operação falha com ArmazenamentoOcupado (503).
+    """
+    
+    compartilhado = True
+    
+    def __init__(self, caminho: str):
+        super().__init__()
+        self.caminho = caminho
+        self._lock = threading.RLock()
+        # Uma thread basta: a conexão única já serializa as operações
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self._conn = sqlite3.connect(
+            caminho,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=128
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+        self._conn.executescript(ESQUEMA)
+        self._conn.execute(f"PRAGMA user_version = {VERSAO_ESQUEMA}")
+        with self._transacao() as conn:
+            conn.execute(SQL_INICIAR_SEQUENCIA, (SEQUENCIA_NUMERO_CONTA,))
+        self.numeros = AlocadorBlocos(self._reservar_numeros, settings.NUMERO_CONTA_BLOCO)
+        
+        # Bancos criados antes dos agregados incrementais são migrados aqui
+        if self._conn.execute(SQL_CONTAS_SEM_ESTATISTICAS).fetchone()[0]:
+            self.reconstruir_estatisticas()
+    
+    def _reservar_numeros(self, quantidade: int) -> int:
+        """Reserva sequenciais de números de conta, atomicamente entre processos"""
+        with self._transacao() as conn:
+            return conn.execute(
+                SQL_RESERVAR_SEQUENCIA, (quantidade, SEQUENCIA_NUMERO_CONTA, quantidade)
+            ).fetchall()[0][0]
+    
+    @contextmanager
+    def _transacao(self):
+        """Abre uma transação de escrita com lock reservado"""
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+            except sqlite3.OperationalError as e:
+                # Códigos estendidos (ex: SQLITE_BUSY_SNAPSHOT) carregam o primário no byte baixo
+                if (e.sqlite_errorcode & 0xFF) in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED):
+                    raise ArmazenamentoOcupado("Banco ocupado por outra escrita") from e
+                raise
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+    
+    def _consultar_um(self, sql: str, parametros: tuple) -> Optional[sqlite3.Row]:
+        """Executa uma consulta que retorna no máximo uma linha"""
+        with self._lock:
+            return self._conn.execute(sql, parametros).fetchone()
+    
+    @staticmethod
+    def _usuario_para_dict(linha: sqlite3.Row) -> dict:
+        usuario = dict(linha)
+        usuario["data_criacao"] = datetime.fromisoformat(usuario["data_criacao"])
+        return usuario
+    
+    @staticmethod
+    def _conta_para_dict(linha: sqlite3.Row) -> dict:
+        conta = dict(linha)
+        conta["saldo"] = int(conta["saldo"])
+        conta["data_criacao"] = datetime.fromisoformat(conta["data_criacao"])
+        return conta
+    
+    @staticmethod
+    def _transacao_para_dict(linha: sqlite3.Row) -> dict:
+        transacao = dict(linha)
+        for campo in ("valor", "saldo_anterior", "saldo_posterior"):
+            transacao[campo] = int(transacao[campo])
+        transacao["data_transacao"] = datetime.fromisoformat(transacao["data_transacao"])
+        return transacao
+    
+    # Operações de Usuário
+    def criar_usuario(self, nome: str, cpf: str, senha_hash: str) -> dict:
+        """Cria um novo usuário"""
+        data_criacao = datetime.now()
+        with self._transacao() as conn:
+            if conn.execute(SQL_USUARIO_POR_CPF, (cpf,)).fetchone():
+                raise ValueError("CPF já cadastrado")
+            cursor = conn.execute(
+                SQL_INSERIR_USUARIO, (nome, cpf, senha_hash, data_criacao.isoformat())
+            )
+        
+        return {
+            "id": cursor.lastrowid,
+            "nome": nome,
+            "cpf": cpf,
+            "senha_hash": senha_hash,
+            "data_criacao": data_criacao
+        }
+    
+    def obter_usuario_por_cpf(self, cpf: str) -> Optional[dict]:
+        """Obtém usuário por CPF"""
+        linha = self._consultar_um(SQL_USUARIO_POR_CPF, (cpf,))
+        return self._usuario_para_dict(linha) if linha else None
+    
+    def obter_usuario_por_id(self, usuario_id: int) -> Optional[dict]:
+        """Obtém usuário por ID"""
+        linha = self._consultar_um(SQL_USUARIO_POR_ID, (usuario_id,))
+        return self._usuario_para_dict(linha) if linha else None
+    
+    # Operações de Conta
+    def criar_conta(self, usuario_id: int, tipo_conta: TipoConta) -> dict:
+        """Cria uma nova conta para um usuário"""
+        data_criacao = datetime.now()
+        # Reservado fora da transação: um novo bloco usa uma transação própria
+        numero_conta = formatar_numero_conta(self.numeros.proximo())
+        with self._transacao() as conn:
+            if not conn.execute(SQL_USUARIO_POR_ID, (usuario_id,)).fetchone():
+                raise ValueError("Usuário não encontrado")
+            if conn.execute(SQL_CONTA_POR_USUARIO, (usuario_id,)).fetchone():
+                raise ValueError("Usuário já possui uma conta")
+            
+            cursor = conn.execute(
+                SQL_INSERIR_CONTA,
+                (numero_conta, tipo_conta.value, usuario_id, data_criacao.isoformat())
+            )
+            conta_id = cursor.lastrowid
+            conn.execute(SQL_INSERIR_ESTATISTICAS_CONTA, (conta_id, 0, 0, 0, 0, 0))
+        
+        return {
+            "id": conta_id,
+            "numero_conta": numero_conta,
+            "tipo_conta": tipo_conta.value,
+            "saldo": 0,
+            "usuario_id": usuario_id,
+            "data_criacao": data_criacao
+        }
+    
+    def obter_conta_por_usuario(self, usuario_id: int) -> Optional[dict]:
+        """Obtém a conta de um usuário"""
+        linha = self._consultar_um(SQL_CONTA_POR_USUARIO, (usuario_id,))
+        return self._conta_para_dict(linha) if linha else None
+    
+    def buscar_conta_por_cpf(self, cpf: str) -> Optional[ContaResolvida]:
+        """Obtém os IDs do usuário e da conta de um CPF"""
+        linha = self._consultar_um(SQL_CONTA_POR_CPF, (cpf,))
+        return ContaResolvida(linha[0], linha[1]) if linha else None
+    
+    def obter_conta_por_id(self, conta_id: int) -> Optional[dict]:
+        """Obtém conta por ID"""
+        linha = self._consultar_um(SQL_CONTA_POR_ID, (conta_id,))
+        return self._conta_para_dict(linha) if linha else None
+    
+    def obter_conta_por_numero(self, numero_conta: str) -> Optional[dict]:
+        """Obtém conta pelo número (índice único idx_contas_numero_conta)"""
+        linha = self._consultar_um(SQL_CONTA_POR_NUMERO, (numero_conta,))
+        return self._conta_para_dict(linha) if linha else None
+    
+    def atualizar_saldo(self, conta_id: int, novo_saldo: int):
+        """Atualiza o saldo de uma conta"""
+        with self._transacao() as conn:
+            conn.execute(SQL_ATUALIZAR_SALDO, (novo_saldo, conta_id))
+    
+    # Operações de Transação
+    def criar_transacao(
+        self,
+        conta_id: int,
+        tipo: TipoTransacao,
+        valor: int,
+        descricao: Optional[str] = None
+    ) -> dict:
+        """Cria uma nova transação"""
+        with self._transacao() as conn:
+            return self._inserir_transacao(conn, conta_id, tipo, valor, descricao)
+    
+    def _inserir_transacao(
+        self,
+        conn: sqlite3.Connection,
+        conta_id: int,
+        tipo: TipoTransacao,
+        valor: int,
+        descricao: Optional[str]
+    ) -> dict:
+        """Valida o saldo e grava um depósito ou saque (dentro de uma transação de escrita)"""
+        data_transacao = datetime.now()
+        linha = conn.execute(SQL_SALDO_CONTA, (conta_id,)).fetchone()
+        if not linha:
+            raise ValueError("Conta não encontrada")
+        
+        saldo_anterior = int(linha["saldo"])
+        
+        # Valida e calcula novo saldo
+        if tipo == TipoTransacao.SAQUE:
+            if saldo_anterior < valor:
+                raise ValueError("Saldo insuficiente para realizar o saque")
+            saldo_posterior = saldo_anterior - valor
+        else:  # DEPOSITO
+            saldo_posterior = saldo_anterior + valor
+        
+        transacao = {
+            "conta_id": conta_id,
+            "tipo": tipo.value,
+            "valor": valor,
+            "descricao": descricao,
+            "saldo_anterior": saldo_anterior,
+            "saldo_posterior": saldo_posterior,
+            "data_transacao": data_transacao
+        }
+        cursor = conn.execute(SQL_INSERIR_TRANSACAO, (
+            conta_id,
+            transacao["tipo"],
+            transacao["valor"],
+            descricao,
+            transacao["saldo_anterior"],
+            transacao["saldo_posterior"],
+            data_transacao.isoformat()
+        ))
+        conn.execute(SQL_ATUALIZAR_SALDO, (transacao["saldo_posterior"], conta_id))
+        self._acumular_estatisticas(conn, conta_id, [transacao])
+        
+        return {"id": cursor.lastrowid, **transacao}
+    
+    def criar_transacao_idempotente(
+        self,
+        conta_id: int,
+        tipo: TipoTransacao,
+        valor: int,
+        descricao: Optional[str],
+        chave: str
+    ) -> dict:
+        """
+        Cria uma transação no máximo uma vez por chave, com as chaves no banco
+        
+        A chave é consultada e gravada na mesma transação de escrita que
+        cria a transação, então vale entre todos os processos que usam o
+        arquivo (vários workers) e sobrevive a reinícios. Como as escritas
+        são serializadas, uma repetição concorrente espera a original e
+        recebe o seu resultado; uma execução que falha não grava a chave.
+        As chaves expiram após IDEMPOTENCIA_TTL_SEGUNDOS. Síncrono, como os
+        demais métodos, para rodar no `executor`.
+        
+        Raises:
+            ChaveIdempotenciaDivergente: Chave usada com outro conteúdo
+            ValueError: Conta inexistente ou saldo insuficiente
+        """
+        if not self.idempotencia.ativo:
+            return self.criar_transacao(conta_id, tipo, valor, descricao)
+        
+        agora = time.time()
+        with self._transacao() as conn:
+            linha = conn.execute(SQL_CHAVE_IDEMPOTENCIA, (conta_id, chave, agora)).fetchone()
+            if linha is not None:
+                if (linha["tipo"], linha["valor"], linha["descricao"]) != (tipo.value, valor, descricao):
+                    raise ChaveIdempotenciaDivergente(
+                        "Idempotency-Key já utilizada com outra requisição"
+                    )
+                original = conn.execute(SQL_TRANSACAO_POR_ID, (linha["transacao_id"],)).fetchone()
+                return self._transacao_para_dict(original)
+            
+            conn.execute(SQL_REMOVER_CHAVES_EXPIRADAS, (agora,))
+            transacao = self._inserir_transacao(conn, conta_id, tipo, valor, descricao)
+            conn.execute(SQL_GRAVAR_CHAVE_IDEMPOTENCIA, (
+                conta_id, chave, tipo.value, valor, descricao, transacao["id"],
+                agora + self.idempotencia.ttl_segundos
+            ))
+        
+        return transacao
+    
+    def criar_transferencia(
+        self,
+        conta_origem_id: int,
+        conta_destino_id: int,
+        valor: int,
+        descricao: Optional[str] = None
+    ) -> Tuple[dict, dict]:
+        """Transfere entre duas contas em uma única transação de escrita"""
+        if conta_origem_id == conta_destino_id:
+            raise ValueError("A conta de destino deve ser diferente da conta de origem")
+        
+        with self._transacao() as conn:
+            # Data tomada com o lock de escrita (ordem das datas = ordem dos IDs)
+            data_transacao = datetime.now()
+            origem = conn.execute(SQL_CONTA_PARA_TRANSFERIR, (conta_origem_id,)).fetchone()
+            if not origem:
+                raise ValueError("Conta não encontrada")
+            destino = conn.execute(SQL_CONTA_PARA_TRANSFERIR, (conta_destino_id,)).fetchone()
+            if not destino:
+                raise ValueError("Conta de destino não encontrada")
+            
+            debito, credito = montar_transferencia(
+                {**origem, "saldo": int(origem["saldo"])},
+                {**destino, "saldo": int(destino["saldo"])},
+                valor,
+                descricao,
+                data_transacao
+            )
+            for transacao in (debito, credito):
+                cursor = conn.execute(SQL_INSERIR_TRANSACAO, (
+                    transacao["conta_id"],
+                    transacao["tipo"],
+                    transacao["valor"],
+                    transacao["descricao"],
+                    transacao["saldo_anterior"],
+                    transacao["saldo_posterior"],
+                    data_transacao.isoformat()
+                ))
+                transacao["id"] = cursor.lastrowid
+                conn.execute(
+                    SQL_ATUALIZAR_SALDO, (transacao["saldo_posterior"], transacao["conta_id"])
+                )
+                self._acumular_estatisticas(conn, transacao["conta_id"], [transacao])
+        
+        return debito, credito
+    
+    def criar_transacoes_lote(
+        self,
+        conta_id: int,
+        itens: List[ItemLote],
+        atomico: bool = True
+    ) -> List[Union[dict, str]]:
+        """Cria várias transações em uma única transação de escrita"""
+        with self._transacao() as conn:
+            data_transacao = datetime.now()
+            linha = conn.execute(SQL_SALDO_CONTA, (conta_id,)).fetchone()
+            if not linha:
+                raise ValueError("Conta não encontrada")
+            
+            calculados = calcular_lote(int(linha["saldo"]), itens, atomico)
+            resultados: List[Union[dict, str]] = []
+            criadas = []
+            for (tipo, valor, descricao), calculado in zip(itens, calculados):
+                if isinstance(calculado, str):
+                    resultados.append(calculado)
+                    continue
+                
+                saldo_anterior, saldo_posterior = calculado
+                cursor = conn.execute(SQL_INSERIR_TRANSACAO, (
+                    conta_id,
+                    tipo.value,
+                    valor,
+                    descricao,
+                    saldo_anterior,
+                    saldo_posterior,
+                    data_transacao.isoformat()
+                ))
+                transacao = {
+                    "id": cursor.lastrowid,
+                    "conta_id": conta_id,
+                    "tipo": tipo.value,
+                    "valor": valor,
+                    "descricao": descricao,
+                    "saldo_anterior": saldo_anterior,
+                    "saldo_posterior": saldo_posterior,
+                    "data_transacao": data_transacao
+                }
+                criadas.append(transacao)
+                resultados.append(transacao)
+            
+            if criadas:
+                conn.execute(SQL_ATUALIZAR_SALDO, (criadas[-1]["saldo_posterior"], conta_id))
+                self._acumular_estatisticas(conn, conta_id, criadas)
+        
+        return resultados
+    
+    @staticmethod
+    def _acumular_estatisticas(conn: sqlite3.Connection, conta_id: int, transacoes: List[dict]):
+        """Soma transações da conta aos agregados dentro da transação corrente"""
+        totais = novas_estatisticas()
+        periodos: Dict[str, dict] = {}
+        for transacao in transacoes:
+            periodo = periodos.setdefault(
+                periodo_da_data(transacao["data_transacao"]), novas_estatisticas()
+            )
+            acumular_estatisticas(totais, transacao)
+            acumular_estatisticas(periodo, transacao)
+        
+        conn.execute(SQL_ACUMULAR_ESTATISTICAS_CONTA, (
+            conta_id,
+            totais["total_depositos"],
+            totais["total_saques"],
+            totais["total_transferencias_recebidas"],
+            totais["total_transferencias_enviadas"],
+            totais["quantidade_transacoes"]
+        ))
+        for periodo, valores in periodos.items():
+            conn.execute(SQL_ACUMULAR_ESTATISTICAS_PERIODO, (
+                conta_id,
+                periodo,
+                valores["total_depositos"],
+                valores["total_saques"],
+                valores["total_transferencias_recebidas"],
+                valores["total_transferencias_enviadas"],
+                valores["quantidade_transacoes"]
+            ))
+    
+    def obter_transacoes_por_conta(self, conta_id: int) -> List[dict]:
+        """Obtém todas as transações de uma conta"""
+        with self._lock:
+            linhas = self._conn.execute(SQL_TRANSACOES_POR_CONTA, (conta_id,)).fetchall()
+        return [self._transacao_para_dict(linha) for linha in linhas]
+    
+    def obter_transacoes_paginadas(
+        self,
+        conta_id: int,
+        after_id: Optional[int] = None,
+        limit: int = 50,
+        desde: Optional[datetime] = None,
+        ate: Optional[datetime] = None,
+        decrescente: bool = False
+    ) -> List[dict]:
+        """Obtém uma página de transações pelo índice (conta_id, id)"""
+        filtros = ["conta_id = ?"]
+        parametros: list = [conta_id]
+        if after_id is not None:
+            filtros.append("id < ?" if decrescente else "id > ?")
+            parametros.append(after_id)
+        if desde is not None:
+            filtros.append("data_transacao >= ?")
+            parametros.append(desde.isoformat())
+        if ate is not None:
+            filtros.append("data_transacao <= ?")
+            parametros.append(ate.isoformat())
+        parametros.append(limit)
+        
+        sql = SQL_PAGINA_TRANSACOES.format(
+            filtros=" AND ".join(filtros),
+            ordem="DESC" if decrescente else "ASC"
+        )
+        with self._lock:
+            linhas = self._conn.execute(sql, parametros).fetchall()
+        return [self._transacao_para_dict(linha) for linha in linhas]
+    
+    @staticmethod
+    def _estatisticas_da_linha(
+        total_depositos, total_saques, recebidas, enviadas, quantidade
+    ) -> dict:
+        return {
+            "total_depositos": int(total_depositos or 0),
+            "total_saques": int(total_saques or 0),
+            "total_transferencias_recebidas": int(recebidas or 0),
+            "total_transferencias_enviadas": int(enviadas or 0),
+            "quantidade_transacoes": quantidade or 0
+        }
+    
+    def obter_estatisticas_conta(self, conta_id: int) -> dict:
+        """Obtém os agregados mantidos incrementalmente de uma conta"""
+        linha = self._consultar_um(SQL_ESTATISTICAS_CONTA, (conta_id,))
+        if not linha:
+            return novas_estatisticas()
+        return self._estatisticas_da_linha(*linha)
+    
+    def obter_estatisticas_por_periodo(self, conta_id: int) -> List[dict]:
+        """Obtém os agregados mensais de uma conta"""
+        with self._lock:
+            linhas = self._conn.execute(SQL_ESTATISTICAS_POR_PERIODO, (conta_id,)).fetchall()
+        return [
+            {"periodo": periodo, **self._estatisticas_da_linha(*valores)}
+            for periodo, *valores in linhas
+        ]
+    
+    def reconstruir_estatisticas(
+        self,
+        conta_id: Optional[int] = None,
+        corrigir: bool = True
+    ) -> List[dict]:
+        """Recalcula os agregados a partir das transações"""
+        filtro = (conta_id, conta_id)
+        with self._transacao() as conn:
+            calculadas: Dict[int, EstatisticasConta] = {}
+            for cid, periodo, *valores in conn.execute(SQL_RECALCULAR_ESTATISTICAS, filtro):
+                totais, periodos = calculadas.setdefault(cid, (novas_estatisticas(), {}))
+                if periodo is None:
+                    continue
+                periodos[periodo] = self._estatisticas_da_linha(*valores)
+                for campo, valor in periodos[periodo].items():
+                    totais[campo] += valor
+            
+            armazenadas: Dict[int, EstatisticasConta] = {}
+            for cid, *valores in conn.execute(SQL_ESTATISTICAS_ARMAZENADAS_CONTA, filtro):
+                armazenadas[cid] = (self._estatisticas_da_linha(*valores), {})
+            for cid, periodo, *valores in conn.execute(
+                SQL_ESTATISTICAS_ARMAZENADAS_PERIODO, filtro
+            ):
+                periodos = armazenadas.setdefault(cid, (novas_estatisticas(), {}))[1]
+                periodos[periodo] = self._estatisticas_da_linha(*valores)
+            
+            divergencias = comparar_estatisticas(armazenadas, calculadas)
+            if corrigir:
+                for divergencia in divergencias:
+                    self._gravar_estatisticas(
+                        conn, divergencia["conta_id"], calculadas[divergencia["conta_id"]]
+                    )
+        return divergencias
+    
+    @staticmethod
+    def _gravar_estatisticas(
+        conn: sqlite3.Connection,
+        conta_id: int,
+        estatisticas: EstatisticasConta
+    ):
+        """Substitui os agregados de uma conta"""
+        totais, periodos = estatisticas
+        conn.execute(SQL_REMOVER_ESTATISTICAS_CONTA, (conta_id,))
+        conn.execute(SQL_REMOVER_ESTATISTICAS_PERIODO, (conta_id,))
+        conn.execute(SQL_INSERIR_ESTATISTICAS_CONTA, (
+            conta_id,
+            totais["total_depositos"],
+            totais["total_saques"],
+            totais["total_transferencias_recebidas"],
+            totais["total_transferencias_enviadas"],
+            totais["quantidade_transacoes"]
+        ))
+        for periodo, valores in periodos.items():
+            conn.execute(SQL_INSERIR_ESTATISTICAS_PERIODO, (
+                conta_id,
+                periodo,
+                valores["total_depositos"],
+                valores["total_saques"],
+                valores["total_transferencias_recebidas"],
+                valores["total_transferencias_enviadas"],
+                valores["quantidade_transacoes"]
+            ))
+    
+    # Revogação de tokens
+    def gravar_revogacao(self, jti: str, exp: float):
+        """Grava a revogação do token, descartando as já expiradas"""
+        agora = time.time()
+        with self._transacao() as conn:
+            conn.execute(SQL_REMOVER_REVOGACOES_EXPIRADAS, (agora,))
+            conn.execute(SQL_GRAVAR_REVOGACAO, (jti, exp, agora))
+    
+    def listar_revogacoes(self, desde: float = 0.0) -> List[Tuple[str, float]]:
+        """Revogações ainda válidas gravadas a partir de `desde`"""
+        with self._lock:
+            linhas = self._conn.execute(SQL_LISTAR_REVOGACOES, (desde, time.time())).fetchall()
+        return [(linha["jti"], linha["exp"]) for linha in linhas]
+    
+    def fechar(self):
+        """Fecha a conexão com o banco e a thread das chamadas"""
+        self.executor.shutdown(wait=True)
+        with self._lock:
+            self._conn.close()
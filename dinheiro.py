@@ -0,0 +1,76 @@
+"""
+Valores monetários em centavos
+
+Saldos, valores de transação e totais circulam como `int` de centavos
+entre os modelos, os backends e os agregados. Reais só aparecem na borda:
+na leitura do corpo das requisições e na serialização das respostas.
+"""
+from decimal import Decimal, InvalidOperation, ROUND_HALF_EVEN
+from typing import Annotated
+from pydantic import BeforeValidator, PlainSerializer, WithJsonSchema
+
+
+CENTAVO = Decimal("0.01")
+
+# Com até 15 dígitos significativos, centavos / 100 em float volta
+# exatamente ao valor decimal na serialização JSON
+LIMITE_CENTAVOS = 10 ** 15
+
+
+def reais_para_centavos(valor) -> int:
+    """
+    Converte reais (número ou texto) para centavos
+    
+    Floats são lidos pela representação decimal mais curta (0.1 -> "0.1"),
+    então o valor digitado pelo cliente não sofre erro binário. Frações
+    de centavo são arredondadas ao centavo (meio para o par).
+    
+    Raises:
+        ValueError: Valor não numérico, infinito ou fora do limite
+    """
+    if isinstance(valor, bool):
+        raise ValueError("Valor monetário inválido")
+    if isinstance(valor, int):
+        centavos = valor * 100
+    else:
+        try:
+            decimal = Decimal(str(valor))
+            if not decimal.is_finite():
+                raise ValueError("Valor monetário inválido")
+            centavos = int(decimal.quantize(CENTAVO, rounding=ROUND_HALF_EVEN) * 100)
+        except InvalidOperation:
+            raise ValueError("Valor monetário inválido")
+    
+    if abs(centavos) >= LIMITE_CENTAVOS:
+        raise ValueError("Valor monetário fora do limite permitido")
+    return centavos
+
+
+def centavos_para_reais(centavos: int) -> float:
+    """Valor em reais para serialização JSON"""
+    return centavos / 100
+
+
+def formatar_reais(centavos: int) -> str:
+    """Texto decimal exato com duas casas (ex: 1050 -> "10.50")"""
+    sinal = "-" if centavos < 0 else ""
+    inteiro, fracao = divmod(abs(centavos), 100)
+    return f"{sinal}{inteiro}.{fracao:02d}"
+
+
+_ESQUEMA_REAIS = WithJsonSchema({"type": "number", "multipleOf": 0.01})
+
+# Valor recebido em reais e guardado em centavos
+Reais = Annotated[
+    int,
+    BeforeValidator(reais_para_centavos),
+    PlainSerializer(centavos_para_reais, return_type=float, when_used="json"),
+    _ESQUEMA_REAIS
+]
+
+# Valor já em centavos (vindo do armazenamento), exibido em reais no JSON
+Centavos = Annotated[
+    int,
+    PlainSerializer(centavos_para_reais, return_type=float, when_used="json"),
+    _ESQUEMA_REAIS
+]
@@ -0,0 +1,97 @@
+"""
+Exportação do extrato completo em streaming (NDJSON ou CSV)
+"""
+from typing import AsyncIterator, Callable, List
+from dinheiro import centavos_para_reais, formatar_reais
+from models import FormatoExportacao
+from repositorio import RepositorioBase, executar_no_backend
+import csv
+import io
+import orjson
+
+
+COLUNAS = [
+    "id",
+    "conta_id",
+    "tipo",
+    "valor",
+    "descricao",
+    "saldo_anterior",
+    "saldo_posterior",
+    "data_transacao"
+]
+
+TIPOS_CONTEUDO = {
+    FormatoExportacao.NDJSON: "application/x-ndjson",
+    FormatoExportacao.CSV: "text/csv",
+}
+
+
+def _linha(transacao: dict, reais: Callable[[int], object]) -> list:
+    """Valores de uma transação na ordem de COLUNAS, com centavos convertidos por `reais`"""
+    return [
+        transacao["id"],
+        transacao["conta_id"],
+        transacao["tipo"],
+        reais(transacao["valor"]),
+        transacao["descricao"],
+        reais(transacao["saldo_anterior"]),
+        reais(transacao["saldo_posterior"]),
+        transacao["data_transacao"].isoformat()
+    ]
+
+
+def _codificar_ndjson(transacoes: List[dict]) -> bytes:
+    """Uma transação JSON por linha"""
+    return b"".join(
+        orjson.dumps(dict(zip(COLUNAS, _linha(t, centavos_para_reais)))) + b"\n"
+        for t in transacoes
+    )
+
+
+def _codificar_csv(transacoes: List[dict]) -> bytes:
+    """Linhas CSV sem cabeçalho (valores com duas casas decimais)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerows(_linha(t, formatar_reais) for t in transacoes)
+    return buffer.getvalue().encode()
+
+
+async def gerar_exportacao(
+    repo: RepositorioBase,
+    conta_id: int,
+    formato: FormatoExportacao,
+    tamanho_lote: int = 1000
+) -> AsyncIterator[bytes]:
+    """
+    Gera o extrato completo de uma conta em blocos
+    
+    Percorre as transações por cursor, um lote por vez, de modo que a
+    memória usada é proporcional ao lote e não ao histórico da conta.
+    
+    Args:
+        repo: Backend de armazenamento
+        conta_id: ID da conta
+        formato: NDJSON ou CSV
+        tamanho_lote: Transações lidas e codificadas por bloco
+    
+    Yields:
+        bytes: Bloco codificado de transações
+    """
+    if formato == FormatoExportacao.CSV:
+        codificar = _codificar_csv
+        yield (",".join(COLUNAS) + "\n").encode()
+    else:
+        codificar = _codificar_ndjson
+    
+    cursor = None
+    while True:
+        lote = await executar_no_backend(
+            repo.obter_transacoes_paginadas, conta_id, after_id=cursor, limit=tamanho_lote
+        )
+        if not lote:
+            break
+        yield codificar(lote)
+        if len(lote) < tamanho_lote:
+            break
+        cursor = lote[-1]["id"]
@@ -0,0 +1,167 @@
+"""
+Cache de resultados por chave de idempotência (header Idempotency-Key)
+"""
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+import sys
+import threading
+import time
+
+
+class ChaveIdempotenciaEmUso(Exception):
+    """Lançada quando outra requisição com a mesma chave ainda está em execução"""
+
+
+class ChaveIdempotenciaDivergente(Exception):
+    """Lançada quando a chave já foi usada com outro conteúdo de requisição"""
+
+
+# Entrada ainda sem resultado: a requisição original está em execução
+_PENDENTE = object()
+
+
+class CacheIdempotencia:
+    """
+    Resultados de operações indexados por (escopo, chave), com TTL e limite
+    
+    Cada entrada guarda uma impressão da requisição original (ex: tipo,
+    valor e descrição) para recusar a reutilização da chave com outro
+    conteúdo. A chave é reservada antes da execução, então uma repetição
+    concorrente é recusada em vez de executar a operação duas vezes.
+    
+    Como o TTL é o mesmo para todas as entradas, a ordem de inserção é a
+    ordem de expiração: as expiradas saem do início do OrderedDict, e as
+    mais antigas saem primeiro quando o limite de tamanho é atingido.
+    """
+    
+    def __init__(self, tamanho_maximo: int, ttl_segundos: int):
+        self.tamanho_maximo = tamanho_maximo
+        self.ttl_segundos = ttl_segundos
+        self._itens: "OrderedDict[Tuple[Hashable, str], list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        
+        # Métricas
+        self.acertos = 0
+        self.falhas = 0
+        self.conflitos = 0
+        self.expiradas = 0
+        self.descartadas = 0
+    
+    @property
+    def ativo(self) -> bool:
+        return self.tamanho_maximo > 0 and self.ttl_segundos > 0
+    
+    @staticmethod
+    def _tamanho(chave: tuple, resultado) -> int:
+        """Memória aproximada de uma entrada (chave e dict de resultado)"""
+        tamanho = sys.getsizeof(chave) + sum(sys.getsizeof(parte) for parte in chave)
+        if isinstance(resultado, dict):
+            tamanho += sys.getsizeof(resultado)
+            tamanho += sum(sys.getsizeof(valor) for valor in resultado.values())
+        return tamanho
+    
+    def _remover(self, chave: tuple):
+        """Remove uma entrada (chamado com o lock adquirido)"""
+        entrada = self._itens.pop(chave)
+        self._bytes -= entrada[3]
+    
+    def _expirar(self, agora: float):
+        """Descarta as entradas vencidas do início (chamado com o lock adquirido)"""
+        while self._itens:
+            chave, entrada = next(iter(self._itens.items()))
+            if entrada[2] > agora:
+                break
+            self._remover(chave)
+            self.expiradas += 1
+    
+    def reservar(self, escopo: Hashable, chave: str, impressao: tuple) -> Optional[dict]:
+        """
+        Reserva a chave para uma nova execução ou devolve o resultado guardado
+        
+        Args:
+            escopo: Dono da chave (ex: ID da conta)
+            chave: Valor do header Idempotency-Key
+            impressao: Campos que identificam o conteúdo da requisição
+        
+        Returns:
+            Optional[dict]: Resultado da execução original, ou None se a
+                chave foi reservada e a operação deve ser executada
+        
+        Raises:
+            ChaveIdempotenciaEmUso: A execução original ainda não terminou
+            ChaveIdempotenciaDivergente: A chave foi usada com outro conteúdo
+        """
+        if not self.ativo:
+            return None
+        
+        item = (escopo, chave)
+        agora = time.monotonic()
+        with self._lock:
+            self._expirar(agora)
+            entrada = self._itens.get(item)
+            if entrada is None:
+                self.falhas += 1
+                tamanho = self._tamanho(item, None)
+                self._itens[item] = [impressao, _PENDENTE, agora + self.ttl_segundos, tamanho]
+                self._bytes += tamanho
+                while len(self._itens) > self.tamanho_maximo:
+                    self._remover(next(iter(self._itens)))
+                    self.descartadas += 1
+                return None
+            
+            if entrada[0] != impressao:
+                self.conflitos += 1
+                raise ChaveIdempotenciaDivergente(
+                    "Idempotency-Key já utilizada com outra requisição"
+                )
+            if entrada[1] is _PENDENTE:
+                self.conflitos += 1
+                raise ChaveIdempotenciaEmUso(
+                    "Requisição com esta Idempotency-Key ainda em processamento"
+                )
+            self.acertos += 1
+            return entrada[1]
+    
+    def concluir(self, escopo: Hashable, chave: str, resultado: dict):
+        """Guarda o resultado de uma execução reservada"""
+        if not self.ativo:
+            return
+        
+        item = (escopo, chave)
+        with self._lock:
+            entrada = self._itens.get(item)
+            if entrada is None:
+                # Descartada pelo limite durante a execução
+                return
+            tamanho = self._tamanho(item, resultado)
+            self._bytes += tamanho - entrada[3]
+            entrada[1] = resultado
+            entrada[3] = tamanho
+    
+    def liberar(self, escopo: Hashable, chave: str):
+        """Desfaz uma reserva cuja execução falhou, permitindo nova tentativa"""
+        if not self.ativo:
+            return
+        
+        item = (escopo, chave)
+        with self._lock:
+            entrada = self._itens.get(item)
+            if entrada is not None and entrada[1] is _PENDENTE:
+                self._remover(item)
+    
+    def metricas(self) -> dict:
+        """Retorna contadores de uso e a memória aproximada do cache"""
+        consultas = self.acertos + self.falhas
+        return {
+            "tamanho": len(self._itens),
+            "tamanho_maximo": self.tamanho_maximo,
+            "ttl_segundos": self.ttl_segundos,
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "taxa_acerto": round(self.acertos / consultas, 4) if consultas else 0.0,
+            "conflitos": self.conflitos,
+            "expiradas": self.expiradas,
+            "descartadas": self.descartadas,
+            "bytes_aproximados": self._bytes
+        }
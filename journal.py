@@ -0,0 +1,294 @@
+"""
+Journal (write-ahead log) e snapshots do banco de dados em memória
+
+Cada mutação do DatabaseSimulator é anexada como uma linha JSON em um
+segmento do journal. Snapshots periódicos gravam o estado completo e
+permitem descartar os segmentos anteriores, de modo que a inicialização
+só precisa reaplicar a cauda do journal.
+"""
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+import json
+import os
+import threading
+import time
+
+
+# Modos de durabilidade
+DURABILIDADE_SEMPRE = "sempre"          # fsync a cada registro
+DURABILIDADE_INTERVALO = "intervalo"    # fsync em grupo a cada N ms
+DURABILIDADE_ASSINCRONO = "assincrono"  # apenas write(); o SO decide quando gravar
+MODOS_DURABILIDADE = (DURABILIDADE_SEMPRE, DURABILIDADE_INTERVALO, DURABILIDADE_ASSINCRONO)
+
+CAMPOS_DATA = ("data_criacao", "data_transacao")
+
+
+def _codificar(registro: dict) -> dict:
+    """Converte datas para ISO 8601 (inclusive em listas de registros, como lotes)"""
+    codificado = {}
+    for chave, valor in registro.items():
+        if isinstance(valor, datetime):
+            valor = valor.isoformat()
+        elif isinstance(valor, list):
+            valor = [_codificar(item) if isinstance(item, dict) else item for item in valor]
+        codificado[chave] = valor
+    return codificado
+
+
+def decodificar(registro: dict) -> dict:
+    """Restaura as datas de um registro lido do journal ou snapshot"""
+    for campo in CAMPOS_DATA:
+        if campo in registro:
+            registro[campo] = datetime.fromisoformat(registro[campo])
+    for valor in registro.values():
+        if isinstance(valor, list):
+            for item in valor:
+                if isinstance(item, dict):
+                    decodificar(item)
+    return registro
+
+
+class Journal:
+    """
+    Log append-only de mutações com snapshots
+    
+    Arquivos no diretório:
+        journal-NNNNNN.log   segmentos com uma mutação JSON por linha
+        snapshot-NNNNNN.json estado completo até o fim do segmento NNNNNN
+    
+    Durabilidade:
+        sempre      cada registro só retorna após fsync
+        intervalo   uma thread faz fsync de todos os registros pendentes a
+                    cada `intervalo_ms` (group commit); uma queda perde no
+                    máximo esse intervalo
+        assincrono  sem fsync explícito
+    """
+    
+    def __init__(
+        self,
+        diretorio: str,
+        durabilidade: str = DURABILIDADE_INTERVALO,
+        intervalo_ms: int = 10,
+        snapshot_a_cada: int = 100_000
+    ):
+        if durabilidade not in MODOS_DURABILIDADE:
+            raise ValueError(f"Modo de durabilidade inválido: {durabilidade}")
+        
+        self.diretorio = diretorio
+        self.durabilidade = durabilidade
+        self.intervalo = intervalo_ms / 1000
+        self.snapshot_a_cada = snapshot_a_cada
+        
+        self._lock = threading.Lock()
+        self._arquivo = None
+        self._segmento = 0
+        self._pendentes = 0
+        self._parar = threading.Event()
+        self._thread_fsync: Optional[threading.Thread] = None
+        self._snapshot_em_andamento = threading.Lock()
+        
+        # Métricas
+        self.registros = 0
+        self.registros_desde_snapshot = 0
+        self.fsyncs = 0
+        self.bytes_gravados = 0
+        self.snapshots = 0
+        self.duracao_ultimo_snapshot = 0.0
+        
+        os.makedirs(diretorio, exist_ok=True)
+    
+    def _caminho(self, prefixo: str, numero: int, extensao: str) -> str:
+        return os.path.join(self.diretorio, f"{prefixo}-{numero:06d}.{extensao}")
+    
+    def _listar(self, prefixo: str) -> List[int]:
+        """Números dos arquivos com o prefixo, em ordem crescente"""
+        numeros = []
+        for nome in os.listdir(self.diretorio):
+            if nome.startswith(prefixo + "-") and not nome.endswith(".tmp"):
+                numeros.append(int(nome[len(prefixo) + 1:].split(".")[0]))
+        return sorted(numeros)
+    
+    # Recuperação
+    def recuperar(self, aplicar: Callable[[str, dict], None]) -> int:
+        """
+        Reconstrói o estado a partir do último snapshot e da cauda do journal
+        
+        Args:
+            aplicar: Função que aplica um registro (operação, dados) ao banco
+        
+        Returns:
+            int: Quantidade de registros reaplicados do journal
+        """
+        ultimo_snapshot = 0
+        snapshots = self._listar("snapshot")
+        if snapshots:
+            ultimo_snapshot = snapshots[-1]
+            with open(self._caminho("snapshot", ultimo_snapshot, "json")) as arquivo:
+                estado = json.load(arquivo)
+            for operacao, registros in estado["registros"]:
+                for registro in registros:
+                    aplicar(operacao, decodificar(registro))
+        
+        reaplicados = 0
+        for segmento in self._listar("journal"):
+            if segmento <= ultimo_snapshot:
+                continue
+            with open(self._caminho("journal", segmento, "log")) as arquivo:
+                for linha in arquivo:
+                    try:
+                        entrada = json.loads(linha)
+                    except json.JSONDecodeError:
+                        # Linha parcial de uma gravação interrompida
+                        break
+                    aplicar(entrada["op"], decodificar(entrada["dados"]))
+                    reaplicados += 1
+        
+        self._segmento = max([ultimo_snapshot] + self._listar("journal"))
+        self.registros_desde_snapshot = reaplicados
+        return reaplicados
+    
+    # Escrita
+    def abrir(self):
+        """Inicia um novo segmento e, no modo intervalo, a thread de fsync"""
+        self._abrir_segmento()
+        if self.durabilidade == DURABILIDADE_INTERVALO:
+            self._thread_fsync = threading.Thread(
+                target=self._fsync_periodico, name="journal-fsync", daemon=True
+            )
+            self._thread_fsync.start()
+    
+    def _abrir_segmento(self):
+        self._segmento += 1
+        self._arquivo = open(
+            self._caminho("journal", self._segmento, "log"), "a", encoding="utf-8"
+        )
+    
+    def _sincronizar(self):
+        """Grava o buffer e faz fsync (chamado com o lock adquirido)"""
+        self._arquivo.flush()
+        os.fsync(self._arquivo.fileno())
+        self._pendentes = 0
+        self.fsyncs += 1
+    
+    def _fsync_periodico(self):
+        while not self._parar.wait(self.intervalo):
+            with self._lock:
+                if self._pendentes and self._arquivo is not None:
+                    self._sincronizar()
+    
+    def registrar(self, operacao: str, dados: dict):
+        """Anexa uma mutação ao journal conforme o modo de durabilidade"""
+        linha = json.dumps({"op": operacao, "dados": _codificar(dados)}) + "\n"
+        with self._lock:
+            self._arquivo.write(linha)
+            self._pendentes += 1
+            self.registros += 1
+            self.registros_desde_snapshot += 1
+            self.bytes_gravados += len(linha)
+            if self.durabilidade == DURABILIDADE_SEMPRE:
+                self._sincronizar()
+            elif self.durabilidade == DURABILIDADE_ASSINCRONO:
+                self._arquivo.flush()
+    
+    def rotacionar(self) -> int:
+        """
+        Fecha o segmento atual e abre o próximo
+        
+        Deve ser chamado com as escritas do banco pausadas, para que o
+        snapshot corresponda exatamente ao fim do segmento fechado.
+        
+        Returns:
+            int: Número do segmento fechado
+        """
+        with self._lock:
+            self._sincronizar()
+            self._arquivo.close()
+            fechado = self._segmento
+            self._abrir_segmento()
+            self.registros_desde_snapshot = 0
+        return fechado
+    
+    # Snapshots
+    def reservar_snapshot(self) -> bool:
+        """Reserva um snapshot se o limite de registros foi atingido"""
+        if self.snapshot_a_cada <= 0 or self.registros_desde_snapshot < self.snapshot_a_cada:
+            return False
+        return self._snapshot_em_andamento.acquire(blocking=False)
+    
+    def gravar_snapshot(
+        self,
+        capturar: Callable[[], Tuple[int, List[Tuple[str, List[dict]]]]],
+        reservado: bool = False
+    ):
+        """
+        Grava um snapshot e remove os arquivos que ele torna obsoletos
+        
+        Args:
+            capturar: Função que pausa as escritas, rotaciona o journal e
+                devolve (segmento fechado, [(operação, registros), ...])
+            reservado: Se o snapshot já foi reservado com reservar_snapshot()
+        """
+        if not reservado and not self._snapshot_em_andamento.acquire(blocking=False):
+            return
+        try:
+            inicio = time.perf_counter()
+            segmento, registros = capturar()
+            
+            caminho = self._caminho("snapshot", segmento, "json")
+            with open(caminho + ".tmp", "w", encoding="utf-8") as arquivo:
+                json.dump({
+                    "segmento": segmento,
+                    "registros": [
+                        (operacao, [_codificar(r) for r in lista])
+                        for operacao, lista in registros
+                    ]
+                }, arquivo)
+                arquivo.flush()
+                os.fsync(arquivo.fileno())
+            os.replace(caminho + ".tmp", caminho)
+            self._sincronizar_diretorio()
+            
+            for antigo in self._listar("snapshot"):
+                if antigo < segmento:
+                    os.remove(self._caminho("snapshot", antigo, "json"))
+            for antigo in self._listar("journal"):
+                if antigo <= segmento:
+                    os.remove(self._caminho("journal", antigo, "log"))
+            
+            self.snapshots += 1
+            self.duracao_ultimo_snapshot = time.perf_counter() - inicio
+        finally:
+            self._snapshot_em_andamento.release()
+    
+    def _sincronizar_diretorio(self):
+        """Garante que a renomeação do snapshot chegou ao disco"""
+        if hasattr(os, "O_DIRECTORY"):
+            fd = os.open(self.diretorio, os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+    
+    def fechar(self):
+        """Aguarda o snapshot em andamento, para a thread de fsync e grava o que estiver pendente"""
+        with self._snapshot_em_andamento:
+            self._parar.set()
+            if self._thread_fsync is not None:
+                self._thread_fsync.join()
+            with self._lock:
+                if self._arquivo is not None:
+                    self._sincronizar()
+                    self._arquivo.close()
+                    self._arquivo = None
+    
+    def metricas(self) -> dict:
+        return {
+            "durabilidade": self.durabilidade,
+            "segmento": self._segmento,
+            "registros": self.registros,
+            "registros_desde_snapshot": self.registros_desde_snapshot,
+            "fsyncs": self.fsyncs,
+            "bytes_gravados": self.bytes_gravados,
+            "snapshots": self.snapshots,
+            "duracao_ultimo_snapshot_ms": round(self.duracao_ultimo_snapshot * 1000, 3)
+        }
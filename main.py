@@ -2,22 +2,39 @@
 API Bancária com FastAPI
 Gerenciamento de contas e transações bancárias com autenticação JWT
 """
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from typing import List
-from datetime import timedelta
+from functools import partial
+from typing import List, Optional
+from datetime import datetime, timedelta
+import asyncio
 
 from models import (
     Usuario, UsuarioCreate,
-    Conta, ContaCreate,
-    Transacao, TransacaoCreate,
-    Extrato, Token, TipoTransacao
+    Conta, ContaCreate, ContaPublica,
+    Transacao, TransacaoCreate, TransferenciaCreate, LoteTransacoesCreate, ResultadoLote,
+    Extrato, Token, TipoTransacao, OrdemExtrato, EstatisticaPeriodo,
+    FormatoExportacao
 )
 from auth import (
-    verificar_senha, obter_hash_senha, criar_token_acesso,
-    obter_usuario_atual
+    verificar_senha_async, obter_hash_senha_async, criar_token_acesso,
+    obter_usuario_atual, servico_hash, cache_tokens, oauth2_scheme, identificar_token,
+    revogar_token, revogacoes
 )
 from database import db
+from idempotencia import ChaveIdempotenciaDivergente, ChaveIdempotenciaEmUso
+from exportacao import gerar_exportacao, TIPOS_CONTEUDO
+from respostas import (
+    RespostaJSON, usuario_json, conta_json, conta_publica_json, transacao_json, transacoes_json,
+    totais_json
+)
+from repositorio import ArmazenamentoOcupado, ContaResolvida, aguardar
+from metricas import MiddlewareMetricas, TIPO_CONTEUDO, chamar_backend, registro
+from rastreamento import SinkMemoria, rastreador
+from revogacao import sincronizar_revogacoes
+from dinheiro import centavos_para_reais
+from numeracao import validar_numero_conta
 from config import settings
 
 # Inicialização da aplicação FastAPI
@@ -25,6 +42,7 @@ app = FastAPI(
     title=settings.API_TITLE,
     description=settings.API_DESCRIPTION,
     version=settings.API_VERSION,
+    default_response_class=RespostaJSON,
     contact={
         "name": "Rychardsson",
         "url": "https://github.com/Rychardsson/API-Bancaria-FastAPI",
@@ -34,6 +52,45 @@ app = FastAPI(
     },
 )
 
+if settings.METRICAS_HABILITADAS:
+    app.add_middleware(MiddlewareMetricas, registro=registro)
+
+
+@app.exception_handler(ArmazenamentoOcupado)
+async def responder_armazenamento_ocupado(request: Request, erro: ArmazenamentoOcupado):
+    """Banco travado por outra escrita além do tempo de espera: 503, para nova tentativa"""
+    return RespostaJSON(
+        {"detail": str(erro)},
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": "1"}
+    )
+
+
+# ==================== DEPENDÊNCIAS ====================
+
+async def obter_conta_atual(cpf_atual: str = Depends(obter_usuario_atual)) -> ContaResolvida:
+    """
+    Resolve o usuário autenticado para os IDs do usuário e da conta
+    
+    Usa uma única consulta ao backend, ou nenhuma quando a resolução do
+    CPF já está em cache, em vez de buscar o usuário e depois a conta.
+    
+    Raises:
+        HTTPException: 404 se o usuário ou a conta não existirem
+    """
+    resolucao = await chamar_backend(db.resolver_conta, cpf_atual)
+    if resolucao is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Usuário não encontrado"
+        )
+    if resolucao.conta_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Conta não encontrada. Crie uma conta primeiro."
+        )
+    return resolucao
+
 
 # ==================== ENDPOINTS DE USUÁRIO ====================
 
@@ -54,17 +111,14 @@ async def criar_usuario(usuario: UsuarioCreate):
     - **senha**: Senha do usuário (mínimo 6 caracteres)
     """
     try:
-        senha_hash = obter_hash_senha(usuario.senha)
-        usuario_criado = db.criar_usuario(
+        senha_hash = await obter_hash_senha_async(usuario.senha)
+        usuario_criado = await chamar_backend(
+            db.criar_usuario,
             nome=usuario.nome,
             cpf=usuario.cpf,
             senha_hash=senha_hash
         )
-        return Usuario(
-            id=usuario_criado["id"],
-            nome=usuario_criado["nome"],
-            cpf=usuario_criado["cpf"]
-        )
+        return RespostaJSON(usuario_json(usuario_criado), status_code=status.HTTP_201_CREATED)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -91,9 +145,11 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     Retorna um token de acesso que deve ser usado no header Authorization
     como "Bearer {token}" para endpoints protegidos.
     """
-    usuario = db.obter_usuario_por_cpf(form_data.username)
+    usuario = await chamar_backend(db.obter_usuario_por_cpf, form_data.username)
     
-    if not usuario or not verificar_senha(form_data.password, usuario["senha_hash"]):
+    if not usuario or not await verificar_senha_async(
+        form_data.password, usuario["senha_hash"]
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="CPF ou senha incorretos",
@@ -109,6 +165,36 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     return Token(access_token=access_token, token_type="bearer")
 
 
+@app.post(
+    "/logout/",
+    status_code=status.HTTP_204_NO_CONTENT,
+    tags=["Autenticação"],
+    summary="Fazer logout",
+    description="Revoga o token JWT usado na requisição"
+)
+async def logout(
+    token: str = Depends(oauth2_scheme),
+    cpf_atual: str = Depends(obter_usuario_atual)
+):
+    """
+    Revoga o token do header Authorization até a sua expiração.
+    
+    Requisições seguintes com o mesmo token recebem 401; um novo login
+    emite outro token. A revogação é gravada no backend, então vale para
+    os demais workers (após a próxima sincronização) e após reinícios.
+    """
+    identificacao = identificar_token(token)
+    if identificacao is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Token sem identificador (jti) não pode ser revogado"
+        )
+    jti, exp = identificacao
+    await chamar_backend(db.gravar_revogacao, jti, exp)
+    revogar_token(token, jti, exp)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
 # ==================== ENDPOINTS DE CONTA ====================
 
 @app.post(
@@ -130,19 +216,21 @@ async def criar_conta(
     
     Cada usuário pode ter apenas uma conta.
     """
-    usuario = db.obter_usuario_por_cpf(cpf_atual)
-    if not usuario:
+    resolucao = await chamar_backend(db.resolver_conta, cpf_atual)
+    if resolucao is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Usuário não encontrado"
         )
     
     try:
-        conta_criada = db.criar_conta(
-            usuario_id=usuario["id"],
+        conta_criada = await chamar_backend(
+            db.criar_conta_resolvida,
+            cpf_atual,
+            usuario_id=resolucao.usuario_id,
             tipo_conta=conta.tipo_conta
         )
-        return Conta(**conta_criada)
+        return RespostaJSON(conta_json(conta_criada), status_code=status.HTTP_201_CREATED)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -157,7 +245,7 @@ async def criar_conta(
     summary="Obter dados da conta",
     description="Retorna os dados da conta do usuário autenticado"
 )
-async def obter_minha_conta(cpf_atual: str = Depends(obter_usuario_atual)):
+async def obter_minha_conta(conta_atual: ContaResolvida = Depends(obter_conta_atual)):
     """
     Retorna os dados da conta do usuário autenticado, incluindo:
     
@@ -166,25 +254,95 @@ async def obter_minha_conta(cpf_atual: str = Depends(obter_usuario_atual)):
     - Tipo de conta
     - Data de criação
     """
-    usuario = db.obter_usuario_por_cpf(cpf_atual)
-    if not usuario:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Usuário não encontrado"
-        )
+    conta = await chamar_backend(db.obter_conta_por_id, conta_atual.conta_id)
     
-    conta = db.obter_conta_por_usuario(usuario["id"])
-    if not conta:
+    return RespostaJSON(conta_json(conta))
+
+
+@app.get(
+    "/contas/numero/{numero_conta}",
+    response_model=ContaPublica,
+    tags=["Contas"],
+    summary="Buscar conta pelo número",
+    description="Retorna a identificação e o titular de uma conta a partir do número"
+)
+async def buscar_conta_por_numero(
+    numero_conta: str,
+    cpf_atual: str = Depends(obter_usuario_atual)
+):
+    """
+    Busca uma conta pelo número no formato agência-sequencial-dígito
+    (ex: 0001-000123-9), por exemplo para conferir o destino de uma
+    transferência:
+    
+    - Retorna o ID (usado em `conta_destino_id`), o número, o tipo e o
+      nome do titular; saldo e CPF não são expostos
+    - Números com dígito verificador inválido são recusados com 422
+    """
+    conta = await chamar_backend(db.obter_conta_por_numero, numero_conta)
+    if conta is None:
+        # Números emitidos antes do dígito módulo 11 ainda são encontrados acima
+        if not validar_numero_conta(numero_conta):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Número de conta inválido: formato ou dígito verificador não confere"
+            )
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Conta não encontrada. Crie uma conta primeiro."
+            detail="Conta não encontrada"
         )
     
-    return Conta(**conta)
+    titular = await chamar_backend(db.obter_usuario_por_id, conta["usuario_id"])
+    return RespostaJSON(conta_publica_json(conta, titular))
 
 
 # ==================== ENDPOINTS DE TRANSAÇÕES ====================
 
+CABECALHO_IDEMPOTENCIA = Header(
+    None,
+    alias="Idempotency-Key",
+    max_length=255,
+    description="Chave única da operação; repetições devolvem a transação original"
+)
+
+
+async def _criar_transacao(
+    conta_id: int,
+    tipo: TipoTransacao,
+    transacao: TransacaoCreate,
+    idempotency_key: Optional[str]
+) -> dict:
+    """Cria um depósito ou saque, respeitando a chave de idempotência se houver"""
+    try:
+        if idempotency_key:
+            return await chamar_backend(
+                db.criar_transacao_idempotente,
+                conta_id, tipo, transacao.valor, transacao.descricao, idempotency_key
+            )
+        return await chamar_backend(
+            db.criar_transacao,
+            conta_id=conta_id,
+            tipo=tipo,
+            valor=transacao.valor,
+            descricao=transacao.descricao
+        )
+    except ChaveIdempotenciaEmUso as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    except ChaveIdempotenciaDivergente as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
 @app.post(
     "/transacoes/deposito",
     response_model=Transacao,
@@ -195,43 +353,23 @@ async def obter_minha_conta(cpf_atual: str = Depends(obter_usuario_atual)):
 )
 async def realizar_deposito(
     transacao: TransacaoCreate,
-    cpf_atual: str = Depends(obter_usuario_atual)
+    conta_atual: ContaResolvida = Depends(obter_conta_atual),
+    idempotency_key: Optional[str] = CABECALHO_IDEMPOTENCIA
 ):
     """
     Realiza um depósito na conta do usuário autenticado:
     
     - **valor**: Valor do depósito (deve ser positivo)
     - **descricao**: Descrição opcional da transação
+    - **Idempotency-Key** (header opcional): repetições com a mesma chave
+      devolvem o depósito original em vez de criar outro
     
     O valor não pode ser negativo ou zero.
     """
-    usuario = db.obter_usuario_por_cpf(cpf_atual)
-    if not usuario:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Usuário não encontrado"
-        )
-    
-    conta = db.obter_conta_por_usuario(usuario["id"])
-    if not conta:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Conta não encontrada. Crie uma conta primeiro."
-        )
-    
-    try:
-        transacao_criada = db.criar_transacao(
-            conta_id=conta["id"],
-            tipo=TipoTransacao.DEPOSITO,
-            valor=transacao.valor,
-            descricao=transacao.descricao
-        )
-        return Transacao(**transacao_criada)
-    except ValueError as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e)
-        )
+    transacao_criada = await _criar_transacao(
+        conta_atual.conta_id, TipoTransacao.DEPOSITO, transacao, idempotency_key
+    )
+    return RespostaJSON(transacao_json(transacao_criada), status_code=status.HTTP_201_CREATED)
 
 
 @app.post(
@@ -244,45 +382,136 @@ async def realizar_deposito(
 )
 async def realizar_saque(
     transacao: TransacaoCreate,
-    cpf_atual: str = Depends(obter_usuario_atual)
+    conta_atual: ContaResolvida = Depends(obter_conta_atual),
+    idempotency_key: Optional[str] = CABECALHO_IDEMPOTENCIA
 ):
     """
     Realiza um saque da conta do usuário autenticado:
     
     - **valor**: Valor do saque (deve ser positivo)
     - **descricao**: Descrição opcional da transação
+    - **Idempotency-Key** (header opcional): repetições com a mesma chave
+      devolvem o saque original em vez de criar outro
     
     Validações aplicadas:
     - O valor não pode ser negativo ou zero
     - O saldo da conta deve ser suficiente para o saque
     """
-    usuario = db.obter_usuario_por_cpf(cpf_atual)
-    if not usuario:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Usuário não encontrado"
-        )
+    transacao_criada = await _criar_transacao(
+        conta_atual.conta_id, TipoTransacao.SAQUE, transacao, idempotency_key
+    )
+    return RespostaJSON(transacao_json(transacao_criada), status_code=status.HTTP_201_CREATED)
+
+
+@app.post(
+    "/transacoes/transferencia",
+    response_model=Transacao,
+    status_code=status.HTTP_201_CREATED,
+    tags=["Transações"],
+    summary="Realizar transferência",
+    description="Transfere um valor da conta do usuário autenticado para outra conta"
+)
+async def realizar_transferencia(
+    transferencia: TransferenciaCreate,
+    conta_atual: ContaResolvida = Depends(obter_conta_atual)
+):
+    """
+    Transfere um valor para outra conta:
     
-    conta = db.obter_conta_por_usuario(usuario["id"])
-    if not conta:
+    - **conta_destino_id**: ID da conta que recebe o valor
+    - **valor**: Valor da transferência (deve ser positivo)
+    - **descricao**: Descrição opcional, registrada nas duas contas
+    
+    O débito e o crédito são aplicados juntos ou nenhum é. A resposta é a
+    transação de débito na conta de origem.
+    """
+    try:
+        debito, _ = await chamar_backend(
+            db.criar_transferencia,
+            conta_origem_id=conta_atual.conta_id,
+            conta_destino_id=transferencia.conta_destino_id,
+            valor=transferencia.valor,
+            descricao=transferencia.descricao
+        )
+        return RespostaJSON(transacao_json(debito), status_code=status.HTTP_201_CREATED)
+    except ValueError as e:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Conta não encontrada. Crie uma conta primeiro."
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
         )
+
+
+@app.post(
+    "/transacoes/lote",
+    response_model=ResultadoLote,
+    tags=["Transações"],
+    summary="Enviar lote de transações",
+    description="Aplica vários depósitos e saques na conta do usuário autenticado"
+)
+async def realizar_lote(
+    lote: LoteTransacoesCreate,
+    conta_atual: ContaResolvida = Depends(obter_conta_atual)
+):
+    """
+    Aplica uma lista de depósitos e saques, na ordem enviada:
     
+    - **transacoes**: Itens com **tipo** (deposito ou saque), **valor** e **descricao**
+    - **atomico**: Se verdadeiro (padrão), qualquer item recusado cancela o
+      lote inteiro (400); se falso, cada item recebe seu próprio resultado
+    
+    A autenticação, a busca da conta e a trava da conta acontecem uma vez
+    por lote, e não uma vez por transação.
+    """
     try:
-        transacao_criada = db.criar_transacao(
-            conta_id=conta["id"],
-            tipo=TipoTransacao.SAQUE,
-            valor=transacao.valor,
-            descricao=transacao.descricao
+        resultados = await chamar_backend(
+            db.criar_transacoes_lote,
+            conta_atual.conta_id,
+            [(item.tipo, item.valor, item.descricao) for item in lote.transacoes],
+            atomico=lote.atomico
         )
-        return Transacao(**transacao_criada)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    
+    itens = []
+    for indice, resultado in enumerate(resultados):
+        if isinstance(resultado, str):
+            itens.append({"indice": indice, "sucesso": False, "transacao": None, "erro": resultado})
+        else:
+            itens.append({
+                "indice": indice, "sucesso": True,
+                "transacao": transacao_json(resultado), "erro": None
+            })
+    
+    aplicadas = [r for r in resultados if not isinstance(r, str)]
+    if aplicadas:
+        saldo = aplicadas[-1]["saldo_posterior"]
+    else:
+        conta = await chamar_backend(db.obter_conta_por_id, conta_atual.conta_id)
+        saldo = conta["saldo"]
+    
+    return RespostaJSON({
+        "atomico": lote.atomico,
+        "aplicadas": len(aplicadas),
+        "rejeitadas": len(resultados) - len(aplicadas),
+        "saldo": centavos_para_reais(saldo),
+        "resultados": itens
+    })
+
+
+def _para_hora_local(data: Optional[datetime]) -> Optional[datetime]:
+    """
+    Converte um filtro de data com fuso para a hora local sem fuso
+    
+    As datas das transações são gravadas como hora local sem fuso; datas
+    com fuso (ex: `2020-01-01T00:00:00Z`) não podem ser comparadas com
+    elas diretamente.
+    """
+    if data is None or data.tzinfo is None:
+        return data
+    return data.astimezone().replace(tzinfo=None)
 
 
 @app.get(
@@ -290,42 +519,227 @@ async def realizar_saque(
     response_model=Extrato,
     tags=["Transações"],
     summary="Obter extrato",
-    description="Retorna o extrato completo da conta do usuário autenticado"
+    description="Retorna o extrato paginado da conta do usuário autenticado"
 )
-async def obter_extrato(cpf_atual: str = Depends(obter_usuario_atual)):
+async def obter_extrato(
+    after_id: Optional[int] = Query(
+        None, description="Cursor: ID da última transação da página anterior"
+    ),
+    limit: int = Query(
+        settings.EXTRATO_LIMITE_PADRAO,
+        ge=1,
+        le=settings.EXTRATO_LIMITE_MAXIMO,
+        description="Quantidade máxima de transações na página"
+    ),
+    desde: Optional[datetime] = Query(
+        None, description="Data/hora inicial (inclusiva); sem fuso, hora local do servidor"
+    ),
+    ate: Optional[datetime] = Query(
+        None, description="Data/hora final (inclusiva); sem fuso, hora local do servidor"
+    ),
+    ordem: OrdemExtrato = Query(OrdemExtrato.CRESCENTE, description="Ordem das transações"),
+    conta_atual: ContaResolvida = Depends(obter_conta_atual)
+):
     """
-    Retorna o extrato completo da conta do usuário autenticado:
+    Retorna o extrato da conta do usuário autenticado:
     
-    - Lista de todas as transações (depósitos e saques)
+    - Página de transações (depósitos e saques)
     - Dados da conta (saldo, número, etc)
-    - Estatísticas (total de depósitos, saques e quantidade de transações)
+    - Estatísticas (total de depósitos, saques, transferências recebidas e
+      enviadas e quantidade de transações)
     
-    As transações são retornadas em ordem cronológica.
+    As transações são retornadas em ordem cronológica (ou da mais recente
+    para a mais antiga com `ordem=desc`). Para a próxima página, envie o
+    `proximo_cursor` da resposta como `after_id`.
     """
-    usuario = db.obter_usuario_por_cpf(cpf_atual)
-    if not usuario:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Usuário não encontrado"
-        )
+    conta = await chamar_backend(db.obter_conta_por_id, conta_atual.conta_id)
+    
+    # Busca um item a mais para saber se existe próxima página
+    transacoes = await chamar_backend(
+        db.obter_transacoes_paginadas,
+        conta_atual.conta_id,
+        after_id=after_id,
+        limit=limit + 1,
+        desde=_para_hora_local(desde),
+        ate=_para_hora_local(ate),
+        decrescente=ordem == OrdemExtrato.DECRESCENTE
+    )
+    proximo_cursor = None
+    if len(transacoes) > limit:
+        transacoes = transacoes[:limit]
+        proximo_cursor = transacoes[-1]["id"]
+    
+    estatisticas = await chamar_backend(db.obter_estatisticas_conta, conta_atual.conta_id)
+    
+    # Montado direto dos registros: sem um modelo Pydantic por transação
+    return RespostaJSON({
+        "conta": conta_json(conta),
+        "transacoes": transacoes_json(transacoes),
+        **totais_json(estatisticas),
+        "proximo_cursor": proximo_cursor
+    })
+
+
+@app.get(
+    "/transacoes/extrato/exportar",
+    tags=["Transações"],
+    summary="Exportar extrato completo",
+    description="Exporta todo o histórico da conta em NDJSON ou CSV via streaming",
+    response_class=StreamingResponse
+)
+async def exportar_extrato(
+    formato: FormatoExportacao = Query(
+        FormatoExportacao.NDJSON, description="Formato do arquivo (ndjson ou csv)"
+    ),
+    conta_atual: ContaResolvida = Depends(obter_conta_atual)
+):
+    """
+    Exporta o histórico completo de transações do usuário autenticado:
+    
+    - **ndjson**: Uma transação JSON por linha
+    - **csv**: Cabeçalho seguido de uma transação por linha
+    
+    As transações são lidas e enviadas em lotes, sem montar o extrato
+    inteiro em memória, o que permite exportar contas com milhões de
+    transações.
+    """
+    conta = await chamar_backend(db.obter_conta_por_id, conta_atual.conta_id)
     
-    conta = db.obter_conta_por_usuario(usuario["id"])
-    if not conta:
+    nome_arquivo = f"extrato_{conta['numero_conta']}.{formato.value}"
+    return StreamingResponse(
+        gerar_exportacao(
+            db, conta_atual.conta_id, formato, tamanho_lote=settings.EXPORTACAO_TAMANHO_LOTE
+        ),
+        media_type=TIPOS_CONTEUDO[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nome_arquivo}"'}
+    )
+
+
+@app.get(
+    "/transacoes/estatisticas",
+    response_model=List[EstatisticaPeriodo],
+    tags=["Transações"],
+    summary="Obter estatísticas mensais",
+    description="Retorna os totais por mês da conta do usuário autenticado"
+)
+async def obter_estatisticas_mensais(conta_atual: ContaResolvida = Depends(obter_conta_atual)):
+    """
+    Retorna, para cada mês com movimentação:
+    
+    - Total de depósitos
+    - Total de saques
+    - Totais de transferências recebidas e enviadas
+    - Quantidade de transações
+    
+    Depósitos + transferências recebidas - saques - transferências enviadas
+    é a variação do saldo no mês.
+    
+    Os agregados são mantidos a cada transação, então o custo não depende
+    do tamanho do histórico.
+    """
+    periodos = await chamar_backend(db.obter_estatisticas_por_periodo, conta_atual.conta_id)
+    return RespostaJSON([{"periodo": p["periodo"], **totais_json(p)} for p in periodos])
+
+
+# ==================== ENDPOINTS DE SISTEMA ====================
+
+@app.get(
+    "/sistema/metricas",
+    tags=["Sistema"],
+    summary="Métricas internas",
+    description="Retorna métricas de utilização dos componentes internos"
+)
+async def obter_metricas():
+    """
+    Retorna métricas internas da aplicação:
+    
+    - **hash_senhas**: Utilização do pool de hashing bcrypt
+    - **cache_tokens**: Acertos e falhas do cache de tokens JWT
+    - **revogacao_tokens**: Tokens revogados e eficácia do filtro de Bloom
+    - **armazenamento**: Métricas do backend (ex: contenção de locks por conta)
+    """
+    return {
+        "hash_senhas": servico_hash.metricas(),
+        "cache_tokens": cache_tokens.metricas(),
+        "revogacao_tokens": revogacoes.metricas(),
+        "armazenamento": db.metricas()
+    }
+
+
+@app.get(
+    "/sistema/rastreamento",
+    tags=["Sistema"],
+    summary="Spans recentes do armazenamento",
+    description="Retorna os spans das operações do banco em memória guardados no buffer"
+)
+async def obter_rastreamento(limite: int = Query(100, ge=1, le=10_000)):
+    """
+    Retorna o rastreamento das operações do banco em memória:
+    
+    - **resumo**: Quantidade, duração total, média e máxima e linhas por operação
+    - **spans**: Os `limite` spans mais recentes (duração em nanossegundos)
+    
+    Disponível com `RASTREAMENTO_SINK=memoria`.
+    """
+    if not isinstance(rastreador.sink, SinkMemoria):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Conta não encontrada. Crie uma conta primeiro."
+            detail="Rastreamento em memória desativado"
         )
+    return {
+        "resumo": rastreador.sink.resumo(),
+        "spans": [span._asdict() for span in rastreador.sink.recentes(limite)]
+    }
+
+
+@app.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    tags=["Sistema"],
+    summary="Métricas Prometheus",
+    description="Contagens, latências por rota e durações internas no formato do Prometheus"
+)
+async def exportar_metricas():
+    """
+    Exporta as métricas no formato de texto do Prometheus:
+    
+    - **http_requisicoes_total**: Requisições por método, rota e status
+    - **http_requisicao_duracao_segundos**: Histograma de latência por rota
+    - **http_requisicoes_em_andamento**: Requisições em processamento por rota
+    - **operacao_duracao_segundos**: bcrypt, decodificação de JWT e serialização
+    - **backend_chamada_duracao_segundos**: Chamadas ao backend por método
+    """
+    return PlainTextResponse(registro.exportar(), media_type=TIPO_CONTEUDO)
+
+
+@app.on_event("startup")
+async def iniciar_recursos():
+    """
+    Prepara o backend de armazenamento na inicialização
     
-    transacoes = db.obter_transacoes_por_conta(conta["id"])
-    estatisticas = db.obter_estatisticas_conta(conta["id"])
+    Carrega as revogações de tokens ainda válidas e, com um backend
+    compartilhado, passa a sincronizar as feitas pelos demais workers.
+    """
+    await aguardar(db.iniciar())
+    revogacoes.incorporar(await chamar_backend(db.listar_revogacoes))
     
-    return Extrato(
-        conta=Conta(**conta),
-        transacoes=[Transacao(**t) for t in transacoes],
-        total_depositos=estatisticas["total_depositos"],
-        total_saques=estatisticas["total_saques"],
-        quantidade_transacoes=estatisticas["quantidade_transacoes"]
-    )
+    app.state.sincronizacao_revogacoes = None
+    if db.compartilhado and settings.REVOGACAO_SINCRONIZACAO_SEGUNDOS > 0:
+        app.state.sincronizacao_revogacoes = asyncio.create_task(sincronizar_revogacoes(
+            revogacoes,
+            partial(chamar_backend, db.listar_revogacoes),
+            settings.REVOGACAO_SINCRONIZACAO_SEGUNDOS
+        ))
+
+
+@app.on_event("shutdown")
+async def encerrar_recursos():
+    """Libera os recursos da aplicação no desligamento"""
+    sincronizacao = getattr(app.state, "sincronizacao_revogacoes", None)
+    if sincronizacao is not None:
+        sincronizacao.cancel()
+    servico_hash.encerrar()
+    await aguardar(db.fechar())
 
 
 # ==================== ENDPOINT RAIZ ====================
@@ -350,19 +764,17 @@ async def raiz():
         "endpoints_principais": {
             "criar_usuario": "POST /usuarios/",
             "login": "POST /login/",
+            "logout": "POST /logout/",
             "criar_conta": "POST /contas/",
             "deposito": "POST /transacoes/deposito",
             "saque": "POST /transacoes/saque",
+            "transferencia": "POST /transacoes/transferencia",
+            "lote": "POST /transacoes/lote",
             "extrato": "GET /transacoes/extrato"
         }
     }
 
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(
-        app,
-        host=settings.HOST,
-        port=settings.PORT,
-        reload=settings.DEBUG
-    )
+    from servidor import main as iniciar_servidor
+    iniciar_servidor()
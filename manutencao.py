@@ -0,0 +1,53 @@
+"""
+Ferramentas de manutenção do banco de dados
+
+Uso:
+    python manutencao.py verificar-estatisticas [--conta ID]
+    python manutencao.py reconstruir-estatisticas [--conta ID]
+"""
+import argparse
+import asyncio
+import json
+import sys
+from database import criar_repositorio
+from repositorio import aguardar
+
+
+async def verificar_estatisticas(conta_id, corrigir: bool) -> int:
+    """
+    Compara os agregados incrementais com os recalculados das transações
+    
+    Returns:
+        int: Código de saída (1 se houver divergências não corrigidas)
+    """
+    repo = criar_repositorio()
+    await aguardar(repo.iniciar())
+    try:
+        divergencias = await aguardar(
+            repo.reconstruir_estatisticas(conta_id=conta_id, corrigir=corrigir)
+        )
+    finally:
+        await aguardar(repo.fechar())
+    
+    print(json.dumps({
+        "divergencias": divergencias,
+        "corrigidas": corrigir
+    }, indent=2, ensure_ascii=False))
+    return 1 if divergencias and not corrigir else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+    
+    for comando in ("verificar-estatisticas", "reconstruir-estatisticas"):
+        sub = subparsers.add_parser(comando)
+        sub.add_argument("--conta", type=int, help="ID da conta (todas se omitido)")
+    
+    args = parser.parse_args()
+    corrigir = args.comando == "reconstruir-estatisticas"
+    sys.exit(asyncio.run(verificar_estatisticas(args.conta, corrigir)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Métricas no formato de texto do Prometheus (GET /metrics)
+
+Contadores, gauges e histogramas com buckets pré-agregados: cada
+observação incrementa um único bucket, e os valores acumulados por `le`
+só são calculados na exportação. As atualizações não usam locks, pois
+todas as medições acontecem na thread do event loop (requisições,
+chamadas ao backend, espera pelo pool de bcrypt e serialização).
+"""
+from bisect import bisect_left
+from collections import defaultdict
+from time import perf_counter
+from typing import Dict, Tuple
+from starlette.routing import Match
+from repositorio import executar_no_backend
+from config import settings
+
+
+# Limites superiores dos buckets de latência, em segundos
+LIMITES_PADRAO = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+# Rótulo das requisições que não correspondem a nenhuma rota, para não
+# criar uma série por caminho arbitrário
+ROTA_DESCONHECIDA = "desconhecida"
+
+TIPO_CONTEUDO = "text/plain; version=0.0.4"
+
+FAMILIAS = {
+    "http_requisicoes_total": ("counter", "Requisições HTTP concluídas"),
+    "http_requisicoes_em_andamento": ("gauge", "Requisições HTTP em processamento"),
+    "http_requisicao_duracao_segundos": ("histogram", "Duração das requisições HTTP"),
+    "operacao_duracao_segundos": (
+        "histogram", "Duração de operações internas (bcrypt, JWT, serialização)"
+    ),
+    "backend_chamada_duracao_segundos": (
+        "histogram", "Duração das chamadas ao backend de armazenamento"
+    )
+}
+
+Rotulos = Tuple[Tuple[str, str], ...]
+
+
+class Histograma:
+    """Contagens por bucket (não acumuladas), soma e total de observações"""
+    
+    __slots__ = ("limites", "contagens", "soma")
+    
+    def __init__(self, limites: tuple):
+        self.limites = limites
+        # Último bucket: acima do maior limite (+Inf)
+        self.contagens = [0] * (len(limites) + 1)
+        self.soma = 0.0
+    
+    def observar(self, valor: float):
+        self.contagens[bisect_left(self.limites, valor)] += 1
+        self.soma += valor
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _formatar_rotulos(rotulos: Rotulos) -> str:
+    if not rotulos:
+        return ""
+    return "{" + ",".join(f'{nome}="{_escapar(valor)}"' for nome, valor in rotulos) + "}"
+
+
+class RegistroMetricas:
+    """
+    Séries de métricas da aplicação
+    
+    Séries são identificadas pela família e por uma tupla de pares
+    (rótulo, valor), criadas na primeira observação. Com `ativo=False`
+    as observações são ignoradas.
+    """
+    
+    def __init__(self, ativo: bool = True, limites: tuple = LIMITES_PADRAO):
+        self.ativo = ativo
+        self.limites = limites
+        self._contadores: Dict[Tuple[str, Rotulos], int] = defaultdict(int)
+        self._gauges: Dict[Tuple[str, Rotulos], int] = defaultdict(int)
+        self._histogramas: Dict[Tuple[str, Rotulos], Histograma] = {}
+    
+    def incrementar(self, familia: str, rotulos: Rotulos, valor: int = 1):
+        self._contadores[(familia, rotulos)] += valor
+    
+    def ajustar(self, familia: str, rotulos: Rotulos, delta: int):
+        self._gauges[(familia, rotulos)] += delta
+    
+    def observar(self, familia: str, rotulos: Rotulos, valor: float):
+        chave = (familia, rotulos)
+        histograma = self._histogramas.get(chave)
+        if histograma is None:
+            histograma = self._histogramas.setdefault(chave, Histograma(self.limites))
+        histograma.observar(valor)
+    
+    def observar_operacao(self, operacao: str, segundos: float):
+        """Registra a duração de uma operação interna (ex: bcrypt_hash)"""
+        if self.ativo:
+            self.observar("operacao_duracao_segundos", (("operacao", operacao),), segundos)
+    
+    def exportar(self) -> str:
+        """Todas as séries no formato de texto do Prometheus"""
+        series = defaultdict(list)
+        for (familia, rotulos), valor in list(self._contadores.items()):
+            series[familia].append(f"{familia}{_formatar_rotulos(rotulos)} {valor}")
+        for (familia, rotulos), valor in list(self._gauges.items()):
+            series[familia].append(f"{familia}{_formatar_rotulos(rotulos)} {valor}")
+        for (familia, rotulos), histograma in list(self._histogramas.items()):
+            linhas = series[familia]
+            acumulado = 0
+            for limite, contagem in zip(self.limites + ("+Inf",), histograma.contagens):
+                acumulado += contagem
+                rotulos_bucket = rotulos + (("le", str(limite)),)
+                linhas.append(f"{familia}_bucket{_formatar_rotulos(rotulos_bucket)} {acumulado}")
+            linhas.append(f"{familia}_sum{_formatar_rotulos(rotulos)} {histograma.soma}")
+            linhas.append(f"{familia}_count{_formatar_rotulos(rotulos)} {acumulado}")
+        
+        saida = []
+        for familia, (tipo, descricao) in FAMILIAS.items():
+            if familia in series:
+                saida.append(f"# HELP {familia} {descricao}")
+                saida.append(f"# TYPE {familia} {tipo}")
+                saida.extend(series[familia])
+        return "\n".join(saida) + "\n"
+
+
+class MiddlewareMetricas:
+    """
+    Middleware ASGI que mede contagem, duração e concorrência por rota
+    
+    A rota é rotulada pelo seu caminho declarado (ex: /transacoes/saque),
+    resolvido uma vez por caminho e guardado em um dicionário.
+    """
+    
+    # Limite de caminhos distintos memorizados
+    TAMANHO_MAXIMO_ROTAS = 10_000
+    
+    def __init__(self, app, registro: RegistroMetricas):
+        self.app = app
+        self.registro = registro
+        self._rotas: Dict[Tuple[str, str], str] = {}
+    
+    def _resolver_rota(self, scope) -> str:
+        chave = (scope["method"], scope["path"])
+        rota = self._rotas.get(chave)
+        if rota is None:
+            rota = ROTA_DESCONHECIDA
+            for candidata in scope["app"].router.routes:
+                correspondencia, _ = candidata.matches(scope)
+                if correspondencia == Match.FULL:
+                    rota = candidata.path
+                    break
+            if len(self._rotas) < self.TAMANHO_MAXIMO_ROTAS:
+                self._rotas[chave] = rota
+        return rota
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.registro.ativo:
+            await self.app(scope, receive, send)
+            return
+        
+        rotulos = (("metodo", scope["method"]), ("rota", self._resolver_rota(scope)))
+        codigo = 500
+        
+        async def enviar(mensagem):
+            nonlocal codigo
+            if mensagem["type"] == "http.response.start":
+                codigo = mensagem["status"]
+            await send(mensagem)
+        
+        self.registro.ajustar("http_requisicoes_em_andamento", rotulos, 1)
+        inicio = perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            self.registro.observar("http_requisicao_duracao_segundos", rotulos, perf_counter() - inicio)
+            self.registro.ajustar("http_requisicoes_em_andamento", rotulos, -1)
+            self.registro.incrementar("http_requisicoes_total", rotulos + (("status", str(codigo)),))
+
+
+async def chamar_backend(metodo, *args, **kwargs):
+    """
+    Chama um método do backend (síncrono ou assíncrono) medindo sua duração
+    
+    Equivale a `await executar_no_backend(metodo, *args, **kwargs)`, com a
+    duração registrada sob o nome do método.
+    """
+    if not registro.ativo:
+        return await executar_no_backend(metodo, *args, **kwargs)
+    
+    inicio = perf_counter()
+    try:
+        return await executar_no_backend(metodo, *args, **kwargs)
+    finally:
+        registro.observar(
+            "backend_chamada_duracao_segundos", (("metodo", metodo.__name__),), perf_counter() - inicio
+        )
+
+
+# Instância global do registro de métricas
+registro = RegistroMetricas(ativo=settings.METRICAS_HABILITADAS)
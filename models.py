@@ -5,12 +5,27 @@ from pydantic import BaseModel, Field, validator
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
+from dinheiro import Centavos, Reais
+from config import settings
 
 
 class TipoTransacao(str, Enum):
     """Tipos de transação bancária"""
     DEPOSITO = "deposito"
     SAQUE = "saque"
+    TRANSFERENCIA = "transferencia"
+
+
+class OrdemExtrato(str, Enum):
+    """Ordem das transações no extrato"""
+    CRESCENTE = "asc"
+    DECRESCENTE = "desc"
+
+
+class FormatoExportacao(str, Enum):
+    """Formatos de exportação do extrato"""
+    NDJSON = "ndjson"
+    CSV = "csv"
 
 
 class TipoConta(str, Enum):
@@ -61,7 +76,7 @@ class Conta(ContaBase):
     """Schema de resposta de conta"""
     id: int
     numero_conta: str = Field(..., description="Número único da conta")
-    saldo: float = Field(default=0.0, description="Saldo atual da conta")
+    saldo: Centavos = Field(default=0, description="Saldo atual da conta")
     usuario_id: int
     data_criacao: datetime
     
@@ -69,23 +84,31 @@ class Conta(ContaBase):
         from_attributes = True
 
 
+class ContaPublica(BaseModel):
+    """Dados de uma conta visíveis a outros clientes (sem saldo nem CPF)"""
+    id: int
+    numero_conta: str
+    tipo_conta: TipoConta
+    titular: str = Field(..., description="Nome do titular")
+
+
 # Schemas de Transação
 class TransacaoBase(BaseModel):
     """Schema base para transação"""
-    valor: float = Field(..., description="Valor da transação", gt=0)
+    valor: Centavos = Field(..., description="Valor da transação")
     descricao: Optional[str] = Field(None, description="Descrição da transação", max_length=200)
+
+
+class TransacaoCreate(TransacaoBase):
+    """Schema para criação de transação"""
+    valor: Reais = Field(..., description="Valor da transação em reais")
     
     @validator('valor')
     def validar_valor_positivo(cls, v):
-        """Valida se o valor é positivo"""
+        """Valida se o valor (já em centavos) é positivo"""
         if v <= 0:
             raise ValueError('O valor da transação deve ser positivo')
-        return round(v, 2)
-
-
-class TransacaoCreate(TransacaoBase):
-    """Schema para criação de transação"""
-    pass
+        return v
 
 
 class Transacao(TransacaoBase):
@@ -94,21 +117,96 @@ class Transacao(TransacaoBase):
     tipo: TipoTransacao
     conta_id: int
     data_transacao: datetime
-    saldo_anterior: float = Field(..., description="Saldo antes da transação")
-    saldo_posterior: float = Field(..., description="Saldo após a transação")
+    saldo_anterior: Centavos = Field(..., description="Saldo antes da transação")
+    saldo_posterior: Centavos = Field(..., description="Saldo após a transação")
     
     class Config:
         from_attributes = True
 
 
+# Schema de Transferência
+class TransferenciaCreate(TransacaoCreate):
+    """Schema para transferência para outra conta"""
+    # Curta o bastante para caber na descrição com o número da outra conta
+    descricao: Optional[str] = Field(None, description="Descrição da transferência", max_length=140)
+    conta_destino_id: int = Field(..., description="ID da conta que recebe o valor", gt=0)
+
+
+# Schemas de Lote de Transações
+class TransacaoLoteItem(TransacaoCreate):
+    """Item de um lote: depósito ou saque"""
+    tipo: TipoTransacao = Field(..., description="Tipo da transação")
+    
+    @validator('tipo')
+    def validar_tipo_lote(cls, v):
+        """Transferências envolvem outra conta e não entram em lotes"""
+        if v not in (TipoTransacao.DEPOSITO, TipoTransacao.SAQUE):
+            raise ValueError('Lotes aceitam apenas depósitos e saques')
+        return v
+
+
+class LoteTransacoesCreate(BaseModel):
+    """Schema para envio de várias transações de uma vez"""
+    transacoes: List[TransacaoLoteItem] = Field(
+        ...,
+        description="Transações aplicadas na ordem enviada",
+        min_length=1,
+        max_length=settings.LOTE_TAMANHO_MAXIMO
+    )
+    atomico: bool = Field(
+        True,
+        description="Tudo ou nada (true) ou resultado individual por item (false)"
+    )
+
+
+class ResultadoItemLote(BaseModel):
+    """Resultado de um item do lote"""
+    indice: int = Field(..., description="Posição do item no lote")
+    sucesso: bool
+    transacao: Optional[Transacao] = None
+    erro: Optional[str] = None
+
+
+class ResultadoLote(BaseModel):
+    """Schema de resposta do lote de transações"""
+    atomico: bool
+    aplicadas: int = Field(..., description="Quantidade de transações criadas")
+    rejeitadas: int = Field(..., description="Quantidade de itens recusados")
+    saldo: Centavos = Field(..., description="Saldo da conta após o lote")
+    resultados: List[ResultadoItemLote]
+
+
 # Schema de Extrato
 class Extrato(BaseModel):
     """Schema para extrato bancário"""
     conta: Conta
     transacoes: List[Transacao]
-    total_depositos: float = Field(..., description="Total de depósitos realizados")
-    total_saques: float = Field(..., description="Total de saques realizados")
+    total_depositos: Centavos = Field(..., description="Total de depósitos realizados")
+    total_saques: Centavos = Field(..., description="Total de saques realizados")
+    total_transferencias_recebidas: Centavos = Field(
+        ..., description="Total recebido em transferências"
+    )
+    total_transferencias_enviadas: Centavos = Field(
+        ..., description="Total enviado em transferências"
+    )
     quantidade_transacoes: int = Field(..., description="Quantidade total de transações")
+    proximo_cursor: Optional[int] = Field(
+        None, description="Valor de after_id para a próxima página (nulo na última)"
+    )
+
+
+class EstatisticaPeriodo(BaseModel):
+    """Schema para estatísticas mensais de uma conta"""
+    periodo: str = Field(..., description="Período no formato AAAA-MM")
+    total_depositos: Centavos = Field(..., description="Total de depósitos no período")
+    total_saques: Centavos = Field(..., description="Total de saques no período")
+    total_transferencias_recebidas: Centavos = Field(
+        ..., description="Total recebido em transferências no período"
+    )
+    total_transferencias_enviadas: Centavos = Field(
+        ..., description="Total enviado em transferências no período"
+    )
+    quantidade_transacoes: int = Field(..., description="Quantidade de transações no período")
 
 
 # Schemas de Autenticação
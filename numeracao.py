@@ -0,0 +1,172 @@
+"""
+Números de conta: dígito verificador e alocação de sequenciais em blocos
+
+O número tem o formato agência-sequencial-dígito (0001-000123-9). O
+dígito é calculado por módulo 11 sobre agência e sequencial. Como 11 é
+primo e nenhum peso é múltiplo dele, qualquer dígito trocado e qualquer
+par de dígitos adjacentes invertido na agência ou no sequencial mudam o
+resto, e o número é recusado antes de qualquer consulta. O resto que
+pediria o dígito 10 não é representável: esses sequenciais nunca são
+emitidos (cerca de 1 em 11), em vez de compartilharem o dígito 0 com
+outro resto. Trocas entre dígitos não adjacentes podem passar, pois os
+pesos se repetem a cada 8 posições.
+
+O sequencial é independente do ID da conta e vem de um `AlocadorBlocos`:
+cada processo reserva um bloco de sequenciais na fonte compartilhada (um
+contador em memória ou uma linha de `sequencias` no banco) e distribui
+os números do bloco localmente, sem coordenação a cada conta criada.
+Blocos de processos diferentes nunca se sobrepõem; números não usados
+de um bloco são perdidos quando o processo termina, deixando lacunas.
+"""
+from typing import Awaitable, Callable, Optional, Union
+import asyncio
+import re
+import threading
+
+
+AGENCIA = "0001"
+DIGITOS_SEQUENCIAL = 6
+
+PADRAO_NUMERO_CONTA = re.compile(r"^(\d{4})-(\d{6,})-(\d)$")
+
+# Nome da sequência dos números de conta na tabela `sequencias` dos bancos
+SEQUENCIA_NUMERO_CONTA = "numero_conta"
+
+
+def digito_verificador(digitos: str) -> int:
+    """
+    Dígito verificador módulo 11, com pesos 2 a 9 da direita para a esquerda
+    
+    Retorna de 0 a 10; 10 não cabe no número da conta (ver
+    `sequencial_utilizavel`).
+    """
+    soma = sum(
+        int(digito) * (2 + posicao % 8)
+        for posicao, digito in enumerate(reversed(digitos))
+    )
+    return (11 - soma % 11) % 11
+
+
+def sequencial_utilizavel(sequencial: int, agencia: str = AGENCIA) -> bool:
+    """Se o dígito verificador do sequencial cabe em um algarismo"""
+    numero = str(sequencial).zfill(DIGITOS_SEQUENCIAL)
+    return digito_verificador(agencia + numero) != 10
+
+
+def formatar_numero_conta(sequencial: int, agencia: str = AGENCIA) -> str:
+    """Número da conta no padrão agência-sequencial-dígito"""
+    numero = str(sequencial).zfill(DIGITOS_SEQUENCIAL)
+    digito = digito_verificador(agencia + numero)
+    if digito == 10:
+        raise ValueError(f"Sequencial {sequencial} não é utilizável: dígito verificador 10")
+    return f"{agencia}-{numero}-{digito}"
+
+
+def validar_numero_conta(numero_conta: str) -> bool:
+    """Se o número tem o formato esperado e o dígito verificador confere"""
+    correspondencia = PADRAO_NUMERO_CONTA.match(numero_conta)
+    if not correspondencia:
+        return False
+    agencia, numero, digito = correspondencia.groups()
+    return digito_verificador(agencia + numero) == int(digito)
+
+
+def sequencial_do_numero(numero_conta: str) -> Optional[int]:
+    """Sequencial de um número de conta (None se fora do formato)"""
+    correspondencia = PADRAO_NUMERO_CONTA.match(numero_conta)
+    return int(correspondencia.group(2)) if correspondencia else None
+
+
+class SequenciaMemoria:
+    """Fonte de blocos de um único processo (banco em memória)"""
+    
+    def __init__(self, proximo: int = 1):
+        self.proximo = proximo
+        self._lock = threading.Lock()
+    
+    def reservar(self, quantidade: int) -> int:
+        """Reserva `quantidade` sequenciais e retorna o primeiro"""
+        with self._lock:
+            inicio = self.proximo
+            self.proximo += quantidade
+        return inicio
+    
+    def avancar(self, usado: int):
+        """Garante que um sequencial já usado (ex: restaurado do journal) não seja reservado"""
+        with self._lock:
+            self.proximo = max(self.proximo, usado + 1)
+
+
+class AlocadorBlocos:
+    """
+    Distribui sequenciais de blocos reservados em uma fonte compartilhada
+    
+    `reservar(quantidade)` reserva atomicamente `quantidade` sequenciais
+    consecutivos na fonte e retorna o primeiro; pode ser uma função ou uma
+    corrotina (para backends assíncronos, com `proximo_assincrono`).
+    Sequenciais recusados por `aceitar` são pulados.
+    """
+    
+    def __init__(
+        self,
+        reservar: Callable[[int], Union[int, Awaitable[int]]],
+        tamanho_bloco: int = 100,
+        aceitar: Callable[[int], bool] = sequencial_utilizavel
+    ):
+        self.reservar = reservar
+        self.tamanho_bloco = max(1, tamanho_bloco)
+        self.aceitar = aceitar
+        self._proximo = 0
+        self._fim = 0
+        self._lock = threading.Lock()
+        self._lock_assincrono = asyncio.Lock()
+        
+        # Métricas
+        self.blocos_reservados = 0
+        self.alocados = 0
+    
+    def _tomar(self) -> Optional[int]:
+        """Próximo sequencial aceito do bloco atual (None se esgotado)"""
+        while self._proximo < self._fim:
+            sequencial = self._proximo
+            self._proximo += 1
+            if self.aceitar(sequencial):
+                self.alocados += 1
+                return sequencial
+        return None
+    
+    def _receber_bloco(self, inicio: int):
+        self._proximo = inicio
+        self._fim = inicio + self.tamanho_bloco
+        self.blocos_reservados += 1
+    
+    def proximo(self) -> int:
+        """Próximo sequencial, reservando um novo bloco se o atual acabou"""
+        with self._lock:
+            sequencial = self._tomar()
+            # Um bloco pequeno pode conter só sequenciais recusados
+            while sequencial is None:
+                self._receber_bloco(self.reservar(self.tamanho_bloco))
+                sequencial = self._tomar()
+            return sequencial
+    
+    async def proximo_assincrono(self) -> int:
+        """Como `proximo`, com uma fonte assíncrona"""
+        sequencial = self._tomar()
+        if sequencial is not None:
+            return sequencial
+        async with self._lock_assincrono:
+            # Outra corrotina pode ter reservado o bloco enquanto esta esperava
+            sequencial = self._tomar()
+            while sequencial is None:
+                self._receber_bloco(await self.reservar(self.tamanho_bloco))
+                sequencial = self._tomar()
+            return sequencial
+    
+    def metricas(self) -> dict:
+        return {
+            "tamanho_bloco": self.tamanho_bloco,
+            "blocos_reservados": self.blocos_reservados,
+            "alocados": self.alocados,
+            "restantes_no_bloco": max(0, self._fim - self._proximo)
+        }
@@ -0,0 +1,216 @@
+"""
+Rastreamento (spans) das operações do armazenamento
+
+Os métodos do backend são marcados com `@rastreado`, que apenas anota a
+função: sem rastreamento ativo, a classe executa os métodos originais,
+sem nenhum custo adicional. `rastreador.ativar(sink, Classe)` substitui
+os métodos marcados por versões que medem a duração, contam as linhas
+devolvidas e emitem um `Span` para o sink; `desativar` restaura os
+originais.
+
+Sinks disponíveis: buffer circular em memória (consultado em
+GET /sistema/rastreamento), logging e OpenTelemetry (opcional, requer o
+pacote opentelemetry-api).
+"""
+from collections import deque
+from functools import wraps
+from time import perf_counter_ns, time_ns
+from typing import Any, Callable, List, NamedTuple, Optional, Union
+import logging
+import threading
+
+
+class Span(NamedTuple):
+    """Execução de uma operação rastreada"""
+    nome: str
+    inicio_ns: int  # Época Unix, em nanossegundos
+    duracao_ns: int
+    linhas: Optional[int]
+    erro: Optional[str]
+    thread: str
+
+
+# Quantidade de linhas de um resultado: função do resultado ou constante
+ContagemLinhas = Union[Callable[[Any], Optional[int]], int, None]
+
+
+def contar_encontrado(resultado) -> int:
+    """Uma linha para buscas que encontraram o registro, zero caso contrário"""
+    return 0 if resultado is None else 1
+
+
+def rastreado(linhas: ContagemLinhas = None, nome: Optional[str] = None):
+    """
+    Marca um método para rastreamento
+    
+    Args:
+        linhas: `len`, outra função do resultado ou número fixo de linhas
+        nome: Nome do span (padrão: nome do método)
+    """
+    def marcar(funcao):
+        funcao.__rastreamento__ = (nome or funcao.__name__, linhas)
+        return funcao
+    return marcar
+
+
+class SinkMemoria:
+    """Mantém os últimos spans em um buffer circular"""
+    
+    tipo = "memoria"
+    
+    def __init__(self, capacidade: int):
+        self._spans: deque = deque(maxlen=capacidade)
+    
+    def emitir(self, span: Span):
+        self._spans.append(span)
+    
+    def recentes(self, limite: Optional[int] = None) -> List[Span]:
+        """Spans mais recentes, do mais antigo para o mais novo"""
+        spans = list(self._spans)
+        return spans[-limite:] if limite else spans
+    
+    def resumo(self) -> dict:
+        """Quantidade, duração e linhas por operação dos spans no buffer"""
+        resumo = {}
+        for span in list(self._spans):
+            item = resumo.setdefault(span.nome, {
+                "quantidade": 0, "erros": 0, "total_ms": 0.0, "max_ms": 0.0, "linhas": 0
+            })
+            duracao_ms = span.duracao_ns / 1_000_000
+            item["quantidade"] += 1
+            item["erros"] += span.erro is not None
+            item["total_ms"] += duracao_ms
+            item["max_ms"] = max(item["max_ms"], duracao_ms)
+            item["linhas"] += span.linhas or 0
+        for item in resumo.values():
+            item["media_ms"] = round(item["total_ms"] / item["quantidade"], 4)
+            item["total_ms"] = round(item["total_ms"], 4)
+            item["max_ms"] = round(item["max_ms"], 4)
+        return resumo
+
+
+class SinkLogging:
+    """Escreve cada span como uma linha de log"""
+    
+    tipo = "log"
+    
+    def __init__(self, logger: Optional[logging.Logger] = None, nivel: int = logging.INFO):
+        self.logger = logger or logging.getLogger("api_bancaria.rastreamento")
+        self.nivel = nivel
+    
+    def emitir(self, span: Span):
+        self.logger.log(
+            self.nivel, "span=%s duracao_ms=%.3f linhas=%s erro=%s thread=%s",
+            span.nome, span.duracao_ns / 1_000_000, span.linhas, span.erro, span.thread
+        )
+
+
+class SinkOpenTelemetry:
+    """
+    Exporta cada span pelo tracer do OpenTelemetry
+    
+    O span é criado no contexto corrente, então fica como filho do span
+    da requisição quando a aplicação também é instrumentada.
+    """
+    
+    tipo = "otel"
+    
+    def __init__(self, tracer=None):
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            raise ImportError(
+                "O sink OpenTelemetry requer o pacote opentelemetry-api"
+            )
+        self._trace = trace
+        self.tracer = tracer or trace.get_tracer("api_bancaria.armazenamento")
+    
+    def emitir(self, span: Span):
+        atributos = {"thread": span.thread}
+        if span.linhas is not None:
+            atributos["linhas"] = span.linhas
+        otel_span = self.tracer.start_span(span.nome, start_time=span.inicio_ns, attributes=atributos)
+        if span.erro is not None:
+            otel_span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, span.erro))
+        otel_span.end(end_time=span.inicio_ns + span.duracao_ns)
+
+
+def criar_sink(tipo: str, capacidade: int = 10_000):
+    """Cria um sink pelo nome ("memoria", "log" ou "otel")"""
+    if tipo == "memoria":
+        return SinkMemoria(capacidade)
+    if tipo == "log":
+        return SinkLogging()
+    if tipo == "otel":
+        return SinkOpenTelemetry()
+    raise ValueError(f"Sink de rastreamento desconhecido: {tipo}")
+
+
+def _envolver(funcao: Callable, nome: str, linhas: ContagemLinhas, emitir: Callable) -> Callable:
+    """Versão rastreada de um método marcado"""
+    contar = (lambda _: linhas) if isinstance(linhas, int) else linhas
+    
+    @wraps(funcao)
+    def rastreada(*args, **kwargs):
+        inicio = time_ns()
+        relogio = perf_counter_ns()
+        erro = None
+        resultado = None
+        try:
+            resultado = funcao(*args, **kwargs)
+            return resultado
+        except Exception as e:
+            erro = type(e).__name__
+            raise
+        finally:
+            duracao = perf_counter_ns() - relogio
+            emitir(Span(
+                nome,
+                inicio,
+                duracao,
+                contar(resultado) if contar is not None and erro is None else None,
+                erro,
+                threading.current_thread().name
+            ))
+    
+    rastreada.__rastreada__ = True
+    return rastreada
+
+
+class Rastreador:
+    """Liga e desliga o rastreamento dos métodos marcados de classes de backend"""
+    
+    def __init__(self):
+        self.sink = None
+        self._classes: List[type] = []
+    
+    @property
+    def ativo(self) -> bool:
+        return self.sink is not None
+    
+    def ativar(self, sink, *classes: type):
+        """Passa a emitir spans dos métodos marcados das classes para o sink"""
+        self.desativar()
+        for classe in classes:
+            prefixo = classe.__name__
+            for atributo, funcao in list(vars(classe).items()):
+                marca = getattr(funcao, "__rastreamento__", None)
+                if marca is None:
+                    continue
+                nome, linhas = marca
+                setattr(classe, atributo, _envolver(funcao, f"{prefixo}.{nome}", linhas, sink.emitir))
+        self.sink = sink
+        self._classes = list(classes)
+    
+    def desativar(self):
+        """Restaura os métodos originais"""
+        for classe in self._classes:
+            for atributo, funcao in list(vars(classe).items()):
+                if getattr(funcao, "__rastreada__", False):
+                    setattr(classe, atributo, funcao.__wrapped__)
+        self.sink = None
+        self._classes = []
+
+
+# Instância global do rastreador
+rastreador = Rastreador()
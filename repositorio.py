@@ -0,0 +1,468 @@
+"""
+Interface de repositório implementada pelos backends de armazenamento
+"""
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor
+from datetime import datetime
+from functools import partial
+import asyncio
+import inspect
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+from models import TipoTransacao, TipoConta
+from cache_contas import CacheContas
+from idempotencia import CacheIdempotencia
+from numeracao import AlocadorBlocos
+from config import settings
+
+# Estatísticas de uma conta: totais gerais e agregados por período (mês)
+EstatisticasConta = Tuple[dict, Dict[str, dict]]
+
+# Item de um lote de transações: (tipo, valor em centavos, descrição)
+ItemLote = Tuple[TipoTransacao, int, Optional[str]]
+
+
+class ArmazenamentoOcupado(Exception):
+    """Banco ocupado por outra escrita além do tempo de espera (a API responde 503)"""
+
+
+class ContaResolvida(NamedTuple):
+    """IDs do usuário de um CPF e da sua conta (None se ainda não criada)"""
+    usuario_id: int
+    conta_id: Optional[int]
+
+
+def periodo_da_data(data: datetime) -> str:
+    """Período (mês, AAAA-MM) usado nos agregados de estatísticas"""
+    return data.strftime("%Y-%m")
+
+
+def novas_estatisticas() -> dict:
+    """
+    Agregados zerados de uma conta ou período (valores em centavos)
+    
+    Depósitos + transferências recebidas - saques - transferências
+    enviadas é a variação do saldo.
+    """
+    return {
+        "total_depositos": 0,
+        "total_saques": 0,
+        "total_transferencias_recebidas": 0,
+        "total_transferencias_enviadas": 0,
+        "quantidade_transacoes": 0
+    }
+
+
+def acumular_estatisticas(estatisticas: dict, transacao: dict):
+    """Soma uma transação (valores em centavos) aos agregados"""
+    tipo, valor = transacao["tipo"], transacao["valor"]
+    if tipo == TipoTransacao.DEPOSITO.value:
+        estatisticas["total_depositos"] += valor
+    elif tipo == TipoTransacao.SAQUE.value:
+        estatisticas["total_saques"] += valor
+    elif transacao["saldo_posterior"] > transacao["saldo_anterior"]:
+        # As duas pernas de uma transferência têm o mesmo tipo: o sentido
+        # vem da variação do saldo
+        estatisticas["total_transferencias_recebidas"] += valor
+    else:
+        estatisticas["total_transferencias_enviadas"] += valor
+    estatisticas["quantidade_transacoes"] += 1
+
+
+def calcular_lote(
+    saldo: int,
+    itens: List[ItemLote],
+    atomico: bool
+) -> List[Union[Tuple[int, int], str]]:
+    """
+    Aplica em sequência os itens de um lote a um saldo
+    
+    Itens recusados não alteram o saldo, então os seguintes são avaliados
+    como se eles não existissem.
+    
+    Args:
+        saldo: Saldo da conta antes do lote
+        itens: Depósitos e saques, na ordem de aplicação
+        atomico: Se qualquer item recusado invalida o lote inteiro
+    
+    Returns:
+        List: Para cada item, (saldo_anterior, saldo_posterior) ou a
+            mensagem de erro do item recusado
+    
+    Raises:
+        ValueError: No modo atômico, com o primeiro item recusado
+    """
+    resultados: List[Union[Tuple[int, int], str]] = []
+    for indice, (tipo, valor, _) in enumerate(itens):
+        if tipo == TipoTransacao.SAQUE and saldo < valor:
+            erro = "Saldo insuficiente para realizar o saque"
+            if atomico:
+                raise ValueError(f"Item {indice}: {erro}")
+            resultados.append(erro)
+            continue
+        
+        saldo_posterior = saldo - valor if tipo == TipoTransacao.SAQUE else saldo + valor
+        resultados.append((saldo, saldo_posterior))
+        saldo = saldo_posterior
+    return resultados
+
+
+def montar_transferencia(
+    origem: dict,
+    destino: dict,
+    valor: int,
+    descricao: Optional[str],
+    data_transacao: datetime
+) -> Tuple[dict, dict]:
+    """
+    Transações de débito (origem) e crédito (destino) de uma transferência
+    
+    As duas têm tipo TRANSFERENCIA: o sentido aparece na variação do saldo
+    e na descrição, que cita o número da conta da outra ponta. O ID fica
+    None para o backend preencher.
+    
+    Args:
+        origem: Conta que envia (id, numero_conta e saldo atual)
+        destino: Conta que recebe (id, numero_conta e saldo atual)
+        valor: Valor em centavos
+        descricao: Texto opcional do cliente
+        data_transacao: Data comum às duas transações
+    
+    Raises:
+        ValueError: Saldo insuficiente na conta de origem
+    """
+    if origem["saldo"] < valor:
+        raise ValueError("Saldo insuficiente para realizar a transferência")
+    
+    def perna(conta: dict, texto: str, variacao: int) -> dict:
+        return {
+            "id": None,
+            "conta_id": conta["id"],
+            "tipo": TipoTransacao.TRANSFERENCIA.value,
+            "valor": valor,
+            "descricao": f"{texto}: {descricao}" if descricao else texto,
+            "saldo_anterior": conta["saldo"],
+            "saldo_posterior": conta["saldo"] + variacao,
+            "data_transacao": data_transacao
+        }
+    
+    return (
+        perna(origem, f"Transferência para {destino['numero_conta']}", -valor),
+        perna(destino, f"Transferência de {origem['numero_conta']}", valor)
+    )
+
+
+def comparar_estatisticas(
+    armazenadas: Dict[int, EstatisticasConta],
+    calculadas: Dict[int, EstatisticasConta]
+) -> List[dict]:
+    """
+    Compara agregados mantidos incrementalmente com os recalculados
+    
+    Returns:
+        List[dict]: Uma entrada por conta divergente
+    """
+    divergencias = []
+    for conta_id, (totais, periodos) in sorted(calculadas.items()):
+        totais_armazenados, periodos_armazenados = armazenadas.get(
+            conta_id, (novas_estatisticas(), {})
+        )
+        if totais_armazenados != totais or periodos_armazenados != periodos:
+            divergencias.append({
+                "conta_id": conta_id,
+                "armazenado": totais_armazenados,
+                "calculado": totais
+            })
+    return divergencias
+
+
+class RepositorioBase(ABC):
+    """
+    Operações de persistência usadas pela API
+    
+    Todos os backends devolvem registros como dicts com as mesmas chaves do
+    DatabaseSimulator e sinalizam violações de regra de negócio com
+    ValueError, que a camada HTTP converte em 400. Valores monetários
+    (saldo, valor, totais) são sempre int em centavos.
+    
+    Backends assíncronos implementam os mesmos métodos como corrotinas;
+    a camada HTTP resolve qualquer retorno com `aguardar`. Backends
+    síncronos que fazem I/O definem `executor`, e as chamadas passam a
+    rodar nele (`executar_no_backend`), fora do event loop.
+    """
+    
+    # Se vários processos (workers) podem usar o mesmo banco
+    compartilhado = False
+    
+    def __init__(self):
+        # CPF -> (usuário, conta) das requisições autenticadas
+        self.cache_contas = CacheContas(settings.CACHE_CONTAS_TAMANHO)
+        
+        # Resultados de depósitos e saques por Idempotency-Key
+        self.idempotencia = CacheIdempotencia(
+            tamanho_maximo=settings.IDEMPOTENCIA_CACHE_TAMANHO,
+            ttl_segundos=settings.IDEMPOTENCIA_TTL_SEGUNDOS
+        )
+        
+        # Sequenciais dos números de conta, reservados em blocos (cada
+        # backend define a fonte compartilhada)
+        self.numeros: Optional[AlocadorBlocos] = None
+        
+        # Onde rodar os métodos síncronos (None: no próprio event loop)
+        self.executor: Optional[Executor] = None
+    
+    # Operações de Usuário
+    @abstractmethod
+    def criar_usuario(self, nome: str, cpf: str, senha_hash: str) -> dict:
+        """Cria um novo usuário"""
+    
+    @abstractmethod
+    def obter_usuario_por_cpf(self, cpf: str) -> Optional[dict]:
+        """Obtém usuário por CPF"""
+    
+    @abstractmethod
+    def obter_usuario_por_id(self, usuario_id: int) -> Optional[dict]:
+        """Obtém usuário por ID"""
+    
+    # Operações de Conta
+    @abstractmethod
+    def criar_conta(self, usuario_id: int, tipo_conta: TipoConta) -> dict:
+        """Cria uma nova conta para um usuário"""
+    
+    @abstractmethod
+    def obter_conta_por_usuario(self, usuario_id: int) -> Optional[dict]:
+        """Obtém a conta de um usuário"""
+    
+    @abstractmethod
+    def buscar_conta_por_cpf(self, cpf: str) -> Optional[ContaResolvida]:
+        """Obtém os IDs do usuário e da conta de um CPF em uma única consulta"""
+    
+    async def resolver_conta(self, cpf: str) -> Optional[ContaResolvida]:
+        """
+        Resolve um CPF para (usuario_id, conta_id), consultando o cache antes
+        
+        Returns:
+            Optional[ContaResolvida]: None se o CPF não tiver usuário;
+                conta_id None se o usuário ainda não tiver conta
+        """
+        resolucao = self.cache_contas.obter(cpf)
+        if resolucao is not None:
+            return resolucao
+        
+        resolucao = await executar_no_backend(self.buscar_conta_por_cpf, cpf)
+        if resolucao is not None and resolucao.conta_id is not None:
+            self.cache_contas.armazenar(cpf, resolucao)
+        return resolucao
+    
+    async def criar_conta_resolvida(
+        self,
+        cpf: str,
+        usuario_id: int,
+        tipo_conta: TipoConta
+    ) -> dict:
+        """Cria a conta do usuário e grava a nova resolução do CPF no cache (write-through)"""
+        conta = await executar_no_backend(self.criar_conta, usuario_id, tipo_conta)
+        self.cache_contas.armazenar(cpf, ContaResolvida(usuario_id, conta["id"]))
+        return conta
+    
+    @abstractmethod
+    def obter_conta_por_id(self, conta_id: int) -> Optional[dict]:
+        """Obtém conta por ID"""
+    
+    @abstractmethod
+    def obter_conta_por_numero(self, numero_conta: str) -> Optional[dict]:
+        """Obtém conta pelo número (agência-sequencial-dígito), por índice"""
+    
+    @abstractmethod
+    def atualizar_saldo(self, conta_id: int, novo_saldo: int):
+        """Atualiza o saldo de uma conta"""
+    
+    # Operações de Transação
+    @abstractmethod
+    def criar_transacao(
+        self,
+        conta_id: int,
+        tipo: TipoTransacao,
+        valor: int,
+        descricao: Optional[str] = None
+    ) -> dict:
+        """Cria uma nova transação e atualiza o saldo da conta"""
+    
+    async def criar_transacao_idempotente(
+        self,
+        conta_id: int,
+        tipo: TipoTransacao,
+        valor: int,
+        descricao: Optional[str],
+        chave: str
+    ) -> dict:
+        """
+        Cria uma transação no máximo uma vez por chave de idempotência
+        
+        Uma repetição com a mesma chave e o mesmo conteúdo devolve a
+        transação original sem executá-la de novo. Se a execução falhar
+        (ex: saldo insuficiente), a chave é liberada e pode ser reutilizada.
+        
+        Raises:
+            ChaveIdempotenciaEmUso: Execução original ainda em andamento
+            ChaveIdempotenciaDivergente: Chave usada com outro conteúdo
+            ValueError: Conta inexistente ou saldo insuficiente
+        """
+        anterior = self.idempotencia.reservar(conta_id, chave, (tipo.value, valor, descricao))
+        if anterior is not None:
+            return anterior
+        
+        try:
+            transacao = await executar_no_backend(
+                self.criar_transacao, conta_id, tipo, valor, descricao
+            )
+        except BaseException:
+            self.idempotencia.liberar(conta_id, chave)
+            raise
+        self.idempotencia.concluir(conta_id, chave, transacao)
+        return transacao
+    
+    @abstractmethod
+    def criar_transferencia(
+        self,
+        conta_origem_id: int,
+        conta_destino_id: int,
+        valor: int,
+        descricao: Optional[str] = None
+    ) -> Tuple[dict, dict]:
+        """
+        Transfere um valor entre duas contas de forma atômica
+        
+        As duas contas são travadas em uma ordem fixa, de modo que
+        transferências cruzadas (A->B e B->A) não entram em deadlock.
+        
+        Returns:
+            Tuple[dict, dict]: Transações de débito (origem) e crédito (destino)
+        
+        Raises:
+            ValueError: Contas iguais ou inexistentes, ou saldo insuficiente
+        """
+    
+    @abstractmethod
+    def criar_transacoes_lote(
+        self,
+        conta_id: int,
+        itens: List[ItemLote],
+        atomico: bool = True
+    ) -> List[Union[dict, str]]:
+        """
+        Cria várias transações de uma conta com uma única trava da conta
+        
+        Args:
+            conta_id: ID da conta
+            itens: Depósitos e saques, aplicados na ordem
+            atomico: Tudo ou nada (True) ou resultado por item (False)
+        
+        Returns:
+            List: Para cada item, a transação criada ou a mensagem de erro
+        
+        Raises:
+            ValueError: Conta inexistente ou, no modo atômico, item recusado
+        """
+    
+    @abstractmethod
+    def obter_transacoes_por_conta(self, conta_id: int) -> List[dict]:
+        """Obtém todas as transações de uma conta"""
+    
+    @abstractmethod
+    def obter_transacoes_paginadas(
+        self,
+        conta_id: int,
+        after_id: Optional[int] = None,
+        limit: int = 50,
+        desde: Optional[datetime] = None,
+        ate: Optional[datetime] = None,
+        decrescente: bool = False
+    ) -> List[dict]:
+        """
+        Obtém uma página de transações de uma conta (paginação por cursor)
+        
+        Args:
+            conta_id: ID da conta
+            after_id: Cursor; retorna transações posteriores a este ID na
+                ordem escolhida (anteriores, se decrescente)
+            limit: Quantidade máxima de transações
+            desde: Data/hora mínima (inclusiva)
+            ate: Data/hora máxima (inclusiva)
+            decrescente: Se True, retorna as mais recentes primeiro
+            
+        Returns:
+            List[dict]: Transações da página, ordenadas por ID
+        """
+    
+    @abstractmethod
+    def obter_estatisticas_conta(self, conta_id: int) -> dict:
+        """Obtém os agregados mantidos incrementalmente de uma conta"""
+    
+    @abstractmethod
+    def obter_estatisticas_por_periodo(self, conta_id: int) -> List[dict]:
+        """Obtém os agregados mensais de uma conta, em ordem cronológica"""
+    
+    @abstractmethod
+    def reconstruir_estatisticas(
+        self,
+        conta_id: Optional[int] = None,
+        corrigir: bool = True
+    ) -> List[dict]:
+        """
+        Recalcula os agregados a partir das transações
+        
+        Args:
+            conta_id: Conta a verificar; todas se omitido
+            corrigir: Se True, substitui os agregados divergentes
+            
+        Returns:
+            List[dict]: Contas cujos agregados divergiam do recalculado
+        """
+    
+    # Revogação de tokens
+    @abstractmethod
+    def gravar_revogacao(self, jti: str, exp: float):
+        """Grava a revogação do token de `jti` até o seu `exp` (época Unix)"""
+    
+    @abstractmethod
+    def listar_revogacoes(self, desde: float = 0.0) -> List[Tuple[str, float]]:
+        """Revogações ainda válidas (jti, exp) gravadas a partir do instante `desde`"""
+    
+    def metricas(self) -> dict:
+        """Métricas internas do backend"""
+        metricas = {
+            "cache_contas": self.cache_contas.metricas(),
+            "idempotencia": self.idempotencia.metricas()
+        }
+        if self.numeros is not None:
+            metricas["numeros_conta"] = self.numeros.metricas()
+        return metricas
+    
+    def iniciar(self):
+        """Prepara o backend (pools, esquema) no startup da aplicação"""
+    
+    def fechar(self):
+        """Libera recursos do backend (conexões, arquivos)"""
+
+
+async def aguardar(resultado):
+    """Resolve o retorno de um backend, aguardando-o se for assíncrono"""
+    if inspect.isawaitable(resultado):
+        return await resultado
+    return resultado
+
+
+async def executar_no_backend(metodo, *args, **kwargs):
+    """
+    Chama um método do backend e resolve o retorno
+    
+    Métodos síncronos de um backend com `executor` rodam nele, para que
+    esperas de I/O (ex: o lock de escrita do SQLite) não travem o event
+    loop; os demais são chamados diretamente, como em `aguardar`.
+    """
+    executor = getattr(getattr(metodo, "__self__", None), "executor", None)
+    if executor is not None and not inspect.iscoroutinefunction(metodo):
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, partial(metodo, *args, **kwargs)
+        )
+    return await aguardar(metodo(*args, **kwargs))
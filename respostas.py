@@ -0,0 +1,90 @@
+"""
+Respostas JSON montadas direto dos registros do backend
+
+Devolver um modelo Pydantic faz o FastAPI validá-lo de novo contra o
+response_model e convertê-lo com jsonable_encoder antes do json.dumps,
+o que domina o custo do extrato. As funções abaixo produzem os mesmos
+campos, na mesma ordem e com os mesmos valores que `Usuario`, `Conta`,
+`Transacao` e `EstatisticaPeriodo` (centavos em reais, datas em ISO
+8601), e o orjson serializa o resultado, inclusive os `datetime`, sem
+conversões intermediárias.
+"""
+from time import perf_counter
+from typing import Any, Iterable, List
+from fastapi.responses import ORJSONResponse
+from dinheiro import centavos_para_reais
+from metricas import registro
+
+
+class RespostaJSON(ORJSONResponse):
+    """Classe padrão de resposta da aplicação (orjson, com o tempo de serialização medido)"""
+    
+    def render(self, content: Any) -> bytes:
+        inicio = perf_counter()
+        corpo = super().render(content)
+        registro.observar_operacao("serializacao", perf_counter() - inicio)
+        return corpo
+
+
+def usuario_json(usuario: dict) -> dict:
+    """Campos públicos de um usuário, como em `Usuario` (sem o hash da senha)"""
+    return {
+        "nome": usuario["nome"],
+        "cpf": usuario["cpf"],
+        "id": usuario["id"]
+    }
+
+
+def conta_json(conta: dict) -> dict:
+    """Campos públicos de uma conta, como em `Conta`"""
+    return {
+        "tipo_conta": conta["tipo_conta"],
+        "id": conta["id"],
+        "numero_conta": conta["numero_conta"],
+        "saldo": centavos_para_reais(conta["saldo"]),
+        "usuario_id": conta["usuario_id"],
+        "data_criacao": conta["data_criacao"]
+    }
+
+
+def conta_publica_json(conta: dict, usuario: dict) -> dict:
+    """Campos de `ContaPublica`: identificação da conta e nome do titular"""
+    return {
+        "id": conta["id"],
+        "numero_conta": conta["numero_conta"],
+        "tipo_conta": conta["tipo_conta"],
+        "titular": usuario["nome"]
+    }
+
+
+def transacao_json(transacao: dict) -> dict:
+    """Campos de uma transação, como em `Transacao`"""
+    return {
+        "valor": centavos_para_reais(transacao["valor"]),
+        "descricao": transacao["descricao"],
+        "id": transacao["id"],
+        "tipo": transacao["tipo"],
+        "conta_id": transacao["conta_id"],
+        "data_transacao": transacao["data_transacao"],
+        "saldo_anterior": centavos_para_reais(transacao["saldo_anterior"]),
+        "saldo_posterior": centavos_para_reais(transacao["saldo_posterior"])
+    }
+
+
+def transacoes_json(transacoes: Iterable[dict]) -> List[dict]:
+    return [transacao_json(transacao) for transacao in transacoes]
+
+
+def totais_json(estatisticas: dict) -> dict:
+    """Totais de depósitos, saques e transferências e quantidade, como nos modelos de estatística"""
+    return {
+        "total_depositos": centavos_para_reais(estatisticas["total_depositos"]),
+        "total_saques": centavos_para_reais(estatisticas["total_saques"]),
+        "total_transferencias_recebidas": centavos_para_reais(
+            estatisticas["total_transferencias_recebidas"]
+        ),
+        "total_transferencias_enviadas": centavos_para_reais(
+            estatisticas["total_transferencias_enviadas"]
+        ),
+        "quantidade_transacoes": estatisticas["quantidade_transacoes"]
+    }
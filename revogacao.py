@@ -0,0 +1,209 @@
+"""
+Revogação de tokens JWT antes do `exp`
+
+Cada token carrega um `jti` aleatório. Revogar grava o `jti` com o `exp`
+do token em um dict (verificação exata) e em um filtro de Bloom que fica
+na frente dele: a grande maioria das consultas é de tokens não revogados,
+respondida pelo filtro sem consultar o dict. Só os positivos do filtro
+(revogados de fato ou falsos positivos) passam pela verificação exata.
+
+Entradas deixam de valer no `exp` do token, quando ele seria recusado de
+qualquer forma, e são removidas nas revogações seguintes. Um filtro de
+Bloom não remove itens: quando atinge a capacidade, é reconstruído só com
+as revogações ainda válidas.
+
+O filtro e o dict são do processo; a fonte comum é o backend, que grava
+cada revogação (`gravar_revogacao`). Cada worker carrega as revogações
+válidas no startup e, com um backend compartilhado, incorpora as dos
+demais workers a cada REVOGACAO_SINCRONIZACAO_SEGUNDOS
+(`sincronizar_revogacoes`).
+"""
+from heapq import heappop, heappush
+from math import ceil, log
+from typing import Awaitable, Callable, Dict, Iterable, List, Tuple
+import asyncio
+import logging
+import threading
+import time
+
+
+MASCARA_64 = (1 << 64) - 1
+
+# Cada consulta de sincronização volta este tanto antes da anterior, para
+# pegar revogações gravadas (commitadas) fora da ordem dos instantes
+MARGEM_SINCRONIZACAO_SEGUNDOS = 5.0
+
+logger = logging.getLogger("api_bancaria.revogacao")
+
+
+class FiltroBloom:
+    """
+    Filtro de Bloom sobre um bytearray
+    
+    As `funcoes` posições de um item saem de duplo hashing sobre `hash()`
+    do Python: a semente aleatória por processo não importa, porque o
+    filtro nunca sai do processo, e o hash de uma str fica em cache no
+    próprio objeto.
+    """
+    
+    def __init__(self, capacidade: int, taxa_falso_positivo: float):
+        capacidade = max(1, capacidade)
+        self.capacidade = capacidade
+        self.bits = max(64, ceil(-capacidade * log(taxa_falso_positivo) / log(2) ** 2))
+        self.funcoes = max(1, round(self.bits / capacidade * log(2)))
+        self._mapa = bytearray((self.bits + 7) // 8)
+        self.quantidade = 0
+    
+    def adicionar(self, item: str):
+        h = hash(item) & MASCARA_64
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        for i in range(self.funcoes):
+            posicao = (h1 + i * h2) % self.bits
+            self._mapa[posicao >> 3] |= 1 << (posicao & 7)
+        self.quantidade += 1
+    
+    def __contains__(self, item: str) -> bool:
+        h = hash(item) & MASCARA_64
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        mapa, bits = self._mapa, self.bits
+        # Um item ausente costuma parar na primeira ou segunda posição
+        for i in range(self.funcoes):
+            posicao = (h1 + i * h2) % bits
+            if not mapa[posicao >> 3] & (1 << (posicao & 7)):
+                return False
+        return True
+
+
+class RevogacaoTokens:
+    """Tokens revogados por `jti`, válidos até o `exp` de cada token"""
+    
+    def __init__(self, capacidade: int, taxa_falso_positivo: float = 0.001):
+        self.capacidade = max(1, capacidade)
+        self.taxa_falso_positivo = taxa_falso_positivo
+        self._filtro = FiltroBloom(self.capacidade, taxa_falso_positivo)
+        self._revogados: Dict[str, float] = {}
+        self._expiracoes: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+        
+        # Métricas (aproximadas sob concorrência)
+        self.consultas = 0
+        self.positivos_filtro = 0
+        self.falsos_positivos = 0
+        self.revogacoes = 0
+        self.expiradas = 0
+        self.reconstrucoes = 0
+        self.sincronizadas = 0
+    
+    def revogar(self, jti: str, exp: float):
+        """Revoga o token de `jti` até o seu `exp` (época Unix)"""
+        with self._lock:
+            self._expirar(time.time())
+            if jti in self._revogados:
+                return
+            # O dict antes do filtro: todo positivo do filtro encontra a entrada
+            self._revogados[jti] = exp
+            heappush(self._expiracoes, (exp, jti))
+            self._filtro.adicionar(jti)
+            self.revogacoes += 1
+            if self._filtro.quantidade > self._filtro.capacidade:
+                self._reconstruir()
+    
+    def incorporar(self, revogados: Iterable[Tuple[str, float]]) -> int:
+        """
+        Acrescenta revogações lidas do backend (jti, exp), ignorando as já
+        conhecidas e as expiradas
+        
+        Returns:
+            int: Quantidade de revogações novas
+        """
+        agora = time.time()
+        novas = 0
+        with self._lock:
+            self._expirar(agora)
+            for jti, exp in revogados:
+                if exp <= agora or jti in self._revogados:
+                    continue
+                self._revogados[jti] = exp
+                heappush(self._expiracoes, (exp, jti))
+                self._filtro.adicionar(jti)
+                novas += 1
+            if self._filtro.quantidade > self._filtro.capacidade:
+                self._reconstruir()
+            self.sincronizadas += novas
+        return novas
+    
+    def revogado(self, jti: str) -> bool:
+        """Se o token de `jti` foi revogado e ainda não expirou"""
+        self.consultas += 1
+        # Sem revogações (o caso comum) nem o filtro é consultado
+        if not self._revogados or jti not in self._filtro:
+            return False
+        self.positivos_filtro += 1
+        exp = self._revogados.get(jti)
+        if exp is None:
+            self.falsos_positivos += 1
+            return False
+        return exp > time.time()
+    
+    def _expirar(self, agora: float):
+        """Remove as revogações de tokens já expirados (com o lock adquirido)"""
+        while self._expiracoes and self._expiracoes[0][0] <= agora:
+            _, jti = heappop(self._expiracoes)
+            if self._revogados.pop(jti, None) is not None:
+                self.expiradas += 1
+    
+    def _reconstruir(self):
+        """
+        Recria o filtro só com as revogações válidas (com o lock adquirido)
+        
+        Se elas sozinhas ocupam mais da metade da capacidade, a capacidade
+        dobra, mantendo a taxa de falsos positivos e espaçando as
+        reconstruções.
+        """
+        if len(self._revogados) * 2 > self.capacidade:
+            self.capacidade *= 2
+        filtro = FiltroBloom(self.capacidade, self.taxa_falso_positivo)
+        for jti in self._revogados:
+            filtro.adicionar(jti)
+        self._filtro = filtro
+        self.reconstrucoes += 1
+    
+    def metricas(self) -> dict:
+        filtro = self._filtro
+        return {
+            "revogados": len(self._revogados),
+            "capacidade": self.capacidade,
+            "bits_filtro": filtro.bits,
+            "funcoes_hash": filtro.funcoes,
+            "consultas": self.consultas,
+            "positivos_filtro": self.positivos_filtro,
+            "falsos_positivos": self.falsos_positivos,
+            "revogacoes": self.revogacoes,
+            "expiradas": self.expiradas,
+            "reconstrucoes": self.reconstrucoes,
+            "sincronizadas": self.sincronizadas
+        }
+
+
+async def sincronizar_revogacoes(
+    revogacoes: RevogacaoTokens,
+    listar: Callable[[float], Awaitable[List[Tuple[str, float]]]],
+    intervalo: float
+):
+    """
+    Incorpora periodicamente as revogações gravadas por outros workers
+    
+    Roda até ser cancelada. `listar(desde)` devolve as revogações válidas
+    gravadas a partir do instante `desde`; uma falha (ex: banco fora do
+    ar) é registrada no log e a janela é repetida na próxima rodada.
+    """
+    desde = time.time()
+    while True:
+        await asyncio.sleep(intervalo)
+        inicio = time.time()
+        try:
+            revogacoes.incorporar(await listar(desde - MARGEM_SINCRONIZACAO_SEGUNDOS))
+        except Exception:
+            logger.exception("Falha ao sincronizar as revogações de tokens")
+            continue
+        desde = inicio
@@ -0,0 +1,79 @@
+"""
+Inicialização do servidor uvicorn com um ou vários workers
+
+Cada worker é um processo com sua própria instância do backend. Com o
+banco em memória cada processo teria um banco diferente, então vários
+workers exigem um backend compartilhado (SQLite no mesmo arquivo ou
+PostgreSQL), que também guarda as chaves de idempotência, válidas entre
+os workers. Sem --workers (ou WORKERS=0), usa um worker por núcleo com
+backend compartilhado e um único worker com o banco em memória.
+
+Uso:
+    python servidor.py
+    DATABASE_BACKEND=sqlite SQLITE_PATH=banco.db python servidor.py --workers 4
+    python servidor.py --reload
+"""
+import argparse
+import os
+import uvicorn
+from config import settings
+
+
+BACKENDS_COMPARTILHADOS = ("sqlite", "postgres")
+
+
+def calcular_workers(solicitados: int, backend: str) -> int:
+    """
+    Quantidade de workers para o backend
+    
+    Args:
+        solicitados: Workers pedidos (0 = automático)
+        backend: Backend de armazenamento configurado
+    
+    Raises:
+        ValueError: Vários workers com um backend que não é compartilhado
+    """
+    compartilhado = backend in BACKENDS_COMPARTILHADOS
+    if solicitados <= 0:
+        return (os.cpu_count() or 1) if compartilhado else 1
+    if solicitados > 1 and not compartilhado:
+        raise ValueError(
+            f"O backend '{backend}' não é compartilhado entre processos: cada worker "
+            "teria seu próprio banco. Use DATABASE_BACKEND=sqlite ou postgres."
+        )
+    return solicitados
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--workers", type=int, default=settings.WORKERS, help="0 = automático")
+    parser.add_argument("--host", default=settings.HOST)
+    parser.add_argument("--port", type=int, default=settings.PORT)
+    parser.add_argument("--reload", action="store_true", help="Reinicia ao alterar o código (um worker)")
+    args = parser.parse_args()
+    
+    try:
+        workers = calcular_workers(args.workers, settings.DATABASE_BACKEND)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.reload and workers > 1:
+        parser.error("--reload funciona com um único worker")
+    
+    # Divide os núcleos entre os pools de bcrypt dos workers, a menos que
+    # o tamanho do pool tenha sido configurado explicitamente
+    if workers > 1 and "HASH_POOL_WORKERS" not in os.environ:
+        os.environ["HASH_POOL_WORKERS"] = str(max(1, (os.cpu_count() or 1) // workers))
+    
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        reload=args.reload
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Armazenamento colunar das transações do banco em memória
+
+Um dict por transação custa perto de 1KB (tabela hash, chaves, floats e
+datetime). Aqui cada campo fica em um `array` tipado: tipo em 1 byte,
+valores em centavos e datas em microssegundos, ambos em int64. A
+descrição é a única coluna de objetos Python.
+"""
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+from itertools import compress
+from typing import Dict, Iterator, List, Optional
+from models import TipoTransacao
+from repositorio import EstatisticasConta, periodo_da_data
+import sys
+import threading
+
+
+EPOCA = datetime(1970, 1, 1)
+MICROSSEGUNDO = timedelta(microseconds=1)
+
+TIPOS = [tipo.value for tipo in TipoTransacao]
+CODIGOS_TIPO = {tipo: codigo for codigo, tipo in enumerate(TIPOS)}
+
+
+def para_microssegundos(data: datetime) -> int:
+    """Converte uma data (sem fuso) para microssegundos desde a época"""
+    return (data - EPOCA) // MICROSSEGUNDO
+
+
+class TabelaTransacoes(Mapping):
+    """
+    Transações em colunas indexadas pelo ID
+    
+    A transação de ID `n` ocupa a linha `n - 1`. Como os IDs são
+    reservados antes da gravação, linhas podem ser preenchidas fora de
+    ordem; linhas ainda vazias têm conta_id 0 e não aparecem na tabela.
+    
+    Implementa a interface de um dict somente leitura (`tabela[id]`,
+    `get`, `values`, `len`...) em que cada acesso monta um dict novo com
+    os mesmos campos de antes. Gravações usam `inserir`.
+    """
+    
+    def __init__(self):
+        self._conta_id = array("q")
+        self._tipo = array("B")
+        self._valor = array("q")
+        self._saldo_anterior = array("q")
+        self._saldo_posterior = array("q")
+        self._data = array("q")
+        self._descricao: List[Optional[str]] = []
+        self._quantidade = 0
+        self._lock = threading.Lock()
+    
+    def _colunas_numericas(self) -> tuple:
+        return (
+            self._conta_id, self._tipo, self._valor,
+            self._saldo_anterior, self._saldo_posterior, self._data
+        )
+    
+    def _garantir_linha(self, linha: int):
+        """Estende as colunas até conter a linha (chamado com o lock adquirido)"""
+        faltam = linha + 1 - len(self._conta_id)
+        if faltam <= 0:
+            return
+        for coluna in self._colunas_numericas():
+            coluna.extend(array(coluna.typecode, bytes(coluna.itemsize * faltam)))
+        self._descricao.extend([None] * faltam)
+    
+    def inserir(self, transacao: dict):
+        """Grava uma transação na linha correspondente ao seu ID"""
+        linha = transacao["id"] - 1
+        with self._lock:
+            self._garantir_linha(linha)
+            if self._conta_id[linha]:
+                raise ValueError(f"Transação {transacao['id']} já existe")
+            self._tipo[linha] = CODIGOS_TIPO[transacao["tipo"]]
+            self._valor[linha] = transacao["valor"]
+            self._saldo_anterior[linha] = transacao["saldo_anterior"]
+            self._saldo_posterior[linha] = transacao["saldo_posterior"]
+            self._data[linha] = para_microssegundos(transacao["data_transacao"])
+            self._descricao[linha] = transacao["descricao"]
+            # conta_id por último: marca a linha como preenchida para leitores sem lock
+            self._conta_id[linha] = transacao["conta_id"]
+            self._quantidade += 1
+    
+    def _linha(self, transacao_id: int) -> int:
+        linha = transacao_id - 1
+        if linha < 0 or linha >= len(self._conta_id) or not self._conta_id[linha]:
+            raise KeyError(transacao_id)
+        return linha
+    
+    def __getitem__(self, transacao_id: int) -> dict:
+        linha = self._linha(transacao_id)
+        return {
+            "id": transacao_id,
+            "conta_id": self._conta_id[linha],
+            "tipo": TIPOS[self._tipo[linha]],
+            "valor": self._valor[linha],
+            "descricao": self._descricao[linha],
+            "saldo_anterior": self._saldo_anterior[linha],
+            "saldo_posterior": self._saldo_posterior[linha],
+            "data_transacao": EPOCA + timedelta(microseconds=self._data[linha])
+        }
+    
+    def __contains__(self, transacao_id) -> bool:
+        try:
+            self._linha(transacao_id)
+        except (KeyError, TypeError):
+            return False
+        return True
+    
+    def __iter__(self) -> Iterator[int]:
+        for linha, conta_id in enumerate(self._conta_id):
+            if conta_id:
+                yield linha + 1
+    
+    def __len__(self) -> int:
+        return self._quantidade
+    
+    def instante(self, transacao_id: int) -> int:
+        """Data da transação em microssegundos, sem montar o dict"""
+        return self._data[self._linha(transacao_id)]
+    
+    def agregar(self, transacao_ids: array) -> EstatisticasConta:
+        """
+        Totais de depósitos, saques e transferências de uma conta, gerais e por mês
+    
+        As datas crescem com os IDs dentro de uma conta, então cada mês é
+        uma faixa contígua do índice, achada por busca binária. As somas
+        de cada faixa rodam em sum() sobre as colunas, sem montar dicts.
+        """
+        linhas = [transacao_id - 1 for transacao_id in transacao_ids]
+        valores = array("q", map(self._valor.__getitem__, linhas))
+        tipos = bytes(map(self._tipo.__getitem__, linhas))
+        instantes = array("q", map(self._data.__getitem__, linhas))
+        anteriores = array("q", map(self._saldo_anterior.__getitem__, linhas))
+        posteriores = array("q", map(self._saldo_posterior.__getitem__, linhas))
+    
+        periodos: Dict[str, dict] = {}
+        inicio = 0
+        while inicio < len(linhas):
+            data = EPOCA + timedelta(microseconds=instantes[inicio])
+            proximo_mes = datetime(data.year + data.month // 12, data.month % 12 + 1, 1)
+            fim = bisect_left(instantes, para_microssegundos(proximo_mes), inicio)
+            periodos[periodo_da_data(data)] = self._somar(
+                valores[inicio:fim], tipos[inicio:fim],
+                anteriores[inicio:fim], posteriores[inicio:fim]
+            )
+            inicio = fim
+    
+        return self._somar(valores, tipos, anteriores, posteriores), periodos
+    
+    @staticmethod
+    def _somar(valores: array, tipos: bytes, anteriores: array, posteriores: array) -> dict:
+        """Agregados de uma faixa de transações"""
+        deposito = CODIGOS_TIPO[TipoTransacao.DEPOSITO.value]
+        saque = CODIGOS_TIPO[TipoTransacao.SAQUE.value]
+        transferencia = CODIGOS_TIPO[TipoTransacao.TRANSFERENCIA.value]
+        
+        # Só as transferências passam pelo laço, que separa as pernas pelo sentido
+        recebidas = enviadas = 0
+        for valor, anterior, posterior in compress(
+            zip(valores, anteriores, posteriores), map(transferencia.__eq__, tipos)
+        ):
+            if posterior > anterior:
+                recebidas += valor
+            else:
+                enviadas += valor
+        
+        return {
+            "total_depositos": sum(compress(valores, map(deposito.__eq__, tipos))),
+            "total_saques": sum(compress(valores, map(saque.__eq__, tipos))),
+            "total_transferencias_recebidas": recebidas,
+            "total_transferencias_enviadas": enviadas,
+            "quantidade_transacoes": len(valores)
+        }
+    
+    def copiar(self) -> "TabelaTransacoes":
+        """Cópia independente das colunas (para snapshots)"""
+        copia = TabelaTransacoes()
+        with self._lock:
+            for destino, origem in zip(copia._colunas_numericas(), self._colunas_numericas()):
+                destino.extend(origem)
+            copia._descricao = list(self._descricao)
+            copia._quantidade = self._quantidade
+        return copia
+    
+    def tamanho_bytes(self) -> int:
+        """Memória ocupada pelas colunas (sem o texto das descrições)"""
+        return sum(
+            coluna.buffer_info()[1] * coluna.itemsize
+            for coluna in self._colunas_numericas()
+        ) + sys.getsizeof(self._descricao)
+    
+    def metricas(self) -> dict:
+        return {
+            "quantidade": self._quantidade,
+            "bytes_colunas": self.tamanho_bytes()
+        }